@@ -0,0 +1,229 @@
+# analysis_pool.py
+"""Server-wide process pool shared by every Streamlit session, with admission control.
+
+Los análisis de todas las sesiones pasan por un único AnalysisPool: como mucho
+``workers`` corren a la vez en procesos separados (fuera del GIL del servidor)
+y el resto espera en una cola FIFO propia, así cada sesión puede mostrar su
+posición y cancelar lo que todavía no empezó. Un análisis ya en curso no se
+interrumpe, pero su resultado se descarta y libera el lugar al terminar.
+La aplicación obtiene la instancia con ``st.cache_resource`` (ver app.py).
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+
+
+class PoolBusyError(Exception):
+    """Raised when the waiting queue of the pool is full."""
+
+
+def analyze_upload(path, selected_services=None, full_detail=True, depth_range=None, events=None):
+    """Worker entry point for the app: full QC plus the quality table HTML and curve fingerprints.
+
+    Con ``events`` (una cola del pool) se publican los resultados parciales
+    del encabezado y de cada curva a medida que se calculan. Las duraciones de
+    cada etapa vuelven en ``result["timings"]`` (ver timing.py). Con
+    ``full_detail=False`` solo se controlan las curvas de los servicios pedidos
+    y con ``depth_range`` (tope, base) solo las muestras de ese intervalo.
+    """
+    from config import get_load_settings
+    from fingerprint import compute_fingerprints
+    from qc_core import analyze_file
+    from timing import recording, span
+
+    with recording() as recorder:
+        result = analyze_file(path, selected_services, include_html=True,
+                              event_callback=events.put if events is not None else None,
+                              engine=get_load_settings()["engine"], full_detail=full_detail,
+                              depth_range=depth_range)
+        with span("fingerprints"):
+            result["fingerprints"] = compute_fingerprints(result["las"])
+    result["timings"] = recorder.to_dict()
+    return result
+
+
+def analyze_upload_profiled(path, selected_services, key, file_name, full_detail=True, depth_range=None,
+                            events=None):
+    """Same as analyze_upload, under cProfile and tracemalloc; the profile is stored by ``key`` (see profiling.py)."""
+    import bs4  # noqa: F401
+    import lasio  # noqa: F401
+    import welly.quality  # noqa: F401
+    from profiling import profile_call
+
+    # Los imports de la primera corrida del proceso taparían el costo propio del archivo
+    return profile_call(key, file_name, analyze_upload, path, selected_services, full_detail, depth_range,
+                        events)
+
+
+class Ticket:
+    """Handle of one submitted analysis, owned by a session."""
+
+    def __init__(self, pool, ticket_id, session_id, fn, args):
+        self.pool = pool
+        self.ticket_id = ticket_id
+        self.session_id = session_id
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+        self.events = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.last_seen = self.submitted_at
+
+    def touch(self):
+        """Heartbeat from the session: it is still waiting for the result."""
+        self.last_seen = time.monotonic()
+
+    def position(self):
+        """Return the 1-based place in the waiting queue, or 0 once running or finished."""
+        return self.pool.position(self)
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """Block until the result is ready or the timeout expires; return done()."""
+        wait([self.future], timeout=timeout)
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout=timeout)
+
+    def cancel(self):
+        """Cancel the analysis; a running one is left to finish and its result discarded."""
+        self.pool.cancel(self)
+
+    def poll_events(self):
+        """Return the partial results published by the worker since the last call."""
+        polled = []
+        if self.events is None:
+            return polled
+        while True:
+            try:
+                polled.append(self.events.get_nowait())
+            except queue.Empty:
+                return polled
+
+
+class AnalysisPool:
+    """Bounded process pool with a visible FIFO queue and per-ticket cancellation."""
+
+    def __init__(self, workers=None, max_queue=32, heartbeat_timeout=30.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.heartbeat_timeout = heartbeat_timeout
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._lock = threading.Lock()
+        self._waiting = []
+        self._running = set()
+        self._ids = itertools.count(1)
+        self._manager = None
+        self.stats = {"submitted": 0, "completed": 0, "cancelled": 0, "rejected": 0}
+        self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self._reaper.start()
+
+    def submit(self, session_id, fn, *args, with_events=False):
+        """Queue ``fn(*args)`` for a session; raise PoolBusyError when the queue is full.
+
+        Con ``with_events`` la función recibe además una cola (último argumento)
+        para publicar resultados parciales, que la sesión lee con poll_events.
+        """
+        with self._lock:
+            if len(self._waiting) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise PoolBusyError("El servidor está ocupado: demasiados análisis en espera")
+            events = self._event_queue() if with_events else None
+            ticket = Ticket(self, next(self._ids), session_id, fn, args + (events,) if with_events else args)
+            ticket.events = events
+            self._waiting.append(ticket)
+            self.stats["submitted"] += 1
+        self._dispatch()
+        return ticket
+
+    def _event_queue(self):
+        # El Manager (un proceso aparte) se crea recién la primera vez que se piden eventos
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager.Queue()
+
+    def position(self, ticket):
+        with self._lock:
+            try:
+                return self._waiting.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def cancel(self, ticket):
+        with self._lock:
+            if ticket.future.done():
+                return
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+            elif ticket not in self._running:
+                return
+            self.stats["cancelled"] += 1
+        ticket.future.cancel()
+
+    def cancel_session(self, session_id):
+        """Cancel every pending or running ticket of a session (e.g. a new ANALIZAR replaced it)."""
+        with self._lock:
+            tickets = [ticket for ticket in self._waiting + list(self._running) if ticket.session_id == session_id]
+        for ticket in tickets:
+            ticket.cancel()
+
+    def status(self):
+        """Return a snapshot for monitoring."""
+        with self._lock:
+            return dict(self.stats, workers=self.workers, running=len(self._running), waiting=len(self._waiting))
+
+    def _dispatch(self):
+        with self._lock:
+            started = []
+            while self._waiting and len(self._running) < self.workers:
+                ticket = self._waiting.pop(0)
+                ticket.started_at = time.monotonic()
+                self._running.add(ticket)
+                started.append(ticket)
+        for ticket in started:
+            try:
+                process_future = self.executor.submit(ticket.fn, *ticket.args)
+            except Exception as e:
+                self._finish(ticket, None, e)
+                continue
+            process_future.add_done_callback(lambda f, ticket=ticket: self._finish(ticket, f))
+
+    def _finish(self, ticket, process_future, error=None):
+        with self._lock:
+            self._running.discard(ticket)
+            self.stats["completed"] += 1
+        if not ticket.future.done():
+            if error is None:
+                error = process_future.exception()
+            if error is not None:
+                ticket.future.set_exception(error)
+            else:
+                ticket.future.set_result(process_future.result())
+        self._dispatch()
+
+    def _reap_loop(self):
+        # Sesiones cerradas sin avisar: su análisis deja de esperar resultado
+        while True:
+            time.sleep(max(1.0, self.heartbeat_timeout / 3))
+            limit = time.monotonic() - self.heartbeat_timeout
+            with self._lock:
+                stale = [ticket for ticket in self._waiting + list(self._running) if ticket.last_seen < limit]
+            for ticket in stale:
+                ticket.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            waiting, self._waiting = self._waiting, []
+        for ticket in waiting:
+            ticket.future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
@@ -1,64 +1,88 @@
+import logging
 import os
+import re
+import time
 import streamlit as st
 import shutil
-from las_processing import load_data, process_las_file
-from config import get_service_groups, get_alias, validate_header
-import welly.quality as q
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit import runtime
+from analysis_pool import AnalysisPool, PoolBusyError, analyze_upload, analyze_upload_profiled
+from upload_store import UploadStore
+from config import (get_service_groups, get_delivery_settings, get_load_settings, get_metrics_settings,
+                    get_pool_settings, get_profiling_settings, get_upload_settings)
+from timing import append_metrics_log, recording, span
+import metrics
+from profiling import list_profiles, read_artifact
+from compression import available_codecs
+from delivery import deliver_file, delivery_file_name
+from sidecar import available_formats
+from catalog import (connect as connect_catalog, find_by_checksum, is_date_filter, record_delivery,
+                     search as search_catalog)
+from qc_core import HeaderPrecheck
+from fingerprint import check_duplicates, compute_fingerprints, format_duplicates
+from columnar import load_full_las
 import pandas as pd
-from bs4 import BeautifulSoup
+from logging_setup import configure_logging
 
-def save_uploadedfile(uploadedfile, temp_dir="tempDir"):
-    os.makedirs(temp_dir, exist_ok=True)
-    file_path = os.path.join(temp_dir, uploadedfile.name)
-    
-    # Implementación de la barra de progreso
-    with open(file_path, "wb") as f:
-        file_size = uploadedfile.size
-        chunk_size = 1024 * 1024  # 1 MB
-        bytes_read = 0
+configure_logging()
+logger = logging.getLogger(__name__)
 
-        progress = st.progress(0)
-        
-        while bytes_read < file_size:
-            chunk = uploadedfile.read(chunk_size)
-            if not chunk:
-                break
-            f.write(chunk)
-            bytes_read += len(chunk)
-            progress.progress(min(bytes_read / file_size, 1.0))
-        
-        progress.empty()
-
-    return file_path
-
-def save_to_shared_drive(file_path, file_name, fld_value, well_name):
-    destination_folder = os.path.join("Y:/Workover/STAFF/Wireline/Perfil_verificado", fld_value, well_name)
-    destination_path = os.path.join(destination_folder, file_name)
+def save_uploadedfile(uploadedfile, store, session_id):
+    """Store the upload while hashing it and pre-checking its header; return (sha256, path, precheck, seconds)."""
+    # Implementación de la barra de progreso
+    progress = st.progress(0)
+    precheck = HeaderPrecheck()
+    started = time.perf_counter()
+    sha, file_path = store.add(session_id, uploadedfile, uploadedfile.name, progress_callback=progress.progress,
+                               chunk_callback=precheck.feed)
+    elapsed = time.perf_counter() - started
+    progress.empty()
+    return sha, file_path, precheck, elapsed
+
+def analysis_key(selected_services, full_detail=True, depth_range=None):
+    """Key of the result cache: the same upload analyzed with other options is a different result."""
+    return tuple(sorted(selected_services or ())), full_detail, depth_range
+
+def upload_summary(uploads, selected_services, full_detail=True, depth_range=None):
+    """Return one row per upload with the header pre-check, archive lookup and cached results."""
+    store = get_upload_store()
+    result_key = analysis_key(selected_services, full_detail, depth_range)
     try:
-        os.makedirs(destination_folder, exist_ok=True)
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"El archivo de origen no existe: {file_path}")
-        if not os.access(file_path, os.R_OK):
-            raise PermissionError(f"No se puede leer el archivo de origen: {file_path}")
-
-        with open(file_path, 'rb') as src:
-            total_size = os.path.getsize(file_path)
-            copied_size = 0
-            chunk_size = 1024 * 1024  # 1 MB
-            progress = st.progress(0)
-            
-            with open(destination_path, 'wb') as dst:
-                while True:
-                    chunk = src.read(chunk_size)
-                    if not chunk:
-                        break
-                    dst.write(chunk)
-                    copied_size += len(chunk)
-                    progress.progress(min(copied_size / total_size, 1.0))
-        
+        conn = connect_catalog()
+    except Exception:
+        conn = None
+    rows = []
+    try:
+        for upload in uploads.values():
+            precheck = upload["precheck"] or {}
+            archived = find_by_checksum(conn, upload["sha"]) if conn is not None else []
+            rows.append({
+                "Archivo": upload["name"],
+                "Pozo": precheck.get("well", ""),
+                "Compañía": precheck.get("company", ""),
+                "Servicios detectados": ", ".join(precheck.get("detected_services", [])),
+                "Encabezado": upload["error"] or ("CUMPLE" if precheck.get("header_ok") else "NO CUMPLE"),
+                "En archivo verificado": " | ".join(archived) or "No",
+                "Análisis previo": "Sí" if store.get_result(upload["sha"], result_key) is not None else "No",
+            })
+    finally:
+        if conn is not None:
+            conn.close()
+    return pd.DataFrame(rows)
+
+def save_to_shared_drive(file_path, file_name, fld_value, well_name, compression=None, keep_original=None, las=None, sidecar=None):
+    try:
+        progress = st.progress(0)
+        started = time.perf_counter()
+        with span("share_copy"):
+            destination_paths = deliver_file(file_path, file_name, fld_value, well_name,
+                                             compression=compression, keep_original=keep_original,
+                                             progress_callback=progress.progress, las=las, sidecar=sidecar)
+        metrics.observe_copy(os.path.getsize(file_path), time.perf_counter() - started)
         progress.empty()
-        return True, destination_path
+        return True, destination_paths
     except FileNotFoundError as fnf_error:
         return False, str(fnf_error)
     except PermissionError as perm_error:
@@ -66,6 +90,229 @@ def save_to_shared_drive(file_path, file_name, fld_value, well_name):
     except Exception as e:
         return False, str(e)
 
+@st.cache_resource
+def get_upload_store():
+    """One upload store for the whole server, shared by every session."""
+    return UploadStore(**get_upload_settings())
+
+@st.cache_resource
+def get_analysis_pool():
+    """One analysis pool for the whole server, shared by every session."""
+    return AnalysisPool(**get_pool_settings())
+
+@st.cache_resource
+def get_metrics_exporter():
+    """Start the Prometheus exporter once per server and bind the pool gauges; None if disabled or busy."""
+    pool = get_analysis_pool()
+    metrics.QUEUE_DEPTH.set_function(lambda: pool.status()["waiting"])
+    metrics.RUNNING.set_function(lambda: pool.status()["running"])
+    settings = get_metrics_settings()
+    if not settings["port"]:
+        return None
+    try:
+        return metrics.start_http_server(settings["port"], settings["host"])
+    except OSError as e:
+        # Otro servidor de Streamlit en la misma máquina ya usa el puerto: quedan la página de métricas
+        logger.warning("No se pudo iniciar el exportador de métricas en el puerto %s: %s", settings["port"], e)
+        return None
+
+@st.cache_resource
+def get_profiling_state():
+    """Server-wide profiling switch, toggled from the metrics page."""
+    return {"enabled": get_profiling_settings()["enabled"]}
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def keep_alive(tickets, session_id, stop, interval):
+    """Heartbeat the tickets of a session until ``stop`` is set or the session closes."""
+    while not stop.wait(interval):
+        if session_id and runtime.exists() and not runtime.get_instance().is_active_session(session_id):
+            return
+        for ticket in tickets:
+            ticket.touch()
+
+def stream_analyses(file_paths, selected_services, file_hashes=None, on_events=None, file_names=None, full_detail=True,
+                    depth_range=None):
+    """Analyze files in the shared pool, yielding (path, result, error) as each one finishes.
+
+    Mientras espera muestra cuántos archivos están en análisis y la posición
+    en la cola del servidor. Con ``file_hashes`` (ruta → sha256) se reutiliza
+    el resultado de una subida idéntica ya analizada con los mismos servicios.
+    ``on_events(path, eventos)`` recibe los resultados parciales de cada archivo.
+    Cada resultado trae en ``timings`` las etapas del proceso de análisis más
+    la espera en la cola del pool y el traspaso entre procesos. Con el
+    perfilado activo no se usa el caché y cada análisis guarda su perfil.
+    Sin ``full_detail`` solo se controlan las curvas de los servicios elegidos
+    y con ``depth_range`` (tope, base) solo las muestras de ese intervalo.
+    """
+    pool = get_analysis_pool()
+    store = get_upload_store()
+    file_hashes = file_hashes or {}
+    file_names = file_names or {}
+    profile = get_profiling_state()["enabled"]
+    result_key = analysis_key(selected_services, full_detail, depth_range)
+    session_id = current_session_id()
+    # Un nuevo ANALIZAR reemplaza al anterior de la misma sesión
+    pool.cancel_session(session_id)
+    tickets = {}
+    for file_path in file_paths:
+        sha = file_hashes.get(file_path)
+        cached = store.get_result(sha, result_key) if sha and not profile else None
+        if sha and not profile:
+            metrics.RESULT_CACHE.inc(result="hit" if cached is not None else "miss")
+        if cached is not None:
+            # Las etapas guardadas corresponden a la corrida original, no a esta
+            timings = cached.get("timings") or {}
+            yield file_path, dict(cached, timings={"attrs": dict(timings.get("attrs", {}), cached=True),
+                                                   "spans": {}}), None
+            continue
+        try:
+            if profile:
+                file_name = file_names.get(file_path, os.path.basename(file_path))
+                ticket = pool.submit(session_id, analyze_upload_profiled, file_path, selected_services,
+                                     sha or os.path.basename(file_path), file_name, full_detail, depth_range,
+                                     with_events=on_events is not None)
+            else:
+                ticket = pool.submit(session_id, analyze_upload, file_path, selected_services, full_detail, depth_range,
+                                     with_events=on_events is not None)
+        except PoolBusyError as e:
+            yield file_path, None, f"{e}. Intente nuevamente en unos minutos."
+            continue
+        tickets[ticket.future] = ticket
+
+    status = st.empty()
+    pending = set(tickets)
+    # Mientras el llamador muestra y entrega un resultado no se vuelve a este bucle: el latido va aparte
+    stop = threading.Event()
+    threading.Thread(target=keep_alive, args=(list(tickets.values()), session_id, stop, pool.heartbeat_timeout / 3),
+                     daemon=True).start()
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.1 if on_events else 0.25, return_when=FIRST_COMPLETED)
+            if on_events:
+                for future in list(pending) + list(done):
+                    events = tickets[future].poll_events()
+                    if events:
+                        on_events(tickets[future].args[0], events)
+            for future in done:
+                ticket = tickets[future]
+                file_path = ticket.args[0]
+                try:
+                    result = future.result()
+                except Exception as e:  # QcError o falla del proceso: no corta el resto de los archivos
+                    metrics.observe_analysis(time.monotonic() - ticket.submitted_at, outcome="error")
+                    yield file_path, None, f"Error al analizar el archivo LAS: {e}"
+                    continue
+                metrics.observe_analysis(time.monotonic() - ticket.submitted_at, result["size_bytes"], result["parse_s"])
+                sha = file_hashes.get(file_path)
+                if sha:
+                    store.put_result(sha, result_key, result)
+                yield file_path, dict(result, timings=pool_timings(ticket, result.get("timings"))), None
+            positions = []
+            for future in pending:
+                positions.append(tickets[future].position())
+            waiting = [position for position in positions if position]
+            if waiting:
+                status.info(f"En espera: posición {min(waiting)} en la cola ({pool.workers} análisis simultáneos en el servidor)")
+            elif pending:
+                status.info("Analizando el archivo..." if len(pending) == 1 else f"Analizando {len(pending)} archivos...")
+    finally:
+        # Si la sesión se cierra o el script se vuelve a ejecutar, Streamlit corta la espera aquí
+        stop.set()
+        for future in pending:
+            tickets[future].cancel()
+        status.empty()
+
+def pool_timings(ticket, timings):
+    """Add the pool queue wait and the inter-process overhead to the worker timings of a ticket."""
+    timings = timings or {"attrs": {}, "spans": {}, "total_s": 0.0}
+    wall = time.monotonic() - ticket.submitted_at
+    queued = (ticket.started_at or ticket.submitted_at) - ticket.submitted_at
+    spans = dict(timings["spans"])
+    spans["pool.queue"] = queued
+    # Arranque del proceso, envío de argumentos y retorno del resultado (incluye el objeto LAS)
+    spans["pool.transfer"] = max(wall - queued - timings.get("total_s", 0.0), 0.0)
+    return dict(timings, spans=spans)
+
+def profile_downloads(meta, key_prefix):
+    """Download buttons for the artifacts of a stored profile."""
+    st.write(f"Perfil de {meta['file_name']} ({meta['created']}): {meta['elapsed_s']:.2f} s, "
+             f"pico de memoria {meta['peak_bytes'] / 1e6:.1f} MB" + (f" — error: {meta['error']}" if meta['error'] else ""))
+    columns = st.columns(3)
+    for column, name in zip(columns, ("profile.prof", "profile.txt", "allocations.txt")):
+        try:
+            data = read_artifact(meta, name)
+        except OSError:
+            column.write(f"{name}: no disponible")
+            continue
+        column.download_button(name, data, file_name=f"{meta['key'][:12]}_{name}", key=f"{key_prefix}_{meta['key']}_{name}")
+
+def performance_panel(record, profile=None):
+    """Show the stage durations of one analysis in a collapsible panel and append them to the metrics log."""
+    spans = record["spans"]
+    attrs = record["attrs"]
+    total = sum(spans.values())
+    with st.expander("Rendimiento"):
+        if attrs.get("cached"):
+            st.write("Resultado reutilizado de un análisis anterior del mismo archivo: solo se midieron las etapas de esta ejecución.")
+        size_mb = attrs.get("size_bytes", 0) / 1e6
+        st.write(f"Archivo: {size_mb:.2f} MB, {attrs.get('curves', 'N/A')} curvas, {attrs.get('samples', 'N/A')} muestras"
+                 f" — total medido {total:.2f} s")
+        rows = [{"Etapa": name, "ms": round(seconds * 1000, 1), "%": round(100 * seconds / total, 1) if total else 0.0}
+                for name, seconds in sorted(spans.items(), key=lambda item: -item[1])]
+        st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+        if profile:
+            profile_downloads(profile, "resultado")
+    try:
+        append_metrics_log(record)
+    except OSError as e:
+        st.warning(f"No se pudo escribir el log de métricas: {e}")
+
+def live_results():
+    """Placeholders filled with the partial results of a running analysis; return (on_events, clear)."""
+    header = st.empty()
+    curves = st.empty()
+    rows = []
+
+    def on_events(file_path, events):
+        for event in events:
+            if event[0] == "header":
+                with header.container():
+                    st.write("#### Encabezado")
+                    st.dataframe(event[1].drop(columns=['Empty']), width="stretch", hide_index=True)
+            elif event[0] == "curve":
+                result_row, stats_row = event[1], event[2]
+                rows.append({
+                    "Curva": result_row['Curve Name'],
+                    "Alias": result_row['Alias'],
+                    "Mín": stats_row['Min Value'],
+                    "Máx": stats_row['Max Value'],
+                    "Media": stats_row['Mean Value'],
+                    # Solo los íconos: el HTML completo se muestra al terminar
+                    "Pruebas": re.sub(r'<[^>]+>', '', result_row['Test Results']),
+                })
+                with curves.container():
+                    st.write(f"#### Curvas controladas: {len(rows)}")
+                    st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+
+    def clear():
+        header.empty()
+        curves.empty()
+
+    return on_events, clear
+
+def run_analysis(file_path, selected_services, file_hashes=None, file_names=None, full_detail=True, depth_range=None):
+    """Analyze one file in the shared pool showing partial results; None if it failed or was rejected."""
+    on_events, clear = live_results()
+    for _, result, error in stream_analyses([file_path], selected_services, file_hashes, on_events, file_names,
+                                            full_detail, depth_range):
+        clear()
+        if error:
+            st.error(error)
+        return result
+
 def highlight_rows(row):
     return ['background-color: red' if row['Empty'] == 'Yes' else '' for _ in row]
 
@@ -82,72 +329,288 @@ def highlight_cells(val):
         return f'color: {color};'
     return ''
 
-def transpose_html_table(html):
-    soup = BeautifulSoup(html, 'html.parser')
-    table = soup.find('table')
-
-    rows = table.find_all('tr')
-    num_cols = max(len(row.find_all(['td', 'th'])) for row in rows)
-    new_rows = [[] for _ in range(num_cols)]
-
-    for row in rows:
-        cells = row.find_all(['td', 'th'])
-        for i, cell in enumerate(cells):
-            new_rows[i].append(cell)
-
-    new_table = soup.new_tag('table')
-    for new_row in new_rows:
-        new_tr = soup.new_tag('tr')
-        for cell in new_row:
-            new_tr.append(cell)
-        new_table.append(new_tr)
-
-    table.replace_with(new_table)
-    return str(soup)
-
-def add_alias_column_to_html_table(html, alias_dict):
-    soup = BeautifulSoup(html, 'html.parser')
-    table = soup.find('table')
-
-    header = table.find('tr')
-    alias_header = soup.new_tag('th')
-    alias_header.string = 'Alias'
-    header.append(alias_header)
-
-    rows = table.find_all('tr')[1:]
-    for row in rows:
-        cells = row.find_all('td')
-        curve_name = cells[0].text.strip()
-        detected_alias = 'N/A'
-        for key, values in alias_dict.items():
-            if curve_name in values:
-                detected_alias = key
-                break
-        alias_cell = soup.new_tag('td')
-        alias_cell.string = detected_alias
-        row.append(alias_cell)
-
-    return str(soup)
+def catalog_page():
+    st.title('Catálogo de perfiles verificados')
 
-def main():
-    st.title('Control de calidad de información entregada')
+    service_groups = get_service_groups()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        well = st.text_input("Pozo (WELL)")
+        fld = st.text_input("Campo (FLD)")
+    with col2:
+        srvc = st.text_input("Compañía (SRVC)")
+        service = st.selectbox("Servicio", options=[""] + list(service_groups.keys()))
+    with col3:
+        curve = st.text_input("Curva (mnemónico)")
+        since = st.text_input("Desde (AAAA o AAAA-MM-DD)").strip()
+    if since and not is_date_filter(since):
+        st.warning(f"Fecha \"{since}\" no válida: use AAAA o AAAA-MM-DD. Se busca sin filtro de fecha.")
+        since = ""
+
+    conn = connect_catalog()
+    try:
+        results = search_catalog(conn, well=well, fld=fld, srvc=srvc, service=service or None,
+                                 curve=curve.strip() or None, since=since or None)
+    finally:
+        conn.close()
+
+    st.write(f"{len(results)} archivos encontrados")
+    st.dataframe(results, width="stretch", hide_index=True)
+
+def metrics_page():
+    st.title('Métricas de rendimiento')
+    pool = get_analysis_pool()
+    status = pool.status()
+
+    def seconds(value):
+        return f"{value:.2f} s" if value is not None else "N/A"
+
+    def rate(value):
+        return f"{value:.1f} MB/s" if value is not None else "N/A"
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Latencia p50", seconds(metrics.ANALYSIS_SECONDS.quantile(0.5)))
+    col1.metric("Latencia p95", seconds(metrics.ANALYSIS_SECONDS.quantile(0.95)))
+    col2.metric("Lectura (mediana)", rate(metrics.PARSE_MB_PER_SECOND.quantile(0.5)))
+    col2.metric("Copia (mediana)", rate(metrics.COPY_MB_PER_SECOND.quantile(0.5)))
+    hit_rate = metrics.cache_hit_rate()
+    col3.metric("En cola / en curso", f"{status['waiting']} / {status['running']}")
+    col3.metric("Aciertos de caché", f"{hit_rate:.0%}" if hit_rate is not None else "N/A")
+
+    st.write(f"Análisis: {metrics.ANALYSES.value(outcome='ok'):.0f} correctos, "
+             f"{metrics.ANALYSES.value(outcome='error'):.0f} con error, "
+             f"{metrics.BYTES_ANALYZED.value() / 1e6:.1f} MB leídos. Pool: {status}")
+    exporter = get_metrics_exporter()
+    if exporter is not None:
+        host, port = exporter.server_address[:2]
+        st.write(f"Exportador de Prometheus en http://{host}:{port}/metrics")
+    with st.expander("Texto de Prometheus"):
+        st.code(metrics.REGISTRY.render(), language="text")
+
+    st.write("### Perfilado")
+    profiling_state = get_profiling_state()
+    profiling_state["enabled"] = st.toggle("Perfilar los próximos análisis (cProfile + tracemalloc)",
+                                           value=profiling_state["enabled"],
+                                           help="Afecta a todas las sesiones; los análisis perfilados no usan el caché y son más lentos.")
+    profiles = list_profiles()
+    if not profiles:
+        st.write("No hay perfiles guardados.")
+    for meta in profiles[:20]:
+        with st.container(border=True):
+            profile_downloads(meta, "admin")
+
+def show_result(result, file_path, selected_services, delivery_options, upload_s=None, file_name=None):
+    """Render the QC of one analyzed file and deliver it if it complies; return the delivery status.
+
+    Al final muestra el panel "Rendimiento" con las etapas del análisis (del
+    proceso del pool) y las de esta sesión: subida, duplicados y copia.
+    """
+    with recording(file=file_name or os.path.basename(file_path), well=result["well"]) as recorder:
+        recorder.merge(result.get("timings") or {})
+        if upload_s is not None:
+            recorder.add("upload", upload_s)
+        delivery = render_result(result, file_path, selected_services, delivery_options)
+    record = recorder.to_dict()
+    record["attrs"]["delivery"] = delivery
+    performance_panel(record, result.get("profile"))
+    return delivery
+
+def render_result(result, file_path, selected_services, delivery_options):
+    las = result["las"]
+    well_info_df = result["well_info_df"]
+    stats_df = result["stats_df"]
+    well_name, company_name, date, fld_value = result["well"], result["company"], result["date"], result["field"]
+
+    st.subheader(f"En el pozo {well_name} la compañía {company_name} ejecutó los siguientes servicios:")
+    if result.get("depth_range") is not None:
+        top, bottom = result["depth_range"]
+        st.caption(f"Control de calidad solo sobre el intervalo {'inicio' if top is None else top} – "
+                   f"{'fin' if bottom is None else bottom} ({result['samples']} muestras).")
+
+    detected_services = result["detected_services"]
+    
+    valid_selected_services = [service for service in selected_services if service in detected_services]
 
+    if selected_services:
+        for service in selected_services:
+            if service in valid_selected_services:
+                st.markdown(f"<span style='color:green;'>- {service}</span>", unsafe_allow_html=True)
+            else:
+                st.markdown(f"<span style='color:red;'>- {service}</span>", unsafe_allow_html=True)
+
+    col1, col2 = st.columns([1, 1], gap="medium")
+
+    with col1:
+        with st.expander("Control de Encabezado"):
+            styled_well_info_df = well_info_df.style.apply(highlight_rows, axis=1)
+            styled_html = styled_well_info_df.to_html(index=False)
+            styled_html = styled_html.replace('<th>Empty</th>', '').replace('<td>Yes</td>', '').replace('<td>No</td>', '')
+            st.write(styled_html, unsafe_allow_html=True)
+
+    with col2:
+        with st.expander("Resultados de las Pruebas de Calidad"):
+            st.write(result["quality_html"], unsafe_allow_html=True)
+
+    header_compliance, non_compliant_variables = result["header_ok"], result["missing_header"]
+    header_complies = header_compliance  # Variable para determinar si el encabezado cumple
+
+    if header_compliance:
+        header_legend = "El encabezado <span style='color:green; font-weight:bold;'>CUMPLE </span>con el requerimiento"
+    else:
+        header_legend = "El encabezado <span style='color:red; font-weight:bold;'>NO CUMPLE </span>con el requerimiento"
+    st.markdown(f"**{header_legend}**", unsafe_allow_html=True)
+    if not header_compliance:
+        st.write(f"Las siguientes variables no se encontraron en el encabezado: {', '.join(non_compliant_variables)}")
+
+    services_complies, service_failures = result["services_ok"], result["service_failures"]
+    if not services_complies:
+        services_legend = "No se encuentran todas las curvas solicitadas. <span style='color:red; font-weight:bold;'>NO CUMPLE</span>"
+        st.markdown(f"**{services_legend}**", unsafe_allow_html=True)
+        for service, missing_curves_details in service_failures.items():
+            if missing_curves_details:
+                st.write(f"El servicio '{service}' no cumple. Las siguientes variables faltan o no cumplen con los requerimientos:")
+                for detail in missing_curves_details:
+                    st.write(f"- {detail}")
+
+    else:
+        services_legend = "Se encuentran todas las curvas solicitadas. <span style='color:green; font-weight:bold;'>CUMPLE</span>"
+        st.markdown(f"**{services_legend}**", unsafe_allow_html=True)
+
+    with st.expander("Estadísticas de las curvas"):
+        st.write(stats_df.to_html(index=False), unsafe_allow_html=True)
+
+    # Buscar entregas previas de la misma corrida antes de copiar
+    fingerprints = result["fingerprints"]
+    if not result.get("full_detail", True):
+        # Solo se leyeron algunas curvas, un intervalo o datos en float32: las huellas de la corrida ya
+        # entregada, el sidecar y el catálogo corresponden al archivo entero
+        with span("full_reload"):
+            las = load_full_las(file_path)
+            fingerprints = compute_fingerprints(las)
+    duplicates = []
+    try:
+        with span("duplicates_check"):
+            duplicates = check_duplicates(las, fingerprints=fingerprints)
+    except Exception as e:
+        st.warning(f"No se pudo consultar el índice de duplicados: {e}")
+    if duplicates:
+        st.warning("Este perfil parece ya estar en el archivo verificado:")
+        for line in format_duplicates(duplicates):
+            st.write(f"- {line}")
+
+    # Intentar copiar el archivo si ambas condiciones se cumplen
+    if duplicates and not delivery_options["allow_duplicates"]:
+        st.write("No se sube el archivo por ser un posible duplicado. Habilite \"Permitir entregas duplicadas\" para subirlo igualmente.")
+        return "Posible duplicado"
+    elif header_complies and services_complies:
+        st.write("El encabezado y los servicios cumplen con los requerimientos. Subiendo el archivo...")
+        
+        new_file_name = delivery_file_name(well_name, date, detected_services, company_name)
+
+        success, message = save_to_shared_drive(file_path, new_file_name, fld_value, well_name,
+                                                compression=delivery_options["compression"],
+                                                keep_original=delivery_options["keep_original"] or delivery_options["compression"] == "none",
+                                                las=las, sidecar=delivery_options["sidecar"])
+        if success:
+            st.success(f"Archivo subido exitosamente a: {' | '.join(message)}")
+            try:
+                with span("catalog.record"):
+                    record_delivery(message, las, detected_services, header_complies, services_complies,
+                                    fingerprints=fingerprints)
+            except Exception as e:
+                st.warning(f"El archivo se entregó pero no se pudo registrar en el catálogo: {e}")
+            return "Entregado"
+        else:
+            st.error(f"Error al subir el archivo: {message}")
+            return "Error de entrega"
+    return "No cumple"
+
+def analyze_many(file_paths, selected_services, delivery_options, file_names=None, file_hashes=None, upload_times=None,
+                 full_detail=True, depth_range=None):
+    """Analyze several files in parallel, showing each one and the summary table as soon as it finishes."""
+    file_names = file_names or {}
+    upload_times = upload_times or {}
+    summary = st.empty()
+    rows = []
+    started = time.perf_counter()
+    for file_path, result, error in stream_analyses(file_paths, selected_services, file_hashes, file_names=file_names,
+                                                    full_detail=full_detail, depth_range=depth_range):
+        file_name = file_names.get(file_path, os.path.basename(file_path))
+        if result is None:
+            st.error(f"{file_name}: {error}")
+            rows.append({"Archivo": file_name, "Entrega": "Error de análisis", "Detalle": error})
+        else:
+            icon = "🟢" if result["passed"] else "🔴"
+            # show_result ya usa expanders, que no se pueden anidar: cada archivo va en un recuadro
+            with st.container(border=True):
+                st.markdown(f"#### {icon} {file_name}")
+                delivery = show_result(result, file_path, selected_services, delivery_options,
+                                       upload_times.get(file_path), file_name)
+            rows.append({
+                "Archivo": file_name,
+                "Pozo": result["well"],
+                "Compañía": result["company"],
+                "Servicios": ", ".join(result["detected_services"]),
+                "Encabezado": "CUMPLE" if result["header_ok"] else "NO CUMPLE",
+                "Servicios solicitados": "CUMPLE" if result["services_ok"] else "NO CUMPLE",
+                "Pruebas fallidas": result["failed_tests"],
+                "Entrega": delivery,
+            })
+        with summary.container():
+            st.write(f"### Resumen: {len(rows)} de {len(file_paths)} archivos")
+            st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+    elapsed = time.perf_counter() - started
+    st.success(f"{len(rows)} archivos analizados en {elapsed:.1f} s ({len(rows) / max(elapsed, 1e-9):.2f} archivos/s)")
+
+def main():
     st.sidebar.image("https://www.0800telefono.org/wp-content/uploads/2018/03/panamerican-energy.jpg", width=200)
     st.sidebar.write('# QAQC de .LAS')
+
+    get_metrics_exporter()
+    page = st.sidebar.radio("Página", ["Control de calidad", "Catálogo", "Métricas"], horizontal=True)
+    if page == "Catálogo":
+        catalog_page()
+        return
+    if page == "Métricas":
+        metrics_page()
+        return
+
+    st.title('Control de calidad de información entregada')
     
-    if 'uploaded_file' not in st.session_state:
-        st.session_state.uploaded_file = None
-    if 'temp_file_path' not in st.session_state:
-        st.session_state.temp_file_path = None
+    if 'temp_file_paths' not in st.session_state:
+        st.session_state.temp_file_paths = []
+    if 'uploads' not in st.session_state:
+        st.session_state.uploads = {}  # file_id del uploader -> dict con sha, path, name, precheck, error
     if 'analysis_done' not in st.session_state:
         st.session_state.analysis_done = False
 
-    uploaded_file = st.sidebar.file_uploader("Para comenzar a usar la app, cargar el .LAS en la parte inferior.", type=['.las', '.LAS'])
-
-    if uploaded_file:
-        st.session_state.uploaded_file = uploaded_file
-        st.session_state.temp_file_path = save_uploadedfile(uploaded_file)
-        st.session_state.analysis_done = False
+    uploaded_files = st.sidebar.file_uploader("Para comenzar a usar la app, cargar uno o varios .LAS en la parte inferior.",
+                                              type=['.las', '.LAS', '.gz', '.zst'], accept_multiple_files=True)
+
+    store = get_upload_store()
+    session_id = current_session_id()
+    if runtime.exists():
+        # Sesiones cerradas desde la última ejecución: sus subidas quedan libres para el desalojo
+        store.release_dead_sessions(runtime.get_instance().is_active_session)
+
+    uploads = {}
+    for uploaded_file in uploaded_files or []:
+        # Las re-ejecuciones del script no vuelven a copiar ni hashear lo ya subido
+        previous = st.session_state.uploads.get(uploaded_file.file_id)
+        if previous and store.acquire(session_id, previous["sha"]) == previous["path"]:
+            uploads[uploaded_file.file_id] = previous
+        else:
+            sha, file_path, precheck, upload_s = save_uploadedfile(uploaded_file, store, session_id)
+            uploads[uploaded_file.file_id] = {"sha": sha, "path": file_path, "name": uploaded_file.name,
+                                              "precheck": precheck.result, "upload_s": upload_s,
+                                              "error": str(precheck.error) if precheck.error else None}
+            st.session_state.analysis_done = False
+    store.release(session_id, keep={upload["sha"] for upload in uploads.values()})
+    st.session_state.uploads = uploads
+    st.session_state.temp_file_paths = list(dict.fromkeys(upload["path"] for upload in uploads.values()))
+    file_names = {upload["path"]: upload["name"] for upload in uploads.values()}
+    file_hashes = {upload["path"]: upload["sha"] for upload in uploads.values()}
+    upload_times = {upload["path"]: upload.get("upload_s") for upload in uploads.values()}
 
     service_groups = get_service_groups()
     st.sidebar.write("### Selecciona los servicios")
@@ -156,120 +619,60 @@ def main():
         options=list(service_groups.keys()),
         default=list(service_groups.keys())
     )
+    full_detail = st.sidebar.checkbox(
+        "Detalle completo (todas las curvas)",
+        value=get_load_settings()["full_detail"],
+        help="Sin detalle completo solo se leen y controlan las curvas de los servicios seleccionados: "
+             "mucho más rápido en archivos anchos (p. ej. con formas de onda VDL)."
+    )
+    with st.sidebar.expander("Intervalo de profundidad"):
+        top = st.number_input("Desde", value=None, placeholder="Inicio del archivo")
+        bottom = st.number_input("Hasta", value=None, placeholder="Fin del archivo")
+    # Solo se leen y controlan las muestras del intervalo; vacío = todo el archivo
+    depth_range = None if top is None and bottom is None else (top, bottom)
+
+    delivery_settings = get_delivery_settings()
+    compression_options = ["none"] + available_codecs()
+    default_compression = delivery_settings["compression"]
+    with st.sidebar.expander("Opciones de entrega"):
+        compression = st.selectbox(
+            "Copia comprimida",
+            options=compression_options,
+            index=compression_options.index(default_compression) if default_compression in compression_options else 0
+        )
+        keep_original = st.checkbox("Conservar el .LAS sin comprimir", value=delivery_settings["keep_original"])
+        sidecar_options = ["none"] + available_formats()
+        sidecar = st.selectbox(
+            "Sidecar columnar",
+            options=sidecar_options,
+            index=sidecar_options.index(delivery_settings["sidecar"]) if delivery_settings["sidecar"] in sidecar_options else 0
+        )
+        allow_duplicates = st.checkbox("Permitir entregas duplicadas", value=False)
 
     analyze_button = st.sidebar.button("ANALIZAR")
 
-    if analyze_button and st.session_state.uploaded_file:
-        las, las_content_str = load_data(open(st.session_state.temp_file_path, 'rb'))
-        if las:
-            results_df, well_info_df, stats_df, project, _ = process_las_file(las, las_content_str)
-
-            well_name = las.well.WELL.value if 'WELL' in las.well else "Desconocido"
-            company_name = las.well.SRVC.value if 'SRVC' in las.well else "Desconocida"
-            date = las.well.DATE.value if 'DATE' in las.well else "SinFecha"
-            fld_value = las.well.FLD.value if 'FLD' in las.well else "SinCampo"
-
-            st.subheader(f"En el pozo {well_name} la compañía {company_name} ejecutó los siguientes servicios:")
-
-            detected_curves = [curve.mnemonic for curve in las.curves]
-            alias_dict = get_alias()
-            detected_services = [service for service, required_curves in service_groups.items() if all(any(alias in detected_curves for alias in alias_dict.get(curve, [curve])) for curve in required_curves)]
-            
-            detected_services_str = "-".join(detected_services) if detected_services else "NoServices"
-
-            valid_selected_services = [service for service in selected_services if service in detected_services]
-            invalid_selected_services = [service for service in selected_services if service not in detected_services]
-
-            if selected_services:
-                for service in selected_services:
-                    if service in valid_selected_services:
-                        st.markdown(f"<span style='color:green;'>- {service}</span>", unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"<span style='color:red;'>- {service}</span>", unsafe_allow_html=True)
-
-            col1, col2 = st.columns([1, 1], gap="medium")
-
-            with col1:
-                with st.expander("Control de Encabezado"):
-                    styled_well_info_df = well_info_df.style.apply(highlight_rows, axis=1)
-                    styled_html = styled_well_info_df.to_html(index=False)
-                    styled_html = styled_html.replace('<th>Empty</th>', '').replace('<td>Yes</td>', '').replace('<td>No</td>', '')
-                    st.write(styled_html, unsafe_allow_html=True)
-
-            with col2:
-                with st.expander("Resultados de las Pruebas de Calidad"):
-                    tests = {
-                        'All': [q.no_similarities],
-                        'Each': [q.no_gaps, q.no_monotonic, q.no_flat],
-                        'GR': [q.all_positive],
-                        'Sonic': [q.all_positive, q.all_between(50, 200)],
-                    }
-                    alias = get_alias()
-                    quality_html = project.curve_table_html(tests=tests, alias=alias)
-
-                    quality_html_with_alias = add_alias_column_to_html_table(quality_html, alias)
-                    transposed_quality_html = transpose_html_table(quality_html_with_alias)
-
-                    st.write(transposed_quality_html, unsafe_allow_html=True)
-
-            well_info_df = well_info_df.drop(columns=['Empty'])
-            header_compliance, non_compliant_variables = validate_header(well_info_df)
-            header_complies = header_compliance  # Variable para determinar si el encabezado cumple
-
-            if header_compliance:
-                header_legend = "El encabezado <span style='color:green; font-weight:bold;'>CUMPLE </span>con el requerimiento"
-            else:
-                header_legend = "El encabezado <span style='color:red; font-weight:bold;'>NO CUMPLE </span>con el requerimiento"
-            st.markdown(f"**{header_legend}**", unsafe_allow_html=True)
-            if not header_compliance:
-                st.write(f"Las siguientes variables no se encontraron en el encabezado: {', '.join(non_compliant_variables)}")
-
-            services_complies = False  # Variable para determinar si los servicios cumplen
-            if invalid_selected_services:
-                services_legend = "No se encuentran todas las curvas solicitadas. <span style='color:red; font-weight:bold;'>NO CUMPLE</span>"
-                st.markdown(f"**{services_legend}**", unsafe_allow_html=True)
-                for service in invalid_selected_services:
-                    missing_curves_details = []
-                    for required_curve in service_groups[service]:
-                        required_aliases = alias_dict.get(required_curve, [required_curve])
-                        found_aliases = results_df[results_df['Alias'].isin(required_aliases)]
-                        if found_aliases.empty:
-                            missing_curves_details.append(f"{required_curve} (aliases: {', '.join(required_aliases)}) no encontrado")
-                        else:
-                            failed_tests = found_aliases.apply(lambda row: [test for test in row.index if '🔴' in str(row[test])], axis=1)
-                            for index, failed in enumerate(failed_tests):
-                                if failed:
-                                    curve_name = found_aliases.iloc[index]['Curve Name']
-                                    for test in failed:
-                                        missing_curves_details.append(f"{curve_name} - {test}: {found_aliases.iloc[index][test]}")
-
-                    if missing_curves_details:
-                        st.write(f"El servicio '{service}' no cumple. Las siguientes variables faltan o no cumplen con los requerimientos:")
-                        for detail in missing_curves_details:
-                            st.write(f"- {detail}")
-
-            else:
-                services_legend = "Se encuentran todas las curvas solicitadas. <span style='color:green; font-weight:bold;'>CUMPLE</span>"
-                st.markdown(f"**{services_legend}**", unsafe_allow_html=True)
-                services_complies = True
-
-            st.session_state.analysis_done = True
-
-            with st.expander("Estadísticas de las curvas"):
-                st.write(stats_df.to_html(index=False), unsafe_allow_html=True)
-
-            # Intentar copiar el archivo si ambas condiciones se cumplen
-            if header_complies and services_complies:
-                st.write("El encabezado y los servicios cumplen con los requerimientos. Subiendo el archivo...")
-                
-                new_file_name = f"{well_name}_{date}_{detected_services_str}-{company_name}.las"
-                new_file_name = new_file_name.replace(" ", "_")  # Reemplazar espacios por guiones bajos
-                
-                success, message = save_to_shared_drive(st.session_state.temp_file_path, new_file_name, fld_value, well_name)
-                if success:
-                    st.success(f"Archivo subido exitosamente a: {message}")
-                else:
-                    st.error(f"Error al subir el archivo: {message}")
+    if uploads and not analyze_button:
+        # Disponible apenas termina la subida, sin esperar al análisis completo
+        st.write("### Archivos cargados (control previo del encabezado)")
+        st.dataframe(upload_summary(uploads, selected_services, full_detail, depth_range), width="stretch", hide_index=True)
+
+    if analyze_button and st.session_state.temp_file_paths:
+        delivery_options = {
+            "compression": compression,
+            "keep_original": keep_original,
+            "sidecar": sidecar,
+            "allow_duplicates": allow_duplicates,
+        }
+        if len(st.session_state.temp_file_paths) == 1:
+            file_path = st.session_state.temp_file_paths[0]
+            result = run_analysis(file_path, selected_services, file_hashes, file_names, full_detail, depth_range)
+            if result:
+                show_result(result, file_path, selected_services, delivery_options,
+                            upload_times.get(file_path), file_names.get(file_path))
+        else:
+            analyze_many(st.session_state.temp_file_paths, selected_services, delivery_options, file_names, file_hashes,
+                         upload_times, full_detail, depth_range)
+        st.session_state.analysis_done = True
 
 if __name__ == "__main__":
     main()
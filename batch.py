@@ -0,0 +1,261 @@
+# batch.py
+"""Headless batch QC of LAS files with a process pool.
+
+Ejecuta load_data → process_las_file → validate_header → cumplimiento de
+servicios sobre una carpeta o patrón y escribe un único informe:
+
+    python batch.py ENTRADA [ENTRADA ...] [--output informe.csv|.json|.parquet]
+                    [--workers N] [--services "PERFIL DE CEMENTO" ...] [--deliver]
+                    [--depth-range DESDE HASTA]
+    python batch.py tempDir --scaling 1 2 4     # throughput con distinta cantidad de procesos
+    python batch.py ENTRADA --queue revalidacion-2024   # reanudable: saltea lo que ya terminó
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from config import get_load_settings
+from qc_core import QcError, analyze_file
+
+LAS_PATTERNS = ('*.las', '*.LAS', '*.las.gz', '*.las.zst')
+
+
+def collect_inputs(inputs, recursive=False):
+    """Expand directories and glob patterns into a sorted list of LAS files."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for pattern in LAS_PATTERNS:
+                files.extend(glob.glob(os.path.join(item, '**' if recursive else '', pattern), recursive=recursive))
+        else:
+            files.extend(glob.glob(item, recursive=recursive))
+    return sorted(set(os.path.abspath(path) for path in files))
+
+
+REPORT_FIELDS = ['well', 'company', 'date', 'field', 'curves', 'samples', 'header_ok', 'services_ok',
+                 'failed_tests', 'passed', 'parse_s', 'qc_s']
+
+
+def analyze_path(path, selected_services=None, deliver=False, delivery_options=None, stage_callback=None,
+                 depth_range=None, full_detail=None):
+    """Run the full QC on one file and return a flat report row.
+
+    ``stage_callback`` recibe "qc" y "deliver" a medida que avanza el análisis.
+    Con ``depth_range`` (tope, base) se controlan solo las muestras de ese intervalo.
+    ``full_detail`` None toma el valor de config.get_load_settings().
+    """
+    started = time.perf_counter()
+    row = {"file": path, "size_bytes": os.path.getsize(path), "error": None, "error_stage": None}
+    stage = "qc"
+    try:
+        load_settings = get_load_settings()
+        result = analyze_file(path, selected_services, stage_callback=stage_callback,
+                              engine=load_settings["engine"],
+                              full_detail=load_settings["full_detail"] if full_detail is None else full_detail,
+                              depth_range=depth_range)
+        row.update({field: result[field] for field in REPORT_FIELDS})
+        row.update({
+            "detected_services": "-".join(result["detected_services"]),
+            "missing_services": "-".join(service for service in result["selected_services"]
+                                         if service not in result["detected_services"]),
+            "missing_header": ", ".join(result["missing_header"]),
+            "service_details": json.dumps(result["service_failures"], ensure_ascii=False),
+        })
+
+        if deliver and result["passed"]:
+            stage = "deliver"
+            if stage_callback:
+                stage_callback("deliver")
+            row.update(_deliver(path, result, delivery_options or {}))
+    except QcError as e:
+        row["error"] = e.message
+        row["error_stage"] = e.stage
+    except Exception as e:
+        row["error"] = str(e)
+        row["error_stage"] = stage
+    row["total_s"] = time.perf_counter() - started
+    return row
+
+
+def _deliver(path, result, delivery_options):
+    from catalog import record_delivery
+    from delivery import deliver_file, delivery_file_name
+    from fingerprint import check_duplicates, compute_fingerprints, format_duplicates
+
+    las = result["las"]
+    if not result["full_detail"]:
+        # Solo se leyeron algunas curvas o un intervalo: el sidecar y el catálogo llevan el archivo entero
+        from columnar import load_full_las
+
+        las = load_full_las(path)
+    fingerprints = compute_fingerprints(las)
+    duplicates = check_duplicates(las, fingerprints=fingerprints)
+    if duplicates and not delivery_options.get("allow_duplicates"):
+        return {"delivered": False, "duplicates": " | ".join(format_duplicates(duplicates))}
+
+    new_file_name = delivery_file_name(result["well"], result["date"], result["detected_services"], result["company"])
+    destination_paths = deliver_file(path, new_file_name, result["field"], result["well"], las=las,
+                                     compression=delivery_options.get("compression"),
+                                     keep_original=delivery_options.get("keep_original"),
+                                     sidecar=delivery_options.get("sidecar"))
+    record_delivery(destination_paths, las, result["detected_services"], result["header_ok"], result["services_ok"],
+                    fingerprints=fingerprints)
+    return {"delivered": True, "destination": " | ".join(destination_paths),
+            "duplicates": " | ".join(format_duplicates(duplicates))}
+
+
+def run_batch(files, workers=None, selected_services=None, deliver=False, delivery_options=None,
+              progress_callback=None, depth_range=None, full_detail=None):
+    """Analyze files in a process pool; return (report DataFrame, elapsed seconds)."""
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(analyze_path, path, selected_services, deliver, delivery_options,
+                                   depth_range=depth_range, full_detail=full_detail)
+                   for path in files]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            if progress_callback:
+                progress_callback(row, len(rows), len(files))
+    elapsed = time.perf_counter() - started
+    report = pd.DataFrame(rows)
+    if not report.empty:
+        report = report.sort_values('file').reset_index(drop=True)
+    return report, elapsed
+
+
+def run_campaign(files, campaign, workers=None, selected_services=None, deliver=False, delivery_options=None,
+                 priority=None, retry_failed=False, db_path=None, progress_callback=None, depth_range=None, full_detail=None):
+    """Like run_batch but through the persistent job queue, so an interrupted campaign resumes.
+
+    El informe incluye también los archivos terminados en corridas anteriores.
+    """
+    from catalog import connect
+    from jobqueue import PRIORITY_BATCH, campaign_report, drain, enqueue, input_checksums
+
+    options = {"selected_services": selected_services, "deliver": deliver, "delivery_options": delivery_options,
+               "depth_range": depth_range, "full_detail": full_detail}
+    conn = connect(db_path)
+    try:
+        pending = enqueue(conn, files, campaign, PRIORITY_BATCH if priority is None else priority, options,
+                          input_checksums(files), retry_failed=retry_failed)
+    finally:
+        conn.close()
+
+    started = time.perf_counter()
+    done = []
+
+    def progress(job, state, row):
+        if job["campaign"] == campaign:
+            done.append(row)
+            if progress_callback:
+                progress_callback(row, len(done), pending)
+
+    drain(campaign, workers, db_path, progress_callback=progress)
+    elapsed = time.perf_counter() - started
+
+    conn = connect(db_path)
+    try:
+        report = campaign_report(conn, campaign)
+    finally:
+        conn.close()
+    if not report.empty:
+        report = report[report['file'].isin(files)].reset_index(drop=True)
+    return report, elapsed
+
+
+def throughput(report, elapsed):
+    """Return (files/s, MB/s) for a finished batch."""
+    total_mb = report['size_bytes'].sum() / 1e6 if not report.empty else 0.0
+    elapsed = elapsed or 1e-9
+    return len(report) / elapsed, total_mb / elapsed
+
+
+def write_report(report, output):
+    """Write the consolidated report as CSV, JSON or Parquet depending on the extension."""
+    extension = os.path.splitext(output)[1].lower()
+    if extension == '.json':
+        report.to_json(output, orient='records', force_ascii=False, indent=2)
+    elif extension == '.parquet':
+        report.to_parquet(output, index=False)
+    else:
+        report.to_csv(output, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control de calidad de archivos LAS por lotes, sin interfaz.")
+    parser.add_argument('inputs', nargs='+', help="Carpetas, archivos o patrones glob")
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--output', default='qc_report.csv', help="Informe .csv, .json o .parquet")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--services', nargs='*', default=None,
+                        help="Servicios a exigir (por defecto todos los de config.get_service_groups)")
+    parser.add_argument('--deliver', action='store_true', help="Entregar al archivo verificado los que cumplan")
+    parser.add_argument('--compression', default=None, choices=['none', 'gzip', 'zstd'])
+    parser.add_argument('--sidecar', default=None, choices=['none', 'arrow', 'parquet'])
+    parser.add_argument('--allow-duplicates', action='store_true')
+    parser.add_argument('--full-detail', action='store_true',
+                        help="Controlar todas las curvas, no solo las de los servicios pedidos")
+    parser.add_argument('--depth-range', type=float, nargs=2, default=None, metavar=('DESDE', 'HASTA'),
+                        help="Controlar solo las muestras de este intervalo de profundidad")
+    parser.add_argument('--queue', default=None, metavar='CAMPAÑA',
+                        help="Pasar por la cola persistente; al repetir la orden se reanuda la campaña")
+    parser.add_argument('--priority', type=int, default=None)
+    parser.add_argument('--retry-failed', action='store_true', help="Con --queue, reintentar los fallidos")
+    parser.add_argument('--scaling', type=int, nargs='+', default=None,
+                        help="Medir throughput con estas cantidades de procesos (sin entregar)")
+    args = parser.parse_args(argv)
+    full_detail = True if args.full_detail else None
+    depth_range = tuple(args.depth_range) if args.depth_range else None
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        print("No se encontraron archivos LAS.")
+        return 2
+
+    if args.scaling:
+        print(f"{'procesos':>8} {'seg':>8} {'arch/s':>8} {'MB/s':>8} {'speedup':>8}")
+        base = None
+        for workers in args.scaling:
+            report, elapsed = run_batch(files, workers, args.services, depth_range=depth_range, full_detail=full_detail)
+            files_per_s, mb_per_s = throughput(report, elapsed)
+            base = base or elapsed
+            print(f"{workers:>8} {elapsed:>8.2f} {files_per_s:>8.2f} {mb_per_s:>8.2f} {base / elapsed:>8.2f}")
+        return 0
+
+    delivery_options = {
+        "compression": args.compression,
+        "sidecar": args.sidecar,
+        "allow_duplicates": args.allow_duplicates,
+    }
+
+    def progress(row, done, total):
+        status = "ERROR" if row["error"] else ("CUMPLE" if row.get("passed") else "NO CUMPLE")
+        print(f"[{done}/{total}] {status:<9} {os.path.basename(row['file'])} ({row.get('total_s', 0.0):.2f} s)")
+
+    if args.queue:
+        report, elapsed = run_campaign(files, args.queue, args.workers, args.services, args.deliver, delivery_options,
+                                       priority=args.priority, retry_failed=args.retry_failed,
+                                       progress_callback=progress, depth_range=depth_range,
+                                       full_detail=full_detail)
+    else:
+        report, elapsed = run_batch(files, args.workers, args.services, args.deliver, delivery_options, progress,
+                                    depth_range, full_detail)
+    write_report(report, args.output)
+    files_per_s, mb_per_s = throughput(report, elapsed)
+    passed = int(report['passed'].fillna(False).sum()) if 'passed' in report else 0
+    print(f"{len(report)} archivos en {elapsed:.2f} s ({files_per_s:.2f} arch/s, {mb_per_s:.2f} MB/s); "
+          f"{passed} cumplen, {int(report['error'].notna().sum())} con error. Informe: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
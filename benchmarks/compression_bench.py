@@ -0,0 +1,75 @@
+# benchmarks/compression_bench.py
+"""Measure compression ratio and throughput of the archive codecs on sample LAS files.
+
+Usage: python benchmarks/compression_bench.py [archivos o carpeta] [--threads N]
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compression import available_codecs, compress_stream, read_las_bytes  # noqa: E402
+
+
+def collect_files(paths):
+    """Expand folders and globs into a sorted list of LAS files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, '*.las')) + glob.glob(os.path.join(path, '*.LAS')))
+        else:
+            files.extend(glob.glob(path))
+    return sorted(set(files))
+
+
+def bench_file(path, codec, threads, repeat):
+    """Return (size, compressed size, compress MB/s, decompress MB/s) for one file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    best_compress = best_decompress = float('inf')
+    compressed = b''
+    for _ in range(repeat):
+        out = io.BytesIO()
+        start = time.perf_counter()
+        compress_stream(io.BytesIO(data), out, codec=codec, threads=threads)
+        best_compress = min(best_compress, time.perf_counter() - start)
+        compressed = out.getvalue()
+
+        start = time.perf_counter()
+        restored = read_las_bytes(io.BytesIO(compressed))
+        best_decompress = min(best_decompress, time.perf_counter() - start)
+        assert restored == data, f"La descompresión de {path} no reproduce el original"
+
+    mb = len(data) / 1e6
+    return len(data), len(compressed), mb / best_compress, mb / best_decompress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['tempDir'])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.paths)
+    print(f"{'archivo':<50} {'códec':<5} {'hilos':>5} {'MB':>7} {'ratio':>6} {'comp MB/s':>10} {'desc MB/s':>10}")
+    for codec in available_codecs():
+        for threads in sorted(set(args.threads)):
+            total_in = total_out = 0
+            for path in files:
+                size, csize, c_speed, d_speed = bench_file(path, codec, threads, args.repeat)
+                total_in += size
+                total_out += csize
+                print(f"{os.path.basename(path)[:50]:<50} {codec:<5} {threads:>5} {size / 1e6:>7.2f} "
+                      f"{size / csize:>6.2f} {c_speed:>10.1f} {d_speed:>10.1f}")
+            if total_out:
+                print(f"{'TOTAL':<50} {codec:<5} {threads:>5} {total_in / 1e6:>7.2f} {total_in / total_out:>6.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+# benchmarks/golden_corpus.py
+"""Golden-result regression corpus: compare fast QC pipelines against the lasio + welly reference.
+
+Usage: python benchmarks/golden_corpus.py [archivos o carpeta] [--pipeline modulo:funcion ...]
+                                          [--update-golden] [--workers N]
+
+El corpus son los archivos de tempDir más casos borde generados (WRAP,
+muchos nulos, curvas enteramente nulas o planas, mnemónicos duplicados,
+latin-1, windows-1252, UTF-8 con BOM y CRLF, gzip). Para cada archivo se
+corre la referencia (qc_core.analyze_file) y cada pipeline rápido, y se
+comparan encabezado, veredictos, resultado de cada prueba por curva y
+estadísticas (con tolerancia). La salida de la referencia también se compara
+con la guardada en benchmarks/golden/ para detectar cambios de veredicto
+entre versiones; ``--update-golden`` la reescribe. Los archivos se reparten
+en un pool de procesos. Código de salida 1 si hay diferencias.
+
+Un pipeline es una función ``f(path, selected_services=None)`` que devuelve
+el mismo dict que analyze_file (al menos los campos que se comparan).
+"""
+import argparse
+import gzip
+import importlib
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from compression_bench import collect_files  # noqa: E402
+from synthetic_las import generate_data, generate_las  # noqa: E402
+
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+REFERENCE = "qc_core:analyze_file"
+# Pipelines rápidos que se validan por defecto contra la referencia
+FAST_PIPELINES = ["columnar:analyze_file"]
+# Las estadísticas llegan formateadas con 2 decimales: una unidad de redondeo más margen relativo
+STATS_ATOL = 0.0101
+STATS_RTOL = 1e-5
+TEST_RESULT = re.compile(r'title="(?:[^"]*?) - ([^":]+): [^"]*">([^<]+)</span>')
+
+
+def _replace_curve_block(text, mnemonic, values):
+    # Reemplaza la columna de una curva (sin WRAP) por los valores dados
+    lines = text.split("\n")
+    start = next(index for index, line in enumerate(lines) if line.startswith("~A")) + 1
+    header = lines[start - 1].split()[1:]
+    column = header.index(mnemonic)
+    for offset, value in enumerate(values):
+        fields = lines[start + offset].split()
+        fields[column] = f"{value:10.4f}"
+        lines[start + offset] = " ".join(f"{float(field):10.4f}" for field in fields)
+    return "\n".join(lines)
+
+
+def generate_cases(directory):
+    """Write the generated edge cases into ``directory``; return their paths."""
+    cases = {}
+    cases["wrap"] = generate_las(curves=12, samples=1500, wrap=True, seed=1).encode("utf-8")
+    cases["nulls_60"] = generate_las(curves=12, samples=3000, nulls=0.6, seed=2).encode("utf-8")
+
+    text = generate_las(curves=12, samples=2000, seed=3)
+    text = _replace_curve_block(text, "GR", [-999.25] * 2000)  # curva enteramente nula
+    text = _replace_curve_block(text, "CALI", [8.5] * 2000)  # curva plana
+    _, values = generate_data(1, 2000, seed=4)
+    text = _replace_curve_block(text, "SP", sorted(values[:, 0]))  # curva monótona
+    cases["degenerate_curves"] = text.encode("utf-8")
+
+    text = generate_las(curves=12, samples=2000, seed=5)
+    # Mnemónicos duplicados: lasio los renombra GR:1, GR:2
+    cases["duplicate_mnemonics"] = text.replace(" C011.UNIT", " GR.gAPI  ", 1).replace(" C012.UNIT", " GR.gAPI  ", 1).encode("utf-8")
+
+    text = generate_las(curves=10, samples=1500, seed=6)
+    text = text.replace("CAMPO SINTETICO", "CAÑADÓN SECO").replace("SINTETICA S.A.", "PETROLERA ÑANDÚ")
+    cases["latin1"] = text.encode("latin-1")
+    cases["cp1252"] = text.replace("COMPANY", "COMPAÑÍA – OPERADORA").encode("windows-1252")
+    cases["utf8_bom_crlf"] = b"\xef\xbb\xbf" + text.replace("\n", "\r\n").encode("utf-8")
+
+    paths = []
+    for name, data in cases.items():
+        path = os.path.join(directory, f"edge_{name}.las")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    gz_path = os.path.join(directory, "edge_gzip.las.gz")
+    with open(gz_path, "wb") as f:
+        f.write(gzip.compress(generate_las(curves=8, samples=1000, seed=7).encode("utf-8"), mtime=0))
+    paths.append(gz_path)
+    return paths
+
+
+def load_pipeline(spec):
+    module_name, _, function_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def _stat(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value  # curva enteramente nula
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    return str(value)
+
+
+def normalize(result):
+    """Reduce an analysis result to the JSON-comparable fields that decide the verdict."""
+    well_info = result["well_info_df"]
+    stats = {row["Curve Name"]: row for row in result["stats_df"].to_dict("records")} if not result["stats_df"].empty else {}
+    curves = {}
+    for row in result["results_df"].to_dict("records") if not result["results_df"].empty else []:
+        name = row["Curve Name"]
+        stats_row = stats.get(name, {})
+        curves[name] = {
+            "alias": row["Alias"],
+            "tests": [list(match) for match in TEST_RESULT.findall(row["Test Results"])],
+            "min": _stat(stats_row.get("Min Value")),
+            "max": _stat(stats_row.get("Max Value")),
+            "mean": _stat(row["Mean Value"]),
+        }
+    return {
+        "identity": {key: result[key] for key in ("well", "company", "date", "field")},
+        "curves_count": result["curves"],
+        "samples": result["samples"],
+        "header": {row["MNEM"]: _jsonable(row["Value"]) for row in well_info.to_dict("records")},
+        "header_empty": sorted(well_info.loc[well_info["Empty"] == "Yes", "MNEM"].tolist()),
+        "header_ok": result["header_ok"],
+        "missing_header": list(result["missing_header"]),
+        "detected_services": list(result["detected_services"]),
+        "services_ok": result["services_ok"],
+        "passed": result["passed"],
+        "curves": curves,
+    }
+
+
+def _close(expected, actual):
+    if expected is None or actual is None:
+        return expected is actual
+    return abs(expected - actual) <= STATS_ATOL + STATS_RTOL * abs(expected)
+
+
+def diff(expected, actual):
+    """Return human readable differences between two normalized results."""
+    differences = []
+    for key in ("identity", "curves_count", "samples", "header", "header_empty", "header_ok", "missing_header",
+                "detected_services", "services_ok", "passed"):
+        if expected[key] != actual[key]:
+            differences.append(f"{key}: {expected[key]!r} -> {actual[key]!r}")
+    missing = sorted(set(expected["curves"]) - set(actual["curves"]))
+    extra = sorted(set(actual["curves"]) - set(expected["curves"]))
+    if missing:
+        differences.append(f"curvas faltantes: {', '.join(missing)}")
+    if extra:
+        differences.append(f"curvas de más: {', '.join(extra)}")
+    for name in sorted(set(expected["curves"]) & set(actual["curves"])):
+        before, after = expected["curves"][name], actual["curves"][name]
+        if before["alias"] != after["alias"]:
+            differences.append(f"{name} alias: {before['alias']} -> {after['alias']}")
+        if before["tests"] != after["tests"]:
+            differences.append(f"{name} pruebas: {before['tests']} -> {after['tests']}")
+        for stat in ("min", "max", "mean"):
+            if not _close(before[stat], after[stat]):
+                differences.append(f"{name} {stat}: {before[stat]} -> {after[stat]}")
+    return differences
+
+
+def run_file(path, pipelines):
+    """Worker task: run every pipeline on one file; return {spec: (normalized or error, seconds)}."""
+    outputs = {}
+    for spec in pipelines:
+        started = time.perf_counter()
+        try:
+            output = normalize(load_pipeline(spec)(path))
+        except Exception as e:
+            output = {"error": f"{type(e).__name__}: {e}"}
+        outputs[spec] = (output, time.perf_counter() - started)
+    return path, outputs
+
+
+def golden_path(path, golden_dir):
+    return os.path.join(golden_dir, os.path.basename(path) + ".json")
+
+
+def compare_outputs(expected, actual):
+    if "error" in expected or "error" in actual:
+        return [] if expected.get("error") == actual.get("error") else [
+            f"error: {expected.get('error')!r} -> {actual.get('error')!r}"]
+    return diff(expected, actual)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=[os.path.join(os.path.dirname(BENCH_DIR), 'tempDir')])
+    parser.add_argument('--pipeline', action='append', default=None,
+                        help="pipeline rápido a validar, como modulo:funcion (repetible)")
+    parser.add_argument('--no-generated', action='store_true', help="no agregar los casos borde generados")
+    parser.add_argument('--golden-dir', default=GOLDEN_DIR)
+    parser.add_argument('--update-golden', action='store_true', help="reescribir los resultados de referencia guardados")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    fast = args.pipeline if args.pipeline is not None else FAST_PIPELINES
+    pipelines = [REFERENCE] + [spec for spec in fast if spec != REFERENCE]
+    work_dir = tempfile.mkdtemp(prefix="golden_corpus_")
+    started = time.perf_counter()
+    try:
+        files = collect_files(args.paths) + ([] if args.no_generated else generate_cases(work_dir))
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            runs = dict(executor.map(run_file, files, [pipelines] * len(files)))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - started
+
+    failures = 0
+    print(f"{'archivo':<45} " + " ".join(f"{spec[:18]:>18}" for spec in pipelines) + "   (ms)")
+    for path, outputs in runs.items():
+        name = os.path.basename(path)
+        print(f"{name[:45]:<45} " + " ".join(f"{outputs[spec][1] * 1000:>18.1f}" for spec in pipelines))
+        reference = outputs[REFERENCE][0]
+
+        golden_file = golden_path(path, args.golden_dir)
+        if args.update_golden:
+            os.makedirs(args.golden_dir, exist_ok=True)
+            with open(golden_file, 'w', encoding='utf-8') as f:
+                json.dump(reference, f, ensure_ascii=False, indent=1, sort_keys=True)
+        elif os.path.exists(golden_file):
+            with open(golden_file, encoding='utf-8') as f:
+                differences = compare_outputs(json.load(f), reference)
+            for line in differences:
+                print(f"  [golden -> referencia] {line}")
+            failures += bool(differences)
+        else:
+            print("  (sin resultado golden guardado; use --update-golden)")
+
+        for spec in pipelines[1:]:
+            differences = compare_outputs(reference, outputs[spec][0])
+            for line in differences:
+                print(f"  [referencia -> {spec}] {line}")
+            failures += bool(differences)
+
+    print(f"{len(runs)} archivos, {len(pipelines)} pipelines en {elapsed:.1f} s; "
+          + ("sin diferencias" if not failures else f"{failures} comparaciones con diferencias"))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
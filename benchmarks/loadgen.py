@@ -0,0 +1,102 @@
+# benchmarks/loadgen.py
+"""Load generator for the local QC service: submit LAS files concurrently and report latency percentiles.
+
+Usage: python benchmarks/loadgen.py [archivos o carpeta] [--url http://127.0.0.1:8765]
+                                    [--clients 8] [--requests 40]
+Sin --url levanta un servicio temporal en un puerto libre.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compression_bench import collect_files  # noqa: E402
+
+
+def submit_and_wait(url, path, timeout=300):
+    """Post one file, long-poll its result and return (end-to-end seconds, job status)."""
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        data = f.read()
+    request = urllib.request.Request(f"{url}/jobs", data=data, method='POST',
+                                     headers={'X-Filename': os.path.basename(path),
+                                              'Content-Type': 'application/octet-stream'})
+    while True:
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                job = json.load(response)
+            break
+        except urllib.error.HTTPError as e:
+            if e.code != 503:
+                raise
+            time.sleep(float(e.headers.get('Retry-After', '1')))
+
+    while job["status"] in ("queued", "running"):
+        with urllib.request.urlopen(f"{url}/jobs/{job['job_id']}?wait=30", timeout=timeout) as response:
+            job = json.load(response)
+    return time.perf_counter() - started, job["status"]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_load(url, files, clients, requests):
+    """Run ``requests`` submissions from ``clients`` threads; return (latencies, statuses, elapsed)."""
+    paths = [files[i % len(files)] for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(lambda path: submit_and_wait(url, path), paths))
+    elapsed = time.perf_counter() - started
+    return [latency for latency, _ in results], [status for _, status in results], elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['tempDir'])
+    parser.add_argument('--url', default=None)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--requests', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=None, help="Procesos del servicio temporal")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No se encontraron archivos LAS.")
+        return 2
+
+    server = None
+    url = args.url
+    if url is None:
+        from service import create_server
+        server = create_server('127.0.0.1', 0, workers=args.workers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:%d" % server.server_address[1]
+
+    try:
+        print(f"{'clientes':>8} {'pedidos':>8} {'seg':>7} {'pedidos/s':>10} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'errores':>8}")
+        for clients in args.clients:
+            latencies, statuses, elapsed = run_load(url, files, clients, args.requests)
+            print(f"{clients:>8} {len(latencies):>8} {elapsed:>7.2f} {len(latencies) / elapsed:>10.2f} "
+                  f"{percentile(latencies, 0.50) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} "
+                  f"{percentile(latencies, 0.99) * 1000:>8.0f} {statuses.count('error'):>8}")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            server.qc_service.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# benchmarks/logging_bench.py
+"""Measure LAS parse time under each logging configuration.
+
+Usage: python benchmarks/logging_bench.py [archivos o carpeta] [--repeat 5] [--no-synthetic]
+
+Además de los archivos reales se mide un LAS sintético ancho (150 curvas)
+con 400 líneas de comentario en el encabezado, la forma de los archivos de
+app.txt: lasio registra una línea por comentario y el repr del arreglo de
+cada curva.
+
+Cada modo corre en un proceso aparte (la configuración de logging es global):
+
+    none          sin configurar (nivel WARNING por defecto)
+    legacy        basicConfig(DEBUG) a archivo, como hacía upload.py
+    central       configure_logging(): INFO, lasio/welly en WARNING, QueueHandler
+    central-debug configure_logging() con todo en DEBUG: mismo volumen que legacy,
+                  pero escrito desde el hilo del QueueListener
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+MODES = ("none", "legacy", "central", "central-debug")
+COMMENT_LINES = 400
+
+
+def write_wide_case(directory):
+    from synthetic_las import generate_las
+
+    text = generate_las(curves=150, samples=5000, nulls=0.05)
+    comments = "".join(f"#SHARED  .      {index:>6} : comentario de la compañía de servicios\n"
+                       for index in range(COMMENT_LINES))
+    text = text.replace("~Curve Information\n", comments + "~Curve Information\n", 1)
+    path = os.path.join(directory, "syn_c150_s5000_comentarios.las")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def configure(mode, log_file):
+    from logging_setup import configure_logging
+
+    if mode == "legacy":
+        logging.basicConfig(filename=log_file, level=logging.DEBUG,
+                            format='%(asctime)s - %(levelname)s - %(message)s')
+    elif mode == "central":
+        configure_logging(log_file=log_file)
+    elif mode == "central-debug":
+        configure_logging(level=logging.DEBUG, log_file=log_file, third_party_level=logging.DEBUG)
+
+
+def child(mode, files, repeat):
+    """Run inside the subprocess: configure logging, parse every file and print JSON timings."""
+    log_file = os.path.join(tempfile.mkdtemp(prefix="logging_bench_"), "bench.log")
+    configure(mode, log_file)
+    from qc_core import load_las_path
+
+    load_las_path(files[0])  # calentamiento: imports de lasio
+    results = {}
+    for path in files:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            load_las_path(path)
+            best = min(best, time.perf_counter() - started)
+        results[os.path.basename(path)] = best
+    logging.shutdown()
+    if mode.startswith("central"):
+        from logging_setup import shutdown_logging
+        shutdown_logging()
+    lines = 0
+    if os.path.exists(log_file):
+        with open(log_file, 'rb') as f:
+            lines = sum(1 for _ in f)
+    print(json.dumps({"mode": mode, "results": results, "log_lines": lines}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=[os.path.join(os.path.dirname(BENCH_DIR), 'tempDir')])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-synthetic', action='store_true')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    from compression_bench import collect_files
+
+    files = collect_files(args.paths)
+    if not args.child and not args.no_synthetic:
+        files.append(write_wide_case(tempfile.mkdtemp(prefix="logging_bench_")))
+    if not files:
+        print("No hay archivos LAS para medir")
+        return 2
+    if args.child:
+        child(args.child, files, args.repeat)
+        return 0
+
+    runs = {}
+    for mode in MODES:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, '--repeat', str(args.repeat)]
+                                + files, capture_output=True, text=True, check=True).stdout
+        runs[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'archivo':<40} " + " ".join(f"{mode:>14}" for mode in MODES) + "   (ms, mejor de %d)" % args.repeat)
+    for name in runs["none"]["results"]:
+        print(f"{name[:40]:<40} " + " ".join(f"{runs[mode]['results'][name] * 1000:>14.1f}" for mode in MODES))
+    totals = {mode: sum(runs[mode]["results"].values()) for mode in MODES}
+    print(f"{'TOTAL':<40} " + " ".join(f"{totals[mode] * 1000:>14.1f}" for mode in MODES))
+    print(f"{'líneas de log':<40} " + " ".join(f"{runs[mode]['log_lines']:>14}" for mode in MODES))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# benchmarks/qc_bench.py
+"""Time each QC stage on synthetic and real LAS files and compare against a stored baseline.
+
+Usage: python benchmarks/qc_bench.py [archivos o carpeta] [--case curves=30,samples=20000,wrap=1,nulls=0.1,array=64]
+                                     [--repeat 3] [--output resultados.json] [--baseline base.json]
+                                     [--save-baseline] [--threshold 0.15]
+
+Las etapas salen de los spans de timing.py (las mismas que muestra el panel
+"Rendimiento"): read, decode, parse (lasio.read), welly (Well.from_lasio),
+qc (pruebas), stats, render (curve_table_html + BeautifulSoup) y copy
+(deliver_file a una carpeta temporal). De cada etapa se toma el mejor de
+``--repeat`` corridas, después de una corrida de calentamiento que paga los
+imports. El resultado se escribe como JSON; si existe la línea de base se
+compara y el código de salida es 1 cuando alguna etapa empeora más que el
+umbral (y más que ``--min-delta`` segundos, para no alarmarse por ruido).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from compression_bench import collect_files  # noqa: E402
+from delivery import deliver_file  # noqa: E402
+from qc_core import load_las_path, process_las, quality_table_html  # noqa: E402
+from synthetic_las import case_name, generate_las  # noqa: E402
+from timing import recording  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_CASES = [
+    {"curves": 10, "samples": 5000},
+    {"curves": 30, "samples": 20000},
+    {"curves": 100, "samples": 5000},
+    {"curves": 30, "samples": 20000, "wrap": True},
+    {"curves": 30, "samples": 20000, "nulls": 0.3},
+    {"curves": 10, "samples": 5000, "array": 64},
+]
+# Etapa del informe -> spans de timing.py que la componen
+STAGES = {
+    "read": ("read",),
+    "decode": ("decode",),
+    "parse": ("lasio.read",),
+    "welly": ("Well.from_lasio",),
+    "qc": ("qc_tests",),
+    "stats": ("curve_stats",),
+    "render": ("curve_table_html", "bs4_transforms"),
+}
+
+
+def parse_case(text):
+    """Parse 'curves=30,samples=20000,wrap=1' into generator keyword arguments."""
+    case = {}
+    for item in text.split(','):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key in ("curves", "samples", "array", "seed"):
+            case[key] = int(value)
+        elif key == "nulls":
+            case[key] = float(value)
+        elif key == "wrap":
+            case[key] = value.strip().lower() in ("1", "true", "yes", "")
+        else:
+            raise ValueError(f"Parámetro de caso desconocido: {key}")
+    return case
+
+
+def run_once(path, copy_root):
+    """Run the pipeline once; return ({stage: seconds}, curves, samples)."""
+    with recording() as recorder:
+        las, content = load_las_path(path)
+        _, _, _, project, _ = process_las(las, content)
+        quality_table_html(project)
+    stages = {stage: sum(recorder.spans.get(name, 0.0) for name in names) for stage, names in STAGES.items()}
+
+    started = time.perf_counter()
+    destinations = deliver_file(path, "BENCH.las", "CAMPO", "POZO", compression="none", keep_original=True,
+                                sidecar="none", root=copy_root)
+    stages["copy"] = time.perf_counter() - started
+    for destination in destinations:
+        os.remove(destination)
+    stages["total"] = sum(stages.values())
+    return stages, len(las.curves), len(las.index)
+
+
+def bench_path(path, repeat, copy_root):
+    """Return the best time of each stage over ``repeat`` runs, plus the file shape."""
+    best = {}
+    curves = samples = 0
+    for _ in range(repeat):
+        stages, curves, samples = run_once(path, copy_root)
+        for stage, seconds in stages.items():
+            best[stage] = min(best.get(stage, float('inf')), seconds)
+    return {"size_bytes": os.path.getsize(path), "curves": curves, "samples": samples, "stages": best}
+
+
+def environment():
+    import lasio
+    import welly
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "lasio": lasio.__version__,
+        "welly": welly.__version__,
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Return the rows (case, stage, baseline s, current s, change) of stages slower than allowed."""
+    regressions = []
+    for case, result in results.items():
+        previous = baseline.get("results", {}).get(case)
+        if previous is None:
+            continue
+        for stage, seconds in result["stages"].items():
+            before = previous["stages"].get(stage)
+            if before is None or before <= 0:
+                continue
+            change = seconds / before - 1
+            if change > threshold and seconds - before > min_delta:
+                regressions.append((case, stage, before, seconds, change))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    stages = list(STAGES) + ["copy", "total"]
+    print(f"{'caso':<32} {'MB':>6} " + " ".join(f"{stage:>8}" for stage in stages) + "   (ms)")
+    for case, result in results.items():
+        print(f"{case[:32]:<32} {result['size_bytes'] / 1e6:>6.2f} "
+              + " ".join(f"{result['stages'][stage] * 1000:>8.1f}" for stage in stages))
+        previous = (baseline or {}).get("results", {}).get(case)
+        if previous:
+            changes = []
+            for stage in stages:
+                before = previous["stages"].get(stage)
+                changes.append(f"{(result['stages'][stage] / before - 1) * 100:>+7.0f}%" if before else f"{'':>8}")
+            print(f"{'  vs. línea de base':<32} {'':>6} " + " ".join(changes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=[os.path.join(os.path.dirname(BENCH_DIR), 'tempDir')],
+                        help="archivos LAS reales o carpetas (por defecto tempDir)")
+    parser.add_argument('--case', action='append', type=parse_case, default=None,
+                        help="caso sintético; repetible (por defecto, la matriz estándar)")
+    parser.add_argument('--no-synthetic', action='store_true')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'latest.json'))
+    parser.add_argument('--baseline', default=os.path.join(RESULTS_DIR, 'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help="guardar esta corrida como línea de base")
+    parser.add_argument('--threshold', type=float, default=0.15, help="empeoramiento relativo tolerado")
+    parser.add_argument('--min-delta', type=float, default=0.005, help="segundos mínimos para contar una regresión")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="qc_bench_")
+    try:
+        cases = []
+        if not args.no_synthetic:
+            for case in args.case or DEFAULT_CASES:
+                path = os.path.join(work_dir, case_name(**{key: value for key, value in case.items() if key != 'seed'}) + ".las")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(generate_las(**case))
+                cases.append((os.path.splitext(os.path.basename(path))[0], path))
+        cases += [(os.path.basename(path), path) for path in collect_files(args.paths)]
+        if not cases:
+            print("No hay casos para medir")
+            return 2
+
+        copy_root = os.path.join(work_dir, "verificado")
+        run_once(cases[0][1], copy_root)  # calentamiento: imports de lasio/welly/bs4
+        results = {}
+        for name, path in cases:
+            results[name] = bench_path(path, args.repeat, copy_root)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"environment": environment(), "repeat": args.repeat, "results": results}
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    for path in [args.output] + ([args.baseline] if args.save_baseline else []):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(f"Resultados en {args.output}" + (f"; línea de base guardada en {args.baseline}" if args.save_baseline else ""))
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    if baseline.get("environment", {}).get("platform") != report["environment"]["platform"]:
+        print("Aviso: la línea de base se midió en otra plataforma; las diferencias pueden no ser comparables.")
+    for case, stage, before, seconds, change in regressions:
+        print(f"REGRESIÓN {case} / {stage}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms ({change:+.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
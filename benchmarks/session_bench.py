@@ -0,0 +1,101 @@
+# benchmarks/session_bench.py
+"""Compare analysis latency of N concurrent Streamlit-like sessions: in-process threads vs the shared pool.
+
+Usage: python benchmarks/session_bench.py [archivos o carpeta] [--sessions 10] [--workers N]
+
+"antes" reproduce el flujo anterior (cada sesión analiza en un hilo del
+servidor); "después" envía los análisis al AnalysisPool. También mide el
+mayor retraso de un hilo que despierta cada 10 ms, como indicador de cuánto
+se traba el servidor (el GIL) mientras se analiza.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_pool import AnalysisPool, analyze_upload  # noqa: E402
+from compression_bench import collect_files  # noqa: E402
+from loadgen import percentile  # noqa: E402
+
+
+class LagProbe:
+    """Thread that wakes every ``interval`` seconds and records the worst oversleep."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            time.sleep(self.interval)
+            self.max_lag = max(self.max_lag, time.perf_counter() - started - self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def in_process(path):
+    started = time.perf_counter()
+    analyze_upload(path)
+    return time.perf_counter() - started
+
+
+def through_pool(pool, session_id, path):
+    started = time.perf_counter()
+    ticket = pool.submit(session_id, analyze_upload, path)
+    while not ticket.wait(0.25):
+        ticket.touch()
+    ticket.result()
+    return time.perf_counter() - started
+
+
+def run_sessions(task, paths):
+    with LagProbe() as probe, ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        started = time.perf_counter()
+        latencies = list(executor.map(task, range(len(paths)), paths))
+        elapsed = time.perf_counter() - started
+    return latencies, elapsed, probe.max_lag
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['tempDir'])
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No se encontraron archivos LAS.")
+        return 2
+    paths = [files[i % len(files)] for i in range(args.sessions)]
+
+    pool = AnalysisPool(workers=args.workers, max_queue=args.sessions)
+    # Calentar los procesos del pool (imports de welly) para no medir el arranque
+    through_pool(pool, "warmup", files[0])
+    analyze_upload(files[0])
+
+    print(f"{'modo':<8} {'sesiones':>8} {'seg':>7} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8} {'traba ms':>9}")
+    for name, task in (("antes", lambda i, path: in_process(path)),
+                       ("después", lambda i, path: through_pool(pool, f"s{i}", path))):
+        latencies, elapsed, lag = run_sessions(task, paths)
+        print(f"{name:<8} {len(latencies):>8} {elapsed:>7.2f} {percentile(latencies, 0.50) * 1000:>8.0f} "
+              f"{percentile(latencies, 0.95) * 1000:>8.0f} {max(latencies) * 1000:>8.0f} {lag * 1000:>9.0f}")
+    pool.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# benchmarks/synthetic_las.py
+"""Generate reproducible synthetic LAS 2.0 files for benchmarks.
+
+Usage: python benchmarks/synthetic_las.py salida.las [--curves 30] [--samples 20000] [--wrap]
+                                          [--nulls 0.1] [--array 0] [--seed 0]
+
+Las primeras curvas usan mnemónicos reales del diccionario de alias (GR,
+RHOB, NPHI, DT...) para que las pruebas de calidad de config.py se apliquen;
+el resto son C001, C002... ``--array N`` agrega un canal de arreglo como N
+columnas WF[1]..WF[N] (así lo representa LAS 2.0), ``--nulls`` reemplaza esa
+fracción de valores por NULL y ``--wrap`` escribe el bloque ~A en modo WRAP.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+NULL_VALUE = -999.25
+WRAP_WIDTH = 80
+# (mnemónico, unidad, media, desvío) con mnemónicos presentes en get_alias()
+NAMED_CURVES = [
+    ("GR", "gAPI", 80.0, 30.0),
+    ("RHOB", "g/cm3", 2.4, 0.15),
+    ("NPHI", "v/v", 0.25, 0.08),
+    ("DT", "us/ft", 90.0, 20.0),
+    ("CALI", "in", 8.5, 0.5),
+    ("SP", "mV", -40.0, 15.0),
+    ("PE", "b/e", 3.0, 0.8),
+    ("ILD", "ohm.m", 10.0, 5.0),
+    ("CCL", "V", 0.0, 1.0),
+    ("CBL", "mV", 20.0, 10.0),
+]
+
+
+def curve_specs(curves, array=0):
+    """Return the (mnemonic, unit) list of the data columns after the depth."""
+    specs = [(mnemonic, unit) for mnemonic, unit, _, _ in NAMED_CURVES[:curves]]
+    specs += [(f"C{index:03d}", "UNIT") for index in range(len(specs) + 1, curves + 1)]
+    specs += [(f"WF[{index}]", "mV") for index in range(1, array + 1)]
+    return specs
+
+
+def generate_data(curves, samples, nulls=0.0, array=0, seed=0, start=100.0, step=0.1524):
+    """Return (depth, values) arrays; values has one column per curve spec, with NULL values set."""
+    rng = np.random.default_rng(seed)
+    depth = start + step * np.arange(samples)
+    columns = []
+    for index in range(curves + array):
+        if index < len(NAMED_CURVES):
+            _, _, mean, std = NAMED_CURVES[index]
+        else:
+            mean, std = 50.0, 10.0
+        # Caminata suave más ruido: parecido a un perfil, sin tramos planos
+        walk = np.cumsum(rng.normal(0, std * 0.02, samples))
+        columns.append(mean + walk - walk.mean() + rng.normal(0, std * 0.2, samples))
+    values = np.column_stack(columns) if columns else np.empty((samples, 0))
+    if nulls:
+        values[rng.random(values.shape) < nulls] = NULL_VALUE
+    return depth, values
+
+
+def _header(specs, depth, wrap):
+    lines = [
+        "~Version Information",
+        " VERS.                 2.0 : CWLS LOG ASCII STANDARD - VERSION 2.0",
+        f" WRAP.                 {'YES' if wrap else 'NO'} : {'Multiple lines per depth step' if wrap else 'One line per depth step'}",
+        "~Well Information",
+        f" STRT.M              {depth[0]:.4f} : START DEPTH",
+        f" STOP.M              {depth[-1]:.4f} : STOP DEPTH",
+        f" STEP.M              {depth[1] - depth[0] if len(depth) > 1 else 0:.4f} : STEP",
+        f" NULL.               {NULL_VALUE} : NULL VALUE",
+        " COMP.               SINTETICA S.A. : COMPANY",
+        " WELL.               SYN-0001 : WELL",
+        " FLD .               CAMPO SINTETICO : FIELD",
+        " LOC .               0 : LOCATION",
+        " SRVC.               SINTETICA : SERVICE COMPANY",
+        " DATE.               2024-01-01 : LOG DATE",
+        " UWI .               00000000000000 : UNIQUE WELL ID",
+        "~Curve Information",
+        " DEPT.M                  : DEPTH",
+    ]
+    lines += [f" {mnemonic}.{unit:<10} : {mnemonic}" for mnemonic, unit in specs]
+    lines += ["~Parameter Information", " BHT .DEGC   60.0 : BOTTOM HOLE TEMPERATURE", "~Other", " Generado para benchmarks",
+              "~A  DEPT " + " ".join(mnemonic for mnemonic, _ in specs)]
+    return lines
+
+
+def _wrapped_rows(depth, values):
+    per_line = max(1, WRAP_WIDTH // 11)
+    for depth_value, row in zip(depth, values):
+        # En WRAP el índice va solo en la primera línea del paso
+        yield f"{depth_value:10.4f}"
+        for start in range(0, len(row), per_line):
+            yield " ".join(f"{value:10.4f}" for value in row[start:start + per_line])
+
+
+def generate_las(curves=30, samples=20000, wrap=False, nulls=0.0, array=0, seed=0):
+    """Return the text of a synthetic LAS 2.0 file."""
+    specs = curve_specs(curves, array)
+    depth, values = generate_data(curves, samples, nulls, array, seed)
+    lines = _header(specs, depth, wrap)
+    if wrap:
+        lines.extend(_wrapped_rows(depth, values))
+        body = "\n".join(lines) + "\n"
+    else:
+        table = np.column_stack([depth, values])
+        formatted = "\n".join(" ".join(f"{value:10.4f}" for value in row) for row in table)
+        body = "\n".join(lines) + "\n" + formatted + "\n"
+    return body
+
+
+def case_name(curves, samples, wrap=False, nulls=0.0, array=0):
+    """Short stable name of a generator parameter set, used as benchmark key."""
+    name = f"syn_c{curves}_s{samples}"
+    if wrap:
+        name += "_wrap"
+    if nulls:
+        name += f"_n{int(round(nulls * 100))}"
+    if array:
+        name += f"_a{array}"
+    return name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output')
+    parser.add_argument('--curves', type=int, default=30)
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--wrap', action='store_true')
+    parser.add_argument('--nulls', type=float, default=0.0)
+    parser.add_argument('--array', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    text = generate_las(args.curves, args.samples, args.wrap, args.nulls, args.array, args.seed)
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"{args.output}: {len(text) / 1e6:.2f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# benchmarks/upload_bench.py
+"""Measure time-to-first-result of an upload: old save-then-parse flow vs the overlapped pipeline.
+
+Usage: python benchmarks/upload_bench.py [archivos o carpeta] [--repeat 5]
+
+"antes": copia por porciones a tempDir y recién después lee el archivo
+completo con lasio y corre el QC (el primer resultado visible era el análisis
+completo). "después": UploadStore.add escribe desde getbuffer() mientras hashea
+y pre-controla el encabezado; el primer resultado es ese pre-control.
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_pool import analyze_upload  # noqa: E402
+from compression_bench import collect_files  # noqa: E402
+from qc_core import HeaderPrecheck  # noqa: E402
+from upload_store import UploadStore  # noqa: E402
+
+
+def legacy_save(upload, temp_dir, name):
+    # Como el save_uploadedfile original: read() por porciones de 1 MB (una copia por porción)
+    file_path = os.path.join(temp_dir, name)
+    with open(file_path, 'wb') as f:
+        while True:
+            chunk = upload.read(1024 * 1024)
+            if not chunk:
+                break
+            f.write(chunk)
+    return file_path
+
+
+def best_of(repeat, task):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        task()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['tempDir'])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No se encontraron archivos LAS.")
+        return 2
+
+    work_dir = tempfile.mkdtemp(prefix='upload_bench_')
+    store = UploadStore(os.path.join(work_dir, 'store'))
+    analyze_upload(files[0])  # calentar imports de welly
+    print(f"{'archivo':<50} {'MB':>6} {'antes ms':>9} {'después ms':>11} {'análisis ms':>12}")
+    try:
+        for path in files:
+            with open(path, 'rb') as f:
+                data = f.read()
+            name = os.path.basename(path)
+
+            def before():
+                saved = legacy_save(io.BytesIO(data), work_dir, name)
+                analyze_upload(saved)
+
+            def after():
+                precheck = HeaderPrecheck()
+                store.add('bench', io.BytesIO(data), name, chunk_callback=precheck.feed)
+                assert precheck.result is not None, precheck.error
+
+            before_s = best_of(args.repeat, before)
+            after_s = best_of(args.repeat, after)
+            # El análisis completo sigue costando lo mismo, pero ya no bloquea el primer resultado
+            full_s = best_of(args.repeat, lambda: analyze_upload(store.path_for(store.add('bench', io.BytesIO(data), name)[0], name)))
+            print(f"{name[:50]:<50} {len(data) / 1e6:>6.2f} {before_s * 1000:>9.1f} {after_s * 1000:>11.1f} "
+                  f"{full_s * 1000:>12.1f}")
+    finally:
+        shutil.rmtree(work_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,337 @@
+# catalog.py
+"""Local SQLite catalog of the verified LAS archive.
+
+Se completa al entregar cada archivo y puede reconstruirse con un re-escaneo
+incremental que solo vuelve a leer los archivos cuyo tamaño o fecha cambió:
+
+    python catalog.py rescan [--root RAIZ] [--db CATALOGO]
+    python catalog.py search --fld "LA MADRE SELVA" --service NEUTRON --since 2023-01-01
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from config import get_delivery_settings, validate_header
+from qc_core import detect_services, get_well_identity, load_las_path
+
+LAS_EXTENSIONS = ('.las', '.las.gz', '.las.zst')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS las_files (
+    path TEXT PRIMARY KEY,
+    well TEXT,
+    srvc TEXT,
+    date TEXT,
+    date_iso TEXT,
+    year INTEGER,
+    fld TEXT,
+    services TEXT,
+    curves TEXT,
+    checksum TEXT,
+    size INTEGER,
+    mtime REAL,
+    qc_header INTEGER,
+    qc_services INTEGER,
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS las_services (
+    service TEXT NOT NULL,
+    path TEXT NOT NULL REFERENCES las_files(path) ON DELETE CASCADE,
+    PRIMARY KEY (service, path)
+);
+CREATE TABLE IF NOT EXISTS las_curves (
+    mnemonic TEXT NOT NULL,
+    path TEXT NOT NULL REFERENCES las_files(path) ON DELETE CASCADE,
+    PRIMARY KEY (mnemonic, path)
+);
+CREATE TABLE IF NOT EXISTS archive_integrity (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    checksum TEXT NOT NULL,
+    first_seen TEXT,
+    last_verified TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_las_files_well ON las_files(well COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_las_files_srvc ON las_files(srvc COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_las_files_fld ON las_files(fld COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_las_files_date ON las_files(date_iso, year);
+CREATE INDEX IF NOT EXISTS idx_las_files_checksum ON las_files(checksum);
+CREATE INDEX IF NOT EXISTS idx_las_files_qc ON las_files(qc_header, qc_services);
+CREATE INDEX IF NOT EXISTS idx_las_services_path ON las_services(path);
+CREATE INDEX IF NOT EXISTS idx_las_curves_path ON las_curves(path);
+"""
+
+DATE_FORMATS = ['%d-%b-%Y', '%d-%b-%y', '%m/%d/%Y', '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%d.%m.%Y', '%Y%m%d']
+
+_YEAR = re.compile(r'(?<!\d)(19|20)\d{2}(?!\d)')
+_DATE_FILTER = re.compile(r'^\d{4}(-\d{2}(-\d{2})?)?$')
+
+
+def get_catalog_path():
+    """Return the path of the local catalog database."""
+    return get_delivery_settings()["catalog"]
+
+
+def connect(db_path=None):
+    """Open the catalog database, creating the schema if needed."""
+    conn = sqlite3.connect(db_path or get_catalog_path(), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def is_las_path(path):
+    """Return True for LAS files and their compressed archive copies."""
+    return path.lower().endswith(LAS_EXTENSIONS)
+
+
+def normalize_date(value):
+    """Return (ISO date or None, year or None) for a free-form LAS DATE value."""
+    text = str(value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+            return parsed.date().isoformat(), parsed.year
+        except ValueError:
+            continue
+    match = _YEAR.search(text)
+    return None, int(match.group(0)) if match else None
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _well_info_frame(las):
+    return pd.DataFrame({"MNEM": [item.mnemonic for item in las.well]})
+
+
+def record_file(conn, path, las, services, qc_header=None, qc_services=None, checksum=None):
+    """Insert or update the catalog entry of one archived file from its parsed header."""
+    well_name, company_name, date, fld_value = get_well_identity(las)
+    date_iso, year = normalize_date(date)
+    stat = os.stat(path)
+    checksum = checksum or file_checksum(path)
+    if qc_header is None:
+        qc_header, _ = validate_header(_well_info_frame(las))
+    curves = [curve.mnemonic for curve in las.curves]
+    previous = conn.execute("SELECT checksum FROM las_files WHERE path = ?", (path,)).fetchone()
+    if previous is not None and previous["checksum"] != checksum:
+        # Otro contenido en la misma ruta: sus huellas ya no sirven (fingerprint.py index las recalcula)
+        from fingerprint import forget_fingerprints
+        forget_fingerprints(conn, [path])
+
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO las_files (path, well, srvc, date, date_iso, year, fld, services, curves, checksum,
+                                   size, mtime, qc_header, qc_services, indexed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                well=excluded.well, srvc=excluded.srvc, date=excluded.date, date_iso=excluded.date_iso,
+                year=excluded.year, fld=excluded.fld, services=excluded.services, curves=excluded.curves,
+                checksum=excluded.checksum, size=excluded.size, mtime=excluded.mtime,
+                qc_header=excluded.qc_header,
+                qc_services=COALESCE(excluded.qc_services, las_files.qc_services),
+                indexed_at=excluded.indexed_at
+            """,
+            (path, str(well_name), str(company_name), str(date), date_iso, year, str(fld_value),
+             "-".join(services), " ".join(curves), checksum, stat.st_size, stat.st_mtime,
+             int(bool(qc_header)), None if qc_services is None else int(bool(qc_services)),
+             datetime.now(timezone.utc).isoformat(timespec='seconds')),
+        )
+        conn.execute("DELETE FROM las_services WHERE path = ?", (path,))
+        conn.execute("DELETE FROM las_curves WHERE path = ?", (path,))
+        conn.executemany("INSERT OR IGNORE INTO las_services (service, path) VALUES (?, ?)",
+                         [(service, path) for service in services])
+        conn.executemany("INSERT OR IGNORE INTO las_curves (mnemonic, path) VALUES (?, ?)",
+                         [(mnemonic, path) for mnemonic in curves])
+
+
+UPSERT_BASELINE = """
+    INSERT INTO archive_integrity (path, size, mtime, checksum, first_seen, last_verified)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET size=excluded.size, mtime=excluded.mtime,
+        checksum=excluded.checksum, last_verified=excluded.last_verified
+"""
+
+
+def record_baseline(conn, path, checksum, size, mtime):
+    """Store the reference (size, mtime, checksum) used by the integrity rescan."""
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    with conn:
+        conn.execute(UPSERT_BASELINE, (path, size, mtime, checksum, now, now))
+
+
+def record_delivery(destination_paths, las, services, qc_header, qc_services, db_path=None, fingerprints=None):
+    """Record every archived LAS copy written by a delivery, with its integrity baseline.
+
+    Las huellas de curvas, si se pasan, se guardan una sola vez para la primera copia.
+    """
+    conn = connect(db_path)
+    try:
+        las_paths = [path for path in destination_paths if is_las_path(path)]
+        for path in las_paths:
+            checksum = file_checksum(path)
+            record_file(conn, path, las, services, qc_header, qc_services, checksum=checksum)
+            stat = os.stat(path)
+            record_baseline(conn, path, checksum, stat.st_size, stat.st_mtime)
+        if fingerprints and las_paths:
+            from fingerprint import store_fingerprints
+            store_fingerprints(conn, las_paths[0], fingerprints)
+    finally:
+        conn.close()
+
+
+def index_file(conn, path):
+    """Read only the header of an archived file and (re)record it in the catalog."""
+    las, _ = load_las_path(path, ignore_data=True)
+    record_file(conn, path, las, detect_services(las))
+
+
+def iter_archive(root):
+    """Yield the LAS-like files below the archive root."""
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if is_las_path(filename):
+                yield os.path.join(dirpath, filename)
+
+
+def rescan(root=None, db_path=None, progress_callback=None):
+    """Re-index files whose size or mtime changed and drop entries (and fingerprints) of deleted files."""
+    root = root or get_delivery_settings()["root"]
+    conn = connect(db_path)
+    summary = {"unchanged": 0, "indexed": 0, "removed": 0, "errors": []}
+    try:
+        known = {row["path"]: (row["size"], row["mtime"])
+                 for row in conn.execute("SELECT path, size, mtime FROM las_files WHERE path LIKE ?",
+                                         (os.path.join(root, '') + '%',))}
+        seen = set()
+        for path in iter_archive(root):
+            seen.add(path)
+            stat = os.stat(path)
+            if known.get(path) == (stat.st_size, stat.st_mtime):
+                summary["unchanged"] += 1
+                continue
+            try:
+                index_file(conn, path)
+                summary["indexed"] += 1
+            except Exception as e:
+                summary["errors"].append((path, str(e)))
+            if progress_callback:
+                progress_callback(path)
+
+        removed = [path for path in known if path not in seen]
+        with conn:
+            conn.executemany("DELETE FROM las_files WHERE path = ?", [(path,) for path in removed])
+        # Sin esto un archivo borrado seguiría apareciendo como duplicado de cada reenvío
+        # (también limpia las huellas que dejaron re-escaneos anteriores)
+        from fingerprint import forget_fingerprints
+        forget_fingerprints(conn)
+        summary["removed"] = len(removed)
+    finally:
+        conn.close()
+    return summary
+
+
+def find_by_checksum(conn, checksum):
+    """Return the archived paths whose content has the given SHA-256."""
+    return [row[0] for row in conn.execute("SELECT path FROM las_files WHERE checksum = ? ORDER BY path", (checksum,))]
+
+
+def is_date_filter(value):
+    """Return True for a search date bound of the form YYYY, YYYY-MM or YYYY-MM-DD."""
+    return bool(_DATE_FILTER.match(str(value)))
+
+
+def search(conn, well=None, fld=None, srvc=None, service=None, curve=None, since=None, until=None,
+           qc_ok=None, limit=500):
+    """Return matching catalog rows as a DataFrame, newest first; ValueError for a malformed date bound."""
+    for value in (since, until):
+        if value and not is_date_filter(value):
+            raise ValueError(f"Fecha inválida: {value!r} (use AAAA, AAAA-MM o AAAA-MM-DD)")
+    clauses = []
+    params = []
+    for column, value in (("well", well), ("fld", fld), ("srvc", srvc)):
+        if value:
+            clauses.append(f"f.{column} LIKE ? COLLATE NOCASE")
+            params.append(f"%{value}%")
+    if service:
+        clauses.append("f.path IN (SELECT path FROM las_services WHERE service = ?)")
+        params.append(service)
+    if curve:
+        clauses.append("f.path IN (SELECT path FROM las_curves WHERE mnemonic = ?)")
+        params.append(curve)
+    if since:
+        since = str(since)
+        clauses.append("(f.date_iso >= ? OR (f.date_iso IS NULL AND f.year >= ?))")
+        params.extend([since, int(since[:4])])
+    if until:
+        until = str(until)
+        clauses.append("(f.date_iso <= ? OR (f.date_iso IS NULL AND f.year <= ?))")
+        params.extend([until, int(until[:4])])
+    if qc_ok is not None:
+        clauses.append("(f.qc_header = ? AND COALESCE(f.qc_services, 1) = ?)" if qc_ok
+                       else "(f.qc_header = ? OR f.qc_services = ?)")
+        params.extend([int(qc_ok), int(qc_ok)])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = f"""
+        SELECT f.well, f.fld, f.srvc, f.date, f.services, f.curves, f.qc_header, f.qc_services,
+               f.checksum, f.size, f.path
+        FROM las_files f {where}
+        ORDER BY COALESCE(f.date_iso, f.year) DESC, f.well
+        LIMIT ?
+    """
+    return pd.read_sql_query(query, conn, params=params + [limit])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catálogo local del archivo de perfiles verificados.")
+    parser.add_argument('--db', default=None, help="Ruta del catálogo SQLite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rescan_parser = subparsers.add_parser('rescan', help="Re-escaneo incremental del archivo verificado")
+    rescan_parser.add_argument('--root', default=None)
+
+    search_parser = subparsers.add_parser('search', help="Buscar en el catálogo")
+    for option in ('well', 'fld', 'srvc', 'service', 'curve', 'since', 'until'):
+        search_parser.add_argument(f'--{option}', default=None)
+    search_parser.add_argument('--limit', type=int, default=500)
+
+    args = parser.parse_args(argv)
+    if args.command == 'rescan':
+        summary = rescan(args.root, args.db, progress_callback=lambda path: print(f"indexado: {path}"))
+        print(f"{summary['indexed']} indexados, {summary['unchanged']} sin cambios, {summary['removed']} eliminados")
+        for path, error in summary["errors"]:
+            print(f"ERROR {path}: {error}")
+    else:
+        conn = connect(args.db)
+        try:
+            results = search(conn, well=args.well, fld=args.fld, srvc=args.srvc, service=args.service,
+                             curve=args.curve, since=args.since, until=args.until, limit=args.limit)
+        except ValueError as e:
+            parser.error(str(e))
+        finally:
+            conn.close()
+        print(results.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
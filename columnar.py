@@ -0,0 +1,708 @@
+# columnar.py
+"""Compact column-major well representation for the QC pipeline.
+
+Con el motor de referencia lasio arma un arreglo float64 por curva (y antes
+una lista de strings por línea del ~A), welly copia cada curva en un
+DataFrame y el control agregaba otro DataFrame por curva para describe().
+ColumnarWell guarda todo en un único arreglo contiguo curvas × muestras
+(float64 por defecto, float32 opcional solo para el control) y un CurveInfo
+liviano por curva. Las pruebas de welly.quality y las estadísticas se calculan
+directamente sobre las filas; el pozo de welly se arma recién si algo lo pide
+(la tabla de calidad HTML).
+
+load_columnar lee el encabezado con lasio (ignore_data) y tokeniza el ~A con
+numpy sobre los bytes. Si el bloque no tiene la forma esperada (comentarios,
+valores pegados, comas decimales, columnas de texto) se lee con lasio
+completo y se convierte, de modo que el resultado es siempre el mismo.
+
+load_columnar_path lee primero solo el encabezado y con él planea la carga
+(load_plan.py): los arreglos se reservan del tamaño estimado y el archivo se
+lee entero, se mapea (mmap) o se descomprime y tokeniza por partes según el
+presupuesto de memoria. Con un intervalo de profundidad (``depth_range``) se
+ubica por bisección el tramo de bytes del ~A que lo contiene y solo ese tramo
+se tokeniza; las pruebas y estadísticas corren sobre esas muestras.
+"""
+import copy
+import io
+import logging
+import mmap
+import os
+import re
+import warnings
+
+import numpy as np
+
+from compression import detect_codec, open_decompressed, read_las_bytes
+from config import get_alias, get_load_settings, get_tests, has_si_units
+from qc_core import (DATA_SECTION, LasLoadError, LasProcessError, apply_tests, curve_alias, curve_event, curve_rows,
+                     decode_las_bytes, result_frames, well_info_frame)
+from load_plan import expected_rows, log_plan, plan_load, regular_step
+from logging_setup import Sampler
+from timing import span
+
+logger = logging.getLogger(__name__)
+
+FIRST_LINE = re.compile(rb'\s*([^\r\n]*)')
+# Bytes del ~A que se tokenizan por vez; de cada trozo se guardan solo las columnas pedidas
+CHUNK_BYTES = 4 * 1024 * 1024
+# Lectura del encabezado antes de planear la carga
+HEAD_BYTES = 64 * 1024
+
+
+class NonNumericCurveError(LasProcessError):
+    """A curve holds text values: the columnar array cannot represent it (use the lasio engine)."""
+
+
+class CurveInfo:
+    """Metadata of one data curve; ``values`` is its row of ColumnarWell.data (a view, not a copy)."""
+
+    __slots__ = ("mnemonic", "unit", "descr", "values")
+
+    def __init__(self, mnemonic, unit, descr, values):
+        self.mnemonic = mnemonic
+        self.unit = unit
+        self.descr = descr
+        self.values = values
+
+    @property
+    def units(self):
+        # Mismo nombre que en welly.Curve, para las pruebas de config (has_si_units)
+        return self.unit
+
+    def as_numpy(self):
+        return self.values
+
+    def __repr__(self):
+        return f"CurveInfo({self.mnemonic!r}, {self.unit!r}, {self.values.size} muestras)"
+
+
+class ColumnarWell:
+    """Header (a lasio LASFile), float64 depth index and one (curves × samples) array.
+
+    Los ``CurveItem.data`` del encabezado apuntan a las filas del arreglo, así
+    ``las`` sirve tal cual a huellas, sidecar y entregas sin duplicar datos.
+    """
+
+    def __init__(self, las, index, data, rows=None, depth_range=None):
+        self.las = las
+        self.index = index
+        self.data = data
+        # Posición en las.curves de la curva de cada fila de ``data``
+        self.rows = list(range(1, len(las.curves))) if rows is None else list(rows)
+        # (tope, base) si solo se cargó un intervalo de profundidad
+        self.depth_range = depth_range
+        self.curves = [CurveInfo(las.curves[position].mnemonic, las.curves[position].unit,
+                                 las.curves[position].descr, data[row])
+                       for row, position in enumerate(self.rows)]
+        las.curves[0].data = index
+        for position, curve in zip(self.rows, self.curves):
+            las.curves[position].data = curve.values
+        self._well = None
+
+    @classmethod
+    def from_lasio(cls, las, dtype=None, mnemonics=None, depth_range=None):
+        """Copy the curves (and depth window) of a fully parsed LASFile into the columnar layout."""
+        rows = projected_rows(las, mnemonics)
+        index = np.asarray(las.index, dtype=np.float64)
+        keep = _in_window(index, depth_range) if depth_range is not None else slice(None)
+        index = index[keep]
+        data = np.empty((len(rows), len(index)), dtype=dtype or get_load_settings()["dtype"])
+        try:
+            for row, position in enumerate(rows):
+                data[row] = np.asarray(las.curves[position].data)[keep]
+        except (TypeError, ValueError) as e:
+            raise NonNumericCurveError(f"Curva no numérica: {las.curves[position].mnemonic} ({e})") from e
+        for position in set(range(1, len(las.curves))) - set(rows):
+            las.curves[position].data = np.empty(0)
+        return cls(las, index, data, rows, depth_range)
+
+    @property
+    def projected(self):
+        """True when only some of the header curves were loaded."""
+        return len(self.rows) < len(self.las.curves) - 1
+
+    @property
+    def partial(self):
+        """True when ``las`` does not hold all the data of the file (projected curves, a depth window or float32)."""
+        # float32 redondea los valores del archivo: sirve al control pero no a huellas, sidecar ni entregas
+        return self.projected or self.depth_range is not None or self.data.dtype != np.float64
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes + self.data.nbytes
+
+    @property
+    def well(self):
+        """The welly Well, built from the header and the columnar data on first use."""
+        if self._well is None:
+            from welly import Well
+
+            with span("Well.from_lasio"):
+                try:
+                    self._well = Well.from_lasio(self.loaded_las())
+                except Exception as e:
+                    raise LasProcessError(str(e)) from e
+        return self._well
+
+    def loaded_las(self):
+        """Return the header with only the loaded curves (a shallow copy when projected)."""
+        if not self.projected:
+            return self.las
+        import lasio
+
+        las = copy.copy(self.las)
+        las.sections = dict(self.las.sections, Curves=lasio.SectionItems(
+            [self.las.curves[0]] + [self.las.curves[position] for position in self.rows]))
+        return las
+
+    @property
+    def project(self):
+        from welly import Project
+
+        return Project([self.well])
+
+    def welly_test(self, test):
+        """Wrap a test without a vectorized version so it runs on the welly curve of the same name."""
+        def run(curve):
+            return test(self.well.data[curve.mnemonic])
+
+        run.__name__ = test.__name__
+        return run
+
+
+def _flat_runs_ok(values):
+    # welly.quality.no_flat: ninguna racha de diferencias nulas llega a max(3, n // 100) muestras
+    tolerance = max(3, values.size // 100)
+    zeros = np.flatnonzero(np.diff(values) == 0)
+    breaks = np.flatnonzero(np.diff(zeros) != 1) + 1
+    runs = np.diff(np.concatenate(([0], breaks, [zeros.size])))
+    return np.all(runs < tolerance)
+
+
+def no_flat(curve):
+    return _flat_runs_ok(curve.values)
+
+
+def no_monotonic(curve):
+    return _flat_runs_ok(np.diff(curve.values))
+
+
+def all_positive(curve):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # curva enteramente nula: nanmin da NaN, como en welly
+        return bool(np.nanmin(curve.values) >= 0)
+
+
+def no_gaps(curve):
+    present = np.flatnonzero(~np.isnan(curve.values))
+    if present.size == 0:
+        return True
+    return not np.isnan(curve.values[present[0]:present[-1] + 1]).any()
+
+
+def all_between(lower, upper):
+    def all_between(curve):
+        values = curve.values[~np.isnan(curve.values)]
+        # Los límites se llevan al tipo de los datos: 0.1 en float32 no debe quedar por encima de 0.1
+        return bool(np.all(values.dtype.type(lower) < values)) and bool(np.all(values.dtype.type(upper) > values))
+
+    return all_between
+
+
+# Pruebas de welly.quality con versión vectorizada (mismo nombre y mismo tipo de resultado)
+COLUMN_TESTS = {test.__name__: test for test in (no_flat, no_monotonic, all_positive, no_gaps)}
+
+
+def column_test(test, well):
+    """Return the vectorized equivalent of a welly.quality test, or a wrapper that runs it on welly."""
+    if getattr(test, "__module__", None) != "welly.quality":
+        return test  # pruebas propias (has_si_units) trabajan con CurveInfo
+    if test.__name__ == "all_between" and test.__closure__:
+        bounds = dict(zip(test.__code__.co_freevars, (cell.cell_contents for cell in test.__closure__)))
+        return all_between(bounds["lower"], bounds["upper"])
+    if test.__name__ in COLUMN_TESTS:
+        return COLUMN_TESTS[test.__name__]
+    return well.welly_test(test)
+
+
+def projected_rows(las, mnemonics=None):
+    """Return the positions in las.curves of the data curves to load (all of them without ``mnemonics``)."""
+    return [position for position, item in enumerate(las.curves)
+            if position > 0 and (mnemonics is None or item.mnemonic in mnemonics)]
+
+
+def _row_chunks(data_bytes, start=0, end=None):
+    # Trozos de líneas completas; en WRAP un registro puede quedar partido entre trozos (ver parse_chunks)
+    end = len(data_bytes) if end is None else end
+    while start < end:
+        cut = data_bytes.find(b"\n", min(start + CHUNK_BYTES, end), end)
+        cut = end if cut < 0 else cut + 1
+        yield data_bytes[start:cut]
+        start = cut
+
+
+def _stream_chunks(stream, pending, progress):
+    # Trozos de líneas completas mientras se descomprime; ``progress["bytes"]`` cuenta lo leído
+    while True:
+        block = stream.read(CHUNK_BYTES)
+        if not block:
+            break
+        progress["bytes"] += len(block)
+        cut = block.rfind(b"\n") + 1
+        if cut:
+            yield pending + memoryview(block)[:cut]
+            pending = block[cut:]
+        else:
+            pending += block
+    if pending:
+        yield pending
+
+
+def _tokenize(chunk):
+    with warnings.catch_warnings():
+        # Un token que no es número corta la lectura con este aviso: valores pegados, comas, texto
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(chunk, sep=" ")
+        except (DeprecationWarning, ValueError):
+            return None
+
+
+def _in_window(index, depth_range):
+    top, bottom = depth_range
+    keep = np.ones(index.shape, dtype=bool)
+    if top is not None:
+        keep &= index >= top
+    if bottom is not None:
+        keep &= index <= bottom
+    return keep
+
+
+def _past_window(first_depth, last_depth, depth_range):
+    # En el sentido del archivo, la última profundidad leída ya pasó el intervalo
+    top, bottom = depth_range
+    if last_depth > first_depth:
+        return bottom is not None and last_depth > bottom
+    if last_depth < first_depth:
+        return top is not None and last_depth < top
+    return False
+
+
+def _grow(index, data, filled, needed):
+    # El encabezado anunciaba menos filas: se agranda un 50 % (o lo necesario) copiando lo ya cargado
+    capacity = max(needed, index.size + index.size // 2)
+    grown_index = np.empty(capacity)
+    grown_index[:filled] = index[:filled]
+    grown = np.empty((data.shape[0], capacity), dtype=data.dtype)
+    grown[:, :filled] = data[:, :filled]
+    return grown_index, grown
+
+
+def _trim(index, data, filled):
+    # Sobró reserva: se corren las filas al principio del bloque y se achica en el lugar, sin una segunda copia
+    width, capacity = data.shape
+    if filled < capacity:
+        flat = data.reshape(-1)
+        for row in range(1, width):
+            flat[row * filled:(row + 1) * filled] = data[row, :filled]
+        del flat
+        data.resize((width, filled), refcheck=False)
+        index.resize(filled, refcheck=False)
+    return index, data
+
+
+def parse_chunks(chunks, n_columns, null_value, wrapped, dtype, rows=None, depth_range=None, expected_rows=None):
+    """Tokenize whole-line chunks of ~A into preallocated (index, data); return None if the block needs lasio.
+
+    Los arreglos se reservan con ``expected_rows`` (ver load_plan), se
+    agrandan si no alcanzan y se recortan al final. De cada trozo se guardan
+    solo las columnas de ``rows`` (posiciones en ~C; por defecto todas las
+    curvas) y las filas dentro de ``depth_range`` (tope, base; None = sin
+    límite); pasado el intervalo se deja de leer.
+    """
+    if n_columns < 2:
+        return None
+    selection = slice(1, None) if rows is None or list(rows) == list(range(1, n_columns)) else list(rows)
+    width = n_columns - 1 if isinstance(selection, slice) else len(selection)
+    index = np.empty(expected_rows or 0)
+    data = np.empty((width, index.size), dtype=dtype)
+    filled = 0
+    carry = np.empty(0)
+    first_depth = None
+    for chunk in chunks:
+        if chunk.find(b"#") >= 0:
+            return None
+        if first_depth is None and not wrapped:
+            line = FIRST_LINE.match(chunk).group(1)
+            if line and len(line.split()) != n_columns:
+                return None
+        values = _tokenize(chunk)
+        if values is None:
+            return None
+        if wrapped:
+            # Un registro WRAP ocupa varias líneas: lo que no completa un registro pasa al trozo siguiente
+            values = np.concatenate((carry, values)) if carry.size else values
+            usable = values.size - values.size % n_columns
+            carry = values[usable:].copy()
+            values = values[:usable]
+        elif values.size % n_columns:
+            return None
+        if values.size == 0:
+            continue
+        if null_value is not None:
+            values[values == null_value] = np.nan
+        matrix = values.reshape(-1, n_columns)
+        first_depth = matrix[0, 0] if first_depth is None else first_depth
+        last_depth = matrix[-1, 0]
+        if depth_range is not None:
+            matrix = matrix[_in_window(matrix[:, 0], depth_range)]
+        count = matrix.shape[0]
+        if filled + count > index.size:
+            index, data = _grow(index, data, filled, filled + count)
+        index[filled:filled + count] = matrix[:, 0]
+        data[:, filled:filled + count] = matrix[:, selection].T
+        filled += count
+        if depth_range is not None and _past_window(first_depth, last_depth, depth_range):
+            break
+    else:
+        if carry.size:
+            return None
+        if first_depth is None and depth_range is None:
+            return None
+    return _trim(index, data, filled)
+
+
+def parse_data_section(data_bytes, n_columns, null_value, wrapped, dtype, rows=None, start=0, end=None,
+                       depth_range=None, expected_rows=None):
+    """Tokenize the ~A block (bytes ``start:end`` of the content) with numpy; see parse_chunks."""
+    return parse_chunks(_row_chunks(data_bytes, start, end), n_columns, null_value, wrapped, dtype, rows,
+                        depth_range, expected_rows)
+
+
+def _line_at(data_bytes, offset, start, end):
+    """Return (offset, depth) of the first data line starting at or after ``offset``; depth is None past the end."""
+    line = offset if offset <= start else data_bytes.find(b"\n", offset - 1, end) + 1
+    if line <= 0 or line >= end:
+        return end, None
+    match = FIRST_LINE.match(data_bytes, line, end)  # también saltea líneas en blanco
+    if not match.group(1):
+        return end, None
+    return match.start(1), float(match.group(1).split()[0])
+
+
+def seek_depth_window(data_bytes, las, depth_range, start, end):
+    """Return the byte range ``start:end`` of ~A that holds the depth window (whole lines, sin WRAP).
+
+    La profundidad es monótona, así que se busca por bisección sobre los
+    offsets leyendo una sola línea por sonda. Con paso regular (STEP del ~W
+    distinto de 0) STRT/STOP dan el offset aproximado y la bisección arranca
+    en un entorno de ±2 % del bloque alrededor; si el entorno no encierra el
+    límite se usa el bloque entero. El resultado es exacto a nivel de línea.
+    """
+    first = _line_at(data_bytes, start, start, end)[1]
+    tail = end
+    while tail > start and data_bytes[tail - 1:tail].isspace():
+        tail -= 1
+    last = _line_at(data_bytes, max(start, data_bytes.rfind(b"\n", start, tail) + 1), start, end)[1]
+    if first is None or last is None:
+        return start, end
+    descending = last < first
+    sampling = regular_step(las)
+
+    def first_line_where(predicate, depth):
+        lo, hi = start, end
+        if sampling is not None:
+            strt, stop, _ = sampling
+            guess = start + int((depth - strt) / (stop - strt) * (end - start))
+            margin = (end - start) // 50 + 4096
+            left = min(end, max(start, guess - margin))
+            right = min(end, max(start, guess + margin))
+            left_depth = _line_at(data_bytes, left, start, end)[1]
+            right_depth = _line_at(data_bytes, right, start, end)[1]
+            left_ok = left == start or (left_depth is not None and not predicate(left_depth))
+            if left_ok and (right_depth is None or predicate(right_depth)):
+                lo, hi = left, right
+        while lo < hi:
+            middle = (lo + hi) // 2
+            value = _line_at(data_bytes, middle, start, end)[1]
+            if value is None or predicate(value):
+                hi = middle
+            else:
+                lo = middle + 1
+        return _line_at(data_bytes, lo, start, end)[0]
+
+    top, bottom = depth_range
+    # Primera línea que ya entró en la ventana y primera que ya la pasó, en el sentido del archivo
+    if descending:
+        begin = start if bottom is None else first_line_where(lambda depth: depth <= bottom, bottom)
+        finish = end if top is None else first_line_where(lambda depth: depth < top, top)
+    else:
+        begin = start if top is None else first_line_where(lambda depth: depth >= top, top)
+        finish = end if bottom is None else first_line_where(lambda depth: depth > bottom, bottom)
+    return begin, max(begin, finish)
+
+
+def _null_value(las):
+    try:
+        return float(las.well.NULL.value) if "NULL" in las.well else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_wrapped(las):
+    return "WRAP" in las.version and str(las.version.WRAP.value).strip().upper() == "YES"
+
+
+def _ordered_range(depth_range):
+    # El intervalo se acepta en cualquier orden
+    if depth_range is not None and None not in depth_range and depth_range[0] > depth_range[1]:
+        return depth_range[1], depth_range[0]
+    return depth_range
+
+
+def _data_start(content_bytes):
+    # Offset del primer byte después de la línea ~A; None si todavía no apareció
+    match = DATA_SECTION.search(content_bytes)
+    if match is None:
+        return None
+    line_end = content_bytes.find(b"\n", match.end())
+    return len(content_bytes) if line_end < 0 else line_end + 1
+
+
+def _first_line(content_bytes, line_end):
+    # Primera línea de datos completa (con su fin de línea), para estimar los bytes por registro
+    match = FIRST_LINE.match(content_bytes, line_end)
+    newline = content_bytes.find(b"\n", match.end(1))
+    if not match.group(1) or newline < 0:
+        return None
+    return content_bytes[content_bytes.rfind(b"\n", 0, match.start(1)) + 1:newline + 1]
+
+
+def _read_head(stream):
+    # Lee hasta la primera línea de datos inclusive: alcanza para el encabezado y para planear la carga
+    head = bytearray()
+    while True:
+        block = stream.read(HEAD_BYTES)
+        head += block
+        line_end = _data_start(head)
+        if not block or (line_end is not None and _first_line(head, line_end) is not None):
+            return bytes(head)
+
+
+def read_header(content_bytes, path=None):
+    """Parse the header (everything up to the ~A line) with lasio; return (las, offset of the first data byte)."""
+    import lasio
+
+    line_end = _data_start(content_bytes)
+    if line_end is None:
+        raise LasLoadError("El archivo no tiene sección ~A.", path=path)
+    with span("decode"):
+        header_str = decode_las_bytes(content_bytes[:line_end])
+    with span("lasio.read"):
+        las = lasio.read(io.StringIO(header_str), ignore_data=True)
+    return las, line_end
+
+
+def _parse_or_none(parse, path, *args):
+    # Sin memoria para los arreglos (p. ej. un ~A mucho más grande que el presupuesto): se prueba con lasio
+    try:
+        return parse(*args)
+    except MemoryError as e:
+        logger.warning("Sin memoria para tokenizar el ~A; se lee con lasio",
+                       extra={"fields": {"archivo": path or "-", "error": str(e)}})
+        return None
+
+
+def _lasio_fallback(content_bytes, dtype, mnemonics, depth_range):
+    # Forma inesperada: lasio completo, con sus correcciones y políticas de nulos
+    import lasio
+
+    with span("lasio.read"):
+        las = lasio.read(io.StringIO(decode_las_bytes(content_bytes[:])))
+    return ColumnarWell.from_lasio(las, dtype, mnemonics, depth_range)
+
+
+def _finish(well, plan, content_bytes, path, depth_range):
+    log_plan(plan, well, content_bytes, path)
+    if depth_range is not None and well.index.size == 0:
+        raise LasLoadError(f"El intervalo {_format_range(depth_range)} no tiene muestras en el archivo.", path=path)
+    return well
+
+
+def load_buffer(content_bytes, path=None, dtype=None, mnemonics=None, depth_range=None, header=None, plan=None):
+    """Build a ColumnarWell from the whole LAS content (bytes or a read-only mmap).
+
+    Con ``mnemonics`` solo se guardan (y después se controlan) esas curvas;
+    el encabezado conserva todas para detectar servicios y registrar la
+    entrega. Con ``depth_range`` (tope, base) solo se tokenizan las líneas
+    del intervalo (ver seek_depth_window) y se guardan sus filas. ``header``
+    y ``plan`` vienen de load_columnar_path; si faltan se calculan acá.
+    """
+    dtype = dtype or get_load_settings()["dtype"]
+    depth_range = _ordered_range(depth_range)
+    las, line_end = header or read_header(content_bytes, path)
+    rows = projected_rows(las, mnemonics)
+    if plan is None:
+        plan = plan_load(las, _first_line(content_bytes, line_end), line_end, len(content_bytes), False, len(rows),
+                         dtype, depth_range, dict(get_load_settings(), storage="memory"))
+    wrapped = _is_wrapped(las)
+    start, end = line_end, len(content_bytes)
+    try:
+        if depth_range is not None and not wrapped:
+            with span("depth_seek"):
+                start, end = seek_depth_window(content_bytes, las, depth_range, start, end)
+    except ValueError:
+        start, end = line_end, len(content_bytes)  # primer campo no numérico: se filtra al tokenizar
+    with span("tokenize"):
+        parsed = _parse_or_none(parse_data_section, path, content_bytes, len(las.curves), _null_value(las), wrapped,
+                                dtype, rows, start, end, depth_range, expected_rows(plan, end - start))
+    if parsed is None:
+        well = _lasio_fallback(content_bytes, dtype, mnemonics, depth_range)
+    else:
+        well = ColumnarWell(las, *parsed, rows=rows, depth_range=depth_range)
+    return _finish(well, plan, len(content_bytes), path, depth_range)
+
+
+def _load_stream(fileobj, stream, head, header, path, dtype, mnemonics, depth_range, plan):
+    # Motor "stream": se tokeniza a medida que se descomprime, sin juntar el contenido entero
+    las, line_end = header
+    rows = projected_rows(las, mnemonics)
+    progress = {"bytes": len(head)}
+    with span("tokenize"):
+        parsed = _parse_or_none(parse_chunks, path, _stream_chunks(stream, head[line_end:], progress),
+                                len(las.curves), _null_value(las), _is_wrapped(las), dtype, rows, depth_range,
+                                expected_rows(plan))
+    if parsed is None:
+        fileobj.seek(0)
+        with span("read"):
+            content_bytes = read_las_bytes(fileobj)
+        progress["bytes"] = len(content_bytes)
+        well = _lasio_fallback(content_bytes, dtype, mnemonics, depth_range)
+    else:
+        well = ColumnarWell(las, *parsed, rows=rows, depth_range=depth_range)
+    return _finish(well, plan, progress["bytes"], path, depth_range)
+
+
+def _format_range(depth_range):
+    top, bottom = depth_range
+    return f"{'-' if top is None else top}–{'-' if bottom is None else bottom}"
+
+
+def load_columnar(fileobj, path=None, dtype=None, mnemonics=None, depth_range=None):
+    """Read a LAS file object (plain, .gz or .zst) into a ColumnarWell in memory (see load_buffer)."""
+    try:
+        with span("read"):
+            content_bytes = read_las_bytes(fileobj)
+        return load_buffer(content_bytes, path, dtype, mnemonics, depth_range)
+    except (LasLoadError, LasProcessError):
+        raise
+    except Exception as e:
+        raise LasLoadError(str(e), path=path) from e
+
+
+def load_columnar_path(path, dtype=None, mnemonics=None, depth_range=None):
+    """Read a LAS file from disk into a ColumnarWell with the engine chosen by load_plan.plan_load.
+
+    Se lee solo el encabezado y la primera línea de datos; con eso se estima
+    la matriz y se decide si el archivo se lee entero, se mapea o se
+    descomprime y tokeniza por partes.
+    """
+    dtype = dtype or get_load_settings()["dtype"]
+    depth_range = _ordered_range(depth_range)
+    try:
+        with open(path, 'rb') as f:
+            compressed = detect_codec(f.read(4)) is not None
+            f.seek(0)
+            with span("read"):
+                stream = open_decompressed(f)
+                head = _read_head(stream)
+            header = read_header(head, path)
+            las, line_end = header
+            plan = plan_load(las, _first_line(head, line_end), line_end, os.fstat(f.fileno()).st_size, compressed,
+                             len(projected_rows(las, mnemonics)), dtype, depth_range)
+            if plan["engine"] == "mmap":
+                try:
+                    with span("read"):
+                        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    plan["engine"] = "stream"  # sistemas de archivos que no admiten mmap
+                else:
+                    try:
+                        return load_buffer(mapped, path, dtype, mnemonics, depth_range, header, plan)
+                    finally:
+                        mapped.close()
+            if plan["engine"] == "stream":
+                return _load_stream(f, stream, head, header, path, dtype, mnemonics, depth_range, plan)
+            f.seek(0)
+            with span("read"):
+                content_bytes = read_las_bytes(f)
+            return load_buffer(content_bytes, path, dtype, mnemonics, depth_range, header, plan)
+    except (LasLoadError, LasProcessError):
+        raise
+    except Exception as e:  # OSError del open/mmap incluido
+        raise LasLoadError(str(e), path=path) from e
+
+
+def load_full_las(path):
+    """Return the LASFile of ``path`` with the data of every curve (deliveries after a projected analysis)."""
+    try:
+        return load_columnar_path(path, dtype=np.float64).las
+    except NonNumericCurveError:
+        from qc_core import load_las_path
+
+        return load_las_path(path)[0]
+
+
+def curve_stats(values):
+    """Return (min, max, mean) ignoring NaN, as Python floats; None for an all-null curve."""
+    present = values[~np.isnan(values)]
+    if present.size == 0:
+        return None, None, None
+    return float(present.min()), float(present.max()), float(present.mean(dtype=np.float64))
+
+
+def iter_process_columnar(well):
+    """Same events as qc_core.iter_process_las, computed on the columnar arrays."""
+    well_info_df = well_info_frame(well.las)
+    yield "header", well_info_df
+
+    alias = get_alias()
+    tests = get_tests()
+    tests['Each'].append(lambda curve: has_si_units(curve))
+    mapped = {}
+
+    table_data = []
+    stats_data = []
+    sampler = Sampler(logger)
+    for curve in well.curves:
+        alias_name = curve_alias(curve.mnemonic, alias)
+        curve_tests = tests.get(alias_name, tests['Each'])
+        with span("qc_tests"):
+            column_tests = [mapped.setdefault(id(test), column_test(test, well)) for test in curve_tests]
+            test_results = apply_tests(curve, column_tests, curve.mnemonic)
+        with span("curve_stats"):
+            min_value, max_value, mean_value = curve_stats(curve.values)
+        row, stats_row = curve_rows(curve.mnemonic, alias_name, test_results, min_value, max_value, mean_value)
+        table_data.append(row)
+        stats_data.append(stats_row)
+        sampler.debug("curva controlada", {"curva": curve.mnemonic, "alias": alias_name, "muestras": curve.values.size})
+        yield curve_event(row, stats_row)
+
+    results_df, stats_df = result_frames(table_data, stats_data)
+    yield "done", (results_df, well_info_df, stats_df, well)
+
+
+def process_columnar(well, event_callback=None):
+    """Return (results_df, well_info_df, stats_df, well); ``event_callback`` gets the partial events."""
+    for event in iter_process_columnar(well):
+        if event[0] == "done":
+            return event[1]
+        if event_callback:
+            event_callback(event)
+
+
+def analyze_file(path, selected_services=None, **kwargs):
+    """qc_core.analyze_file on the columnar engine (fast pipeline of benchmarks/golden_corpus.py)."""
+    from qc_core import analyze_file
+
+    return analyze_file(path, selected_services, engine="columnar", **kwargs)
@@ -0,0 +1,158 @@
+# compression.py
+import gzip
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional, gzip siempre está disponible
+    zstandard = None
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+CODEC_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+DEFAULT_LEVELS = {
+    "gzip": 6,
+    "zstd": 9,
+}
+
+CHUNK_SIZE = 4 * 1024 * 1024  # 4 MB por bloque comprimido
+
+
+def available_codecs():
+    """Return the compression codecs usable in this environment."""
+    codecs = ["gzip"]
+    if zstandard is not None:
+        codecs.append("zstd")
+    return codecs
+
+
+def default_threads():
+    """Return the number of compression threads to use by default."""
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def detect_codec(head):
+    """Return the codec name for the given leading bytes, or None if uncompressed."""
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def compressed_name(file_name, codec):
+    """Return the archive file name for a compressed copy."""
+    return file_name + CODEC_SUFFIXES[codec]
+
+
+def strip_codec_suffix(file_name):
+    """Return the file name without a known compression suffix."""
+    for suffix in CODEC_SUFFIXES.values():
+        if file_name.lower().endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+def open_decompressed(fileobj):
+    """Wrap a binary file object so that reads return decompressed LAS bytes."""
+    if not (hasattr(fileobj, 'seekable') and fileobj.seekable()):
+        fileobj = io.BytesIO(fileobj.read())
+
+    start = fileobj.tell()
+    head = fileobj.read(4)
+    fileobj.seek(start)
+
+    codec = detect_codec(head)
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("El archivo está comprimido con zstd pero el paquete 'zstandard' no está instalado.")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+    return fileobj
+
+
+def read_las_bytes(fileobj, chunk_size=CHUNK_SIZE):
+    """Read the whole LAS content from a possibly compressed file object."""
+    stream = open_decompressed(fileobj)
+    if stream is fileobj:
+        return fileobj.read()
+
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+    return bytes(buffer)
+
+
+def _gzip_member(chunk, level):
+    # Cada bloque es un miembro gzip independiente; zlib libera el GIL.
+    return gzip.compress(chunk, compresslevel=level, mtime=0)
+
+
+def _compress_gzip(src, dst, level, threads, chunk_size, progress_callback):
+    bytes_in = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = []
+        while True:
+            chunk = src.read(chunk_size)
+            if chunk:
+                pending.append((len(chunk), executor.submit(_gzip_member, chunk, level)))
+            # Mantener acotada la cantidad de bloques en vuelo
+            while pending and (len(pending) > threads * 2 or not chunk):
+                size, future = pending.pop(0)
+                dst.write(future.result())
+                bytes_in += size
+                if progress_callback:
+                    progress_callback(bytes_in)
+            if not chunk:
+                break
+    return bytes_in
+
+
+def _compress_zstd(src, dst, level, threads, chunk_size, progress_callback):
+    compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+    bytes_in = 0
+    with compressor.stream_writer(dst, closefd=False) as writer:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            writer.write(chunk)
+            bytes_in += len(chunk)
+            if progress_callback:
+                progress_callback(bytes_in)
+    return bytes_in
+
+
+def compress_stream(src, dst, codec="gzip", level=None, threads=None, chunk_size=CHUNK_SIZE, progress_callback=None):
+    """Compress a binary stream into another using several threads; return bytes read."""
+    if codec not in CODEC_SUFFIXES:
+        raise ValueError(f"Códec de compresión desconocido: {codec}")
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("El paquete 'zstandard' no está instalado; use 'gzip'.")
+
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    threads = default_threads() if not threads else threads
+
+    if codec == "gzip":
+        return _compress_gzip(src, dst, level, threads, chunk_size, progress_callback)
+    return _compress_zstd(src, dst, level, threads, chunk_size, progress_callback)
+
+
+def compress_file(src_path, dst_path, codec="gzip", level=None, threads=None, progress_callback=None):
+    """Write a compressed copy of a (possibly already compressed) LAS file."""
+    with open(src_path, 'rb') as raw, open(dst_path, 'wb') as dst:
+        src = open_decompressed(raw)
+        bytes_in = compress_stream(src, dst, codec=codec, level=level, threads=threads,
+                                   progress_callback=progress_callback)
+    return bytes_in, os.path.getsize(dst_path)
@@ -1,7 +1,9 @@
-import welly.quality as qty
+import os
 
 def get_tests():
     """Return a dictionary of tests to be applied to curves."""
+    import welly.quality as qty  # welly es pesado: solo se importa al pedir las pruebas
+
     tests = {
         "All": [qty.no_similarities],
         "Each": [qty.no_monotonic, qty.no_flat],
@@ -151,3 +153,129 @@ def validate_header(well_info_df):
         for item in non_compliant_variables
     ]
     return header_compliance, missing_descriptions
+
+def get_delivery_settings():
+    """Return the settings used to deliver verified files to the shared drive."""
+    delivery_settings = {
+        "root": os.environ.get("LAS_QTY_VERIFIED_ROOT", "Y:/Workover/STAFF/Wireline/Perfil_verificado"),
+        # Copia comprimida opcional: "none", "gzip" o "zstd"
+        "compression": os.environ.get("LAS_QTY_COMPRESSION", "none"),
+        "compression_level": None,
+        "compression_threads": None,
+        # Si es False solo se guarda la copia comprimida
+        "keep_original": os.environ.get("LAS_QTY_KEEP_ORIGINAL", "1") != "0",
+        # Sidecar columnar junto al archivo entregado: "none", "arrow" o "parquet"
+        "sidecar": os.environ.get("LAS_QTY_SIDECAR", "arrow"),
+        # Catálogo SQLite local del archivo verificado
+        "catalog": os.environ.get("LAS_QTY_CATALOG", "catalog.sqlite"),
+        # Hilos para el re-escaneo de integridad: el cuello de botella es la red, no la CPU
+        "integrity_threads": int(os.environ.get("LAS_QTY_INTEGRITY_THREADS", "32")),
+    }
+    return delivery_settings
+
+def get_watch_settings():
+    """Return the settings of the inbox watch daemon."""
+    inboxes = os.environ.get("LAS_QTY_INBOXES", "")
+    watch_settings = {
+        # Carpetas de entrada de las contratistas, separadas por os.pathsep
+        "inboxes": [path for path in inboxes.split(os.pathsep) if path],
+        # Segundos sin cambios de tamaño/mtime para considerar terminado un archivo
+        "stable_seconds": float(os.environ.get("LAS_QTY_STABLE_SECONDS", "5")),
+        "poll_interval": float(os.environ.get("LAS_QTY_POLL_INTERVAL", "2")),
+        "workers": int(os.environ.get("LAS_QTY_WORKERS", "0")) or None,
+        # Máximo de archivos en análisis a la vez; el resto espera en la carpeta
+        "max_in_flight": int(os.environ.get("LAS_QTY_MAX_IN_FLIGHT", "0")) or None,
+        "deliver": os.environ.get("LAS_QTY_WATCH_DELIVER", "1") != "0",
+    }
+    return watch_settings
+
+def get_service_settings():
+    """Return the settings of the local HTTP QC service."""
+    service_settings = {
+        "host": os.environ.get("LAS_QTY_HOST", "127.0.0.1"),
+        "port": int(os.environ.get("LAS_QTY_PORT", "8765")),
+        # Procesos de análisis (0 = uno por núcleo)
+        "workers": int(os.environ.get("LAS_QTY_SERVICE_WORKERS", "0")) or None,
+        # Trabajos aceptados a la vez (en cola + en análisis); el resto recibe 503
+        "max_jobs": int(os.environ.get("LAS_QTY_MAX_JOBS", "64")),
+        "spool_dir": os.environ.get("LAS_QTY_SPOOL_DIR", os.path.join("tempDir", "service")),
+        # Segundos que se conservan los resultados terminados
+        "job_ttl": float(os.environ.get("LAS_QTY_JOB_TTL", "3600")),
+        "max_upload_bytes": int(os.environ.get("LAS_QTY_MAX_UPLOAD_MB", "512")) * 1024 * 1024,
+    }
+    return service_settings
+
+def get_pool_settings():
+    """Return the settings of the server-wide analysis pool used by the Streamlit app."""
+    pool_settings = {
+        # Análisis simultáneos para todas las sesiones (0 = uno por núcleo)
+        "workers": int(os.environ.get("LAS_QTY_POOL_WORKERS", "0")) or None,
+        # Análisis en espera; por encima se rechaza con "servidor ocupado"
+        "max_queue": int(os.environ.get("LAS_QTY_POOL_QUEUE", "32")),
+        # Segundos sin noticias de la sesión para cancelar su análisis
+        "heartbeat_timeout": float(os.environ.get("LAS_QTY_POOL_HEARTBEAT", "30")),
+    }
+    return pool_settings
+
+def get_upload_settings():
+    """Return the settings of the content-addressed upload store of the Streamlit app."""
+    upload_settings = {
+        "root": os.environ.get("LAS_QTY_UPLOAD_DIR", os.path.join("tempDir", "uploads")),
+        # Espacio máximo de subidas; se borran primero las menos usadas sin sesiones activas
+        "quota_bytes": int(os.environ.get("LAS_QTY_UPLOAD_QUOTA_MB", "2048")) * 1024 * 1024,
+        # Resultados de análisis guardados para reutilizar con subidas idénticas
+        "result_entries": int(os.environ.get("LAS_QTY_RESULT_CACHE", "32")),
+    }
+    return upload_settings
+
+def get_metrics_settings():
+    """Return the metrics log path (JSON lines per analysis) and the Prometheus exporter address."""
+    metrics_settings = {
+        "log_path": os.environ.get("LAS_QTY_METRICS_LOG", os.path.join("tempDir", "metrics.jsonl")),
+        # Puerto local del exportador de Prometheus de la app (0 = deshabilitado)
+        "host": os.environ.get("LAS_QTY_METRICS_HOST", "127.0.0.1"),
+        "port": int(os.environ.get("LAS_QTY_METRICS_PORT", "9465")),
+    }
+    return metrics_settings
+
+def get_profiling_settings():
+    """Return the on-demand profiling settings (cProfile + tracemalloc per analysis)."""
+    profiling_settings = {
+        # Valor inicial del interruptor de la página de métricas; sin perfilar no hay costo alguno
+        "enabled": os.environ.get("LAS_QTY_PROFILE", "0") == "1",
+        "root": os.environ.get("LAS_QTY_PROFILE_DIR", os.path.join("tempDir", "profiles")),
+        # Sitios de asignación y funciones listados en los informes de texto
+        "top": int(os.environ.get("LAS_QTY_PROFILE_TOP", "40")),
+    }
+    return profiling_settings
+
+def get_logging_settings():
+    """Return the central logging settings (see logging_setup.py)."""
+    logging_settings = {
+        "level": os.environ.get("LAS_QTY_LOG_LEVEL", "INFO").upper(),
+        # Archivo de log; vacío = salida de error estándar
+        "file": os.environ.get("LAS_QTY_LOG_FILE", ""),
+        # lasio registra una línea DEBUG por cada ítem de encabezado: se mantiene en WARNING salvo pedido explícito
+        "third_party_level": os.environ.get("LAS_QTY_THIRD_PARTY_LOG_LEVEL", "WARNING").upper(),
+        "third_party": ["lasio", "welly", "matplotlib", "PIL", "urllib3", "fsspec"],
+        # En los bucles por curva o por bloque se registra 1 de cada N eventos
+        "sample_every": int(os.environ.get("LAS_QTY_LOG_SAMPLE_EVERY", "100")),
+    }
+    return logging_settings
+
+def get_load_settings():
+    """Return the LAS loading engine used by the app and the batch mode (see columnar.py)."""
+    load_settings = {
+        # "columnar": arreglo compacto y pruebas vectorizadas; "lasio": lasio + welly completos (referencia)
+        "engine": os.environ.get("LAS_QTY_ENGINE", "columnar"),
+        # Tipo de los datos de las curvas en memoria; la profundidad siempre queda en float64.
+        # "float32" reduce a la mitad la memoria del control; las entregas releen siempre en float64
+        "dtype": os.environ.get("LAS_QTY_DTYPE", "float64"),
+        # Valor inicial de "Detalle completo": sin él solo se leen y controlan las curvas de los servicios elegidos
+        "full_detail": os.environ.get("LAS_QTY_FULL_DETAIL", "0") == "1",
+        # Lectura del archivo: "auto" la elige load_plan.plan_load; "memory", "mmap" o "stream" la fuerzan
+        "storage": os.environ.get("LAS_QTY_STORAGE", "auto"),
+        # Contenido + arreglos de un archivo que se admiten en memoria; por encima se mapea o se lee por partes
+        "memory_budget_bytes": int(os.environ.get("LAS_QTY_MEMORY_BUDGET_MB", "64")) * 1024 * 1024,
+    }
+    return load_settings
@@ -0,0 +1,94 @@
+# delivery.py
+import os
+from compression import compress_stream, compressed_name, open_decompressed, strip_codec_suffix
+from config import get_delivery_settings
+from sidecar import available_formats, write_sidecar
+
+
+def destination_folder_for(fld_value, well_name, root=None):
+    """Return the verified-archive folder for a field and well."""
+    root = root or get_delivery_settings()["root"]
+    return os.path.join(root, fld_value, well_name)
+
+
+def delivery_file_name(well_name, date, detected_services, company_name):
+    """Return the archive file name ``{well}_{date}_{services}-{company}.las``."""
+    detected_services_str = "-".join(detected_services) if detected_services else "NoServices"
+    new_file_name = f"{well_name}_{date}_{detected_services_str}-{company_name}.las"
+    return new_file_name.replace(" ", "_")  # Reemplazar espacios por guiones bajos
+
+
+def _source_progress(raw, total_size, progress_callback):
+    # Fracción leída del archivo de origen: con una carga comprimida, los bytes descomprimidos superan total_size
+    def report(bytes_in=None):
+        if progress_callback:
+            progress_callback(min(raw.tell() / total_size, 1.0) if total_size else 1.0)
+    return report
+
+
+def _copy_stream(src, dst, report, chunk_size=1024 * 1024):
+    copied_size = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        dst.write(chunk)
+        copied_size += len(chunk)
+        report()
+    return copied_size
+
+
+def deliver_file(file_path, file_name, fld_value, well_name, compression=None, keep_original=None,
+                 compression_level=None, compression_threads=None, progress_callback=None, root=None,
+                 las=None, sidecar=None):
+    """Copy a verified LAS file to the archive, optionally with a compressed copy.
+
+    Returns the list of written destination paths. ``progress_callback`` receives
+    the fraction of the source already processed for each written copy. When the
+    parsed ``las`` is given, a columnar sidecar is also written next to the copy.
+    """
+    settings = get_delivery_settings()
+    compression = settings["compression"] if compression is None else compression
+    keep_original = settings["keep_original"] if keep_original is None else keep_original
+    compression = None if compression in (None, "", "none") else compression
+    if compression_level is None:
+        compression_level = settings["compression_level"]
+    if compression_threads is None:
+        compression_threads = settings["compression_threads"]
+    sidecar = settings["sidecar"] if sidecar is None else sidecar
+    sidecar = None if sidecar in ("", "none") or sidecar not in available_formats() else sidecar
+
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo de origen no existe: {file_path}")
+    if not os.access(file_path, os.R_OK):
+        raise PermissionError(f"No se puede leer el archivo de origen: {file_path}")
+    if not keep_original and not compression:
+        raise ValueError("Debe conservarse el original o elegirse un códec de compresión.")
+
+    destination_folder = destination_folder_for(fld_value, well_name, root)
+    os.makedirs(destination_folder, exist_ok=True)
+    file_name = strip_codec_suffix(file_name)
+    total_size = os.path.getsize(file_path)
+
+    written = []
+    if keep_original:
+        destination_path = os.path.join(destination_folder, file_name)
+        # El original siempre se archiva sin comprimir, aunque la carga viniera comprimida
+        with open(file_path, 'rb') as raw, open(destination_path, 'wb') as dst:
+            src = open_decompressed(raw)
+            _copy_stream(src, dst, _source_progress(raw, total_size, progress_callback))
+        written.append(destination_path)
+
+    if compression:
+        destination_path = os.path.join(destination_folder, compressed_name(file_name, compression))
+        with open(file_path, 'rb') as raw, open(destination_path, 'wb') as dst:
+            src = open_decompressed(raw)
+            compress_stream(src, dst, codec=compression, level=compression_level,
+                            threads=compression_threads,
+                            progress_callback=_source_progress(raw, total_size, progress_callback))
+        written.append(destination_path)
+
+    if sidecar and las is not None:
+        written.append(write_sidecar(las, written[0], fmt=sidecar))
+
+    return written
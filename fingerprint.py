@@ -0,0 +1,273 @@
+# fingerprint.py
+"""Per-curve fingerprints to detect re-sent runs across the verified archive.
+
+Cada curva se cuantiza (precisión relativa ~0.1 %, nulos descartados) y se
+resume con un hash exacto de los valores cuantizados más una firma MinHash
+sobre tripletas consecutivas. Las firmas se indexan por bandas LSH en el
+catálogo, así que buscar duplicados cercanos solo consulta los buckets que
+coinciden en vez de comparar contra todo el archivo:
+
+    python fingerprint.py index [--db CATALOGO]     # completa las huellas faltantes
+    python fingerprint.py check ARCHIVO.las [--db CATALOGO]
+"""
+import argparse
+import hashlib
+import sys
+
+import numpy as np
+
+from catalog import connect
+from qc_core import QcError, load_las_path
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE = 3
+MANTISSA_STEPS = 1024
+
+CURVE_SIMILARITY = 0.8  # Jaccard estimada mínima para considerar dos curvas iguales
+FILE_MATCH_FRACTION = 0.5  # fracción de curvas coincidentes para marcar un archivo como duplicado
+
+_PRIME = np.uint64(4294967311)  # primo > 2**32: a*x + b entra en uint64
+_rng = np.random.RandomState(20240712)
+_PERM_A = _rng.randint(1, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F), np.uint64(0x165667B19E3779F9))
+
+FINGERPRINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS curve_fingerprints (
+    path TEXT NOT NULL,
+    mnemonic TEXT NOT NULL,
+    samples INTEGER,
+    qhash TEXT,
+    signature BLOB,
+    PRIMARY KEY (path, mnemonic)
+);
+CREATE TABLE IF NOT EXISTS curve_lsh (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mnemonic TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_curve_fingerprints_qhash ON curve_fingerprints(qhash);
+CREATE INDEX IF NOT EXISTS idx_curve_lsh_bucket ON curve_lsh(band, bucket);
+CREATE INDEX IF NOT EXISTS idx_curve_lsh_path ON curve_lsh(path);
+"""
+
+
+def quantize(values):
+    """Round values to a relative precision that survives re-formatting and drop nulls."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    mantissa, exponent = np.frexp(values)
+    # + 0.0 unifica -0.0 y 0.0 antes de hashear los bits
+    return np.ldexp(np.round(mantissa * MANTISSA_STEPS) / MANTISSA_STEPS, exponent) + 0.0
+
+
+def _shingle_hashes(quantized):
+    words = quantized.view(np.uint64)
+    if len(words) < SHINGLE:
+        return np.unique(words & np.uint64(0xFFFFFFFF))
+    mixed = words[:-2] * _MIX[0] ^ words[1:-1] * _MIX[1] ^ words[2:] * _MIX[2]
+    folded = (mixed ^ (mixed >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+    return np.unique(folded)
+
+
+def minhash(quantized, chunk_size=8192):
+    """Return the MinHash signature (uint64[NUM_PERM]) of a quantized curve."""
+    shingles = _shingle_hashes(quantized)
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(shingles), chunk_size):
+        block = shingles[start:start + chunk_size, None]
+        hashed = (block * _PERM_A + _PERM_B) % _PRIME
+        signature = np.minimum(signature, hashed.min(axis=0))
+    return signature
+
+
+def band_buckets(signature):
+    """Return the LSH bucket key of each band of a signature."""
+    bands = signature.reshape(BANDS, ROWS_PER_BAND)
+    return [hashlib.blake2b(band.tobytes(), digest_size=8).hexdigest() for band in bands]
+
+
+def curve_fingerprint(values):
+    """Return (samples, quantized hash, MinHash signature) or None for empty/flat curves."""
+    quantized = quantize(values)
+    if len(quantized) < SHINGLE or np.all(quantized == quantized[0]):
+        return None
+    qhash = hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+    return len(quantized), qhash, minhash(quantized)
+
+
+def compute_fingerprints(las):
+    """Return {mnemonic: (samples, qhash, signature)} for the data curves of a LAS file."""
+    fingerprints = {}
+    # La curva índice (profundidad) no distingue corridas: se omite
+    for curve in las.curves[1:]:
+        fingerprint = curve_fingerprint(curve.data)
+        if fingerprint is not None:
+            fingerprints[curve.mnemonic] = fingerprint
+    return fingerprints
+
+
+def ensure_schema(conn):
+    """Create the fingerprint tables in the catalog if needed."""
+    conn.executescript(FINGERPRINT_SCHEMA)
+
+
+def store_fingerprints(conn, path, fingerprints):
+    """Replace the stored fingerprints and LSH buckets of an archived file."""
+    ensure_schema(conn)
+    with conn:
+        conn.execute("DELETE FROM curve_fingerprints WHERE path = ?", (path,))
+        conn.execute("DELETE FROM curve_lsh WHERE path = ?", (path,))
+        conn.executemany(
+            "INSERT INTO curve_fingerprints (path, mnemonic, samples, qhash, signature) VALUES (?, ?, ?, ?, ?)",
+            [(path, mnemonic, samples, qhash, signature.tobytes())
+             for mnemonic, (samples, qhash, signature) in fingerprints.items()],
+        )
+        conn.executemany(
+            "INSERT INTO curve_lsh (band, bucket, path, mnemonic) VALUES (?, ?, ?, ?)",
+            [(band, bucket, path, mnemonic)
+             for mnemonic, (_, _, signature) in fingerprints.items()
+             for band, bucket in enumerate(band_buckets(signature))],
+        )
+
+
+def forget_fingerprints(conn, paths=None):
+    """Drop the fingerprints and LSH buckets of ``paths``; by default of every file no longer in the catalog."""
+    ensure_schema(conn)
+    with conn:
+        if paths is None:
+            conn.execute("DELETE FROM curve_fingerprints WHERE path NOT IN (SELECT path FROM las_files)")
+            conn.execute("DELETE FROM curve_lsh WHERE path NOT IN (SELECT path FROM las_files)")
+        else:
+            rows = [(path,) for path in paths]
+            conn.executemany("DELETE FROM curve_fingerprints WHERE path = ?", rows)
+            conn.executemany("DELETE FROM curve_lsh WHERE path = ?", rows)
+
+
+def find_duplicates(conn, fingerprints, exclude_path=None):
+    """Return archived files whose curves match most of the given fingerprints.
+
+    Cada resultado es un dict con la ruta, las curvas coincidentes, cuántas son
+    idénticas tras la cuantización y la similitud media estimada.
+    """
+    ensure_schema(conn)
+    if not fingerprints:
+        return []
+
+    # Candidatos: curvas con el mismo hash exacto o que comparten algún bucket LSH
+    candidates = {}
+    for mnemonic, (_, qhash, signature) in fingerprints.items():
+        rows = conn.execute("SELECT path, mnemonic FROM curve_fingerprints WHERE qhash = ?", (qhash,)).fetchall()
+        for band, bucket in enumerate(band_buckets(signature)):
+            rows += conn.execute("SELECT path, mnemonic FROM curve_lsh WHERE band = ? AND bucket = ?",
+                                 (band, bucket)).fetchall()
+        for path, other in rows:
+            if path != exclude_path:
+                candidates.setdefault(path, {}).setdefault(mnemonic, set()).add(other)
+
+    duplicates = []
+    for path, pairs in candidates.items():
+        if len(pairs) < FILE_MATCH_FRACTION * len(fingerprints):
+            continue
+        stored = {row[0]: (row[1], np.frombuffer(row[2], dtype=np.uint64))
+                  for row in conn.execute("SELECT mnemonic, qhash, signature FROM curve_fingerprints WHERE path = ?",
+                                          (path,))}
+        matches = []
+        exact = 0
+        for mnemonic, others in pairs.items():
+            _, qhash, signature = fingerprints[mnemonic]
+            best = max((float(np.mean(signature == stored[other][1])) for other in others if other in stored), default=0.0)
+            if best >= CURVE_SIMILARITY:
+                matches.append((mnemonic, best))
+                exact += any(stored[other][0] == qhash for other in others if other in stored)
+        if len(matches) >= FILE_MATCH_FRACTION * len(fingerprints):
+            duplicates.append({
+                "path": path,
+                "matched_curves": [mnemonic for mnemonic, _ in matches],
+                "exact_curves": exact,
+                "total_curves": len(fingerprints),
+                "similarity": sum(similarity for _, similarity in matches) / len(matches),
+            })
+    return sorted(duplicates, key=lambda duplicate: (-len(duplicate["matched_curves"]), -duplicate["similarity"]))
+
+
+def check_duplicates(las, db_path=None, fingerprints=None):
+    """Compute (or reuse) the fingerprints of a LAS file and look for duplicates in the archive."""
+    fingerprints = compute_fingerprints(las) if fingerprints is None else fingerprints
+    conn = connect(db_path)
+    try:
+        return find_duplicates(conn, fingerprints)
+    finally:
+        conn.close()
+
+
+def index_missing(db_path=None, progress_callback=None):
+    """Fingerprint cataloged files that have no stored fingerprints yet."""
+    conn = connect(db_path)
+    ensure_schema(conn)
+    indexed = 0
+    errors = []
+    try:
+        # Una sola copia por corrida: se prefiere el .las frente a sus copias comprimidas
+        paths = [row[0] for row in conn.execute(
+            """
+            SELECT MIN(path) FROM las_files
+            WHERE checksum IS NOT NULL
+            GROUP BY well, srvc, date, curves
+            HAVING SUM(path IN (SELECT path FROM curve_fingerprints)) = 0
+            """)]
+        for path in paths:
+            try:
+                las, _ = load_las_path(path)
+                store_fingerprints(conn, path, compute_fingerprints(las))
+                indexed += 1
+            except Exception as e:
+                errors.append((path, str(e)))
+            if progress_callback:
+                progress_callback(path)
+    finally:
+        conn.close()
+    return indexed, errors
+
+
+def format_duplicates(duplicates):
+    """Return one human-readable line per duplicate candidate."""
+    return [
+        f"{duplicate['path']}: {len(duplicate['matched_curves'])}/{duplicate['total_curves']} curvas coinciden "
+        f"({duplicate['exact_curves']} idénticas, similitud media {duplicate['similarity']:.0%})"
+        for duplicate in duplicates
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Huellas de curvas para detectar entregas duplicadas.")
+    parser.add_argument('--db', default=None, help="Ruta del catálogo SQLite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('index', help="Calcular las huellas faltantes del catálogo")
+    check_parser = subparsers.add_parser('check', help="Buscar duplicados de un archivo LAS")
+    check_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'index':
+        indexed, errors = index_missing(args.db)
+        print(f"{indexed} archivos con huellas nuevas")
+        for path, error in errors:
+            print(f"ERROR {path}: {error}")
+        return 0
+
+    try:
+        las, _ = load_las_path(args.path)
+    except QcError as e:
+        print(f"ERROR {args.path}: {e}")
+        return 2
+    duplicates = check_duplicates(las, args.db)
+    for line in format_duplicates(duplicates) or ["Sin duplicados en el archivo verificado."]:
+        print(line)
+    return 1 if duplicates else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
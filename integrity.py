@@ -0,0 +1,176 @@
+# integrity.py
+"""Incremental integrity rescan of the verified archive.
+
+Compara cada archivo contra la referencia (ruta, tamaño, mtime, SHA-256)
+guardada en el catálogo. Los archivos sin cambios de tamaño/mtime se omiten;
+los demás se vuelven a calcular en paralelo con un pool de hilos dimensionado
+para E/S de red y se informan las diferencias:
+
+    python integrity.py [--root RAIZ] [--db CATALOGO] [--threads 32] [--verify-all | --sample 0.05]
+                        [--accept] [--report informe.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from catalog import UPSERT_BASELINE, connect, file_checksum, is_las_path
+from config import get_delivery_settings
+
+
+def _scan_dir(path):
+    files = []
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False) and is_las_path(entry.name):
+                # En Windows/SMB scandir ya trae el stat del listado: no hay viaje extra por archivo
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+    return files, subdirs
+
+
+def scan_archive(root, executor):
+    """List (path, size, mtime) for every LAS-like file, listing directories in parallel."""
+    files = []
+    errors = []
+    pending = {executor.submit(_scan_dir, root): root}
+    while pending:
+        for future in as_completed(list(pending)):
+            path = pending.pop(future)
+            try:
+                dir_files, subdirs = future.result()
+            except OSError as e:
+                errors.append((path, str(e)))
+                continue
+            files.extend(dir_files)
+            for subdir in subdirs:
+                pending[executor.submit(_scan_dir, subdir)] = subdir
+    return files, errors
+
+
+def rescan_integrity(root=None, db_path=None, threads=None, verify_all=False, sample=0.0, accept=False,
+                     progress_callback=None):
+    """Verify the archive against the stored baseline and return a report dict."""
+    settings = get_delivery_settings()
+    root = root or settings["root"]
+    threads = threads or settings["integrity_threads"]
+    started = time.perf_counter()
+
+    conn = connect(db_path)
+    report = {
+        "root": root, "scanned": 0, "skipped": 0, "hashed": 0, "hashed_bytes": 0,
+        "ok": [], "touched": [], "mismatched": [], "new": [], "missing": [], "errors": [],
+    }
+    try:
+        baseline = {row["path"]: (row["size"], row["mtime"], row["checksum"])
+                    for row in conn.execute("SELECT path, size, mtime, checksum FROM archive_integrity "
+                                            "WHERE path LIKE ?", (os.path.join(root, '') + '%',))}
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            files, scan_errors = scan_archive(root, executor)
+            report["errors"].extend(scan_errors)
+            report["scanned"] = len(files)
+
+            to_hash = []
+            for path, size, mtime in files:
+                reference = baseline.get(path)
+                unchanged = reference is not None and reference[:2] == (size, mtime)
+                if unchanged and not verify_all and not (sample and random.random() < sample):
+                    report["skipped"] += 1
+                    continue
+                to_hash.append((path, size, mtime))
+
+            futures = {executor.submit(file_checksum, path): (path, size, mtime) for path, size, mtime in to_hash}
+            updates = []
+            for future in as_completed(futures):
+                path, size, mtime = futures[future]
+                try:
+                    checksum = future.result()
+                except OSError as e:
+                    report["errors"].append((path, str(e)))
+                    continue
+                report["hashed"] += 1
+                report["hashed_bytes"] += size
+                if progress_callback:
+                    progress_callback(report["hashed"], len(to_hash))
+
+                reference = baseline.get(path)
+                if reference is None:
+                    report["new"].append(path)
+                    updates.append((path, size, mtime, checksum))
+                elif reference[2] == checksum:
+                    # Mismo contenido: solo cambió la fecha (o fue una verificación completa)
+                    report["touched" if reference[:2] != (size, mtime) else "ok"].append(path)
+                    updates.append((path, size, mtime, checksum))
+                else:
+                    report["mismatched"].append({"path": path, "expected": reference[2], "actual": checksum,
+                                                 "size": [reference[0], size], "mtime": [reference[1], mtime]})
+                    if accept:
+                        updates.append((path, size, mtime, checksum))
+
+        seen = {path for path, _, _ in files}
+        report["missing"] = sorted(path for path in baseline if path not in seen)
+
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with conn:
+            conn.executemany(UPSERT_BASELINE,
+                             [(path, size, mtime, checksum, now, now) for path, size, mtime, checksum in updates])
+            if accept and report["missing"]:
+                conn.executemany("DELETE FROM archive_integrity WHERE path = ?",
+                                 [(path,) for path in report["missing"]])
+    finally:
+        conn.close()
+
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+def format_report(report):
+    """Return a human-readable summary of an integrity report."""
+    mb = report["hashed_bytes"] / 1e6
+    seconds = report["seconds"] or 1e-9
+    lines = [
+        f"{report['scanned']} archivos en {report['root']}: {report['skipped']} sin cambios, "
+        f"{report['hashed']} verificados ({mb:.1f} MB, {mb / seconds:.1f} MB/s) en {seconds:.1f} s",
+        f"OK: {len(report['ok'])}  Solo fecha: {len(report['touched'])}  Nuevos: {len(report['new'])}  "
+        f"Faltantes: {len(report['missing'])}  DIFERENCIAS: {len(report['mismatched'])}  Errores: {len(report['errors'])}",
+    ]
+    for mismatch in report["mismatched"]:
+        lines.append(f"DIFERENCIA {mismatch['path']}: esperado {mismatch['expected'][:12]}…, "
+                     f"actual {mismatch['actual'][:12]}…")
+    for path in report["missing"]:
+        lines.append(f"FALTANTE {path}")
+    for path, error in report["errors"]:
+        lines.append(f"ERROR {path}: {error}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-escaneo incremental de integridad del archivo verificado.")
+    parser.add_argument('--root', default=None)
+    parser.add_argument('--db', default=None, help="Ruta del catálogo SQLite")
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--verify-all', action='store_true', help="Recalcular también los archivos sin cambios")
+    parser.add_argument('--sample', type=float, default=0.0,
+                        help="Fracción de archivos sin cambios a recalcular al azar (0-1)")
+    parser.add_argument('--accept', action='store_true', help="Aceptar los cambios como nueva referencia")
+    parser.add_argument('--report', default=None, help="Guardar el informe completo en JSON")
+    args = parser.parse_args(argv)
+
+    report = rescan_integrity(args.root, args.db, args.threads, args.verify_all, args.sample, args.accept)
+    print(format_report(report))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if report["mismatched"] or report["missing"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
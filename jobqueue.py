@@ -0,0 +1,370 @@
+# jobqueue.py
+"""Persistent QC job queue in the catalog database, with worker leases and priorities.
+
+Cada archivo de una campaña es una fila de ``qc_jobs`` que avanza por
+pending → parsing → qc → (delivering) → delivered | done | failed. Un trabajador
+toma el trabajo pendiente de mayor prioridad con una concesión (lease) que
+renueva mientras lo procesa; si el proceso muere, la concesión vence (o se
+libera enseguida si el dueño era un proceso de esta máquina que ya no existe)
+y otro trabajador lo retoma. Volver a encolar una campaña no repite lo que ya
+terminó, así que una corrida interrumpida se reanuda donde quedó.
+
+Un trabajador atiende su campaña y, antes, cualquier trabajo de otra campaña
+con mayor prioridad: un archivo encolado con PRIORITY_INTERACTIVE pasa delante
+de una revalidación masiva en curso.
+
+    python jobqueue.py enqueue CAMPAÑA ENTRADA [ENTRADA ...] [--interactive | --priority N]
+    python jobqueue.py work [--campaign CAMPAÑA] [--workers N]
+    python jobqueue.py status [--campaign CAMPAÑA]
+    python jobqueue.py retry CAMPAÑA
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from catalog import connect, file_checksum
+
+PRIORITY_INTERACTIVE = 100
+PRIORITY_WATCH = 50
+PRIORITY_BATCH = 0
+
+ACTIVE_STATES = ('parsing', 'qc', 'delivering')
+FINAL_STATES = ('delivered', 'done', 'failed')
+STAGE_STATES = {"qc": "qc", "deliver": "delivering"}
+
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS qc_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign TEXT NOT NULL,
+    path TEXT NOT NULL,
+    checksum TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    options TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    report TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    UNIQUE (campaign, path)
+);
+CREATE INDEX IF NOT EXISTS idx_qc_jobs_claim ON qc_jobs(state, priority DESC, id);
+CREATE INDEX IF NOT EXISTS idx_qc_jobs_checksum ON qc_jobs(checksum);
+"""
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def ensure_schema(conn):
+    """Create the job table in the catalog if needed."""
+    conn.executescript(JOB_SCHEMA)
+
+
+def worker_id():
+    """Return the lease owner name of this process (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def input_checksums(paths):
+    """Return {path: SHA-256} for the readable files among ``paths`` (unreadable ones fail when processed)."""
+    checksums = {}
+    for path in paths:
+        try:
+            checksums[path] = file_checksum(path)
+        except OSError:
+            pass
+    return checksums
+
+
+def enqueue(conn, paths, campaign, priority=PRIORITY_BATCH, options=None, checksums=None, retry_failed=False):
+    """Add files to a campaign; finished files stay finished unless their checksum changed.
+
+    Devuelve la cantidad de trabajos que quedaron pendientes.
+    """
+    ensure_schema(conn)
+    options_json = json.dumps(options or {}, ensure_ascii=False)
+    now = _now_iso()
+    checksums = checksums or {}
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO qc_jobs (campaign, path, checksum, priority, options, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(campaign, path) DO UPDATE SET
+                priority = MAX(qc_jobs.priority, excluded.priority),
+                options = excluded.options,
+                state = CASE WHEN (qc_jobs.checksum IS NOT NULL AND excluded.checksum IS NOT qc_jobs.checksum)
+                               OR (qc_jobs.state = 'failed' AND ?) THEN 'pending' ELSE qc_jobs.state END,
+                attempts = CASE WHEN (qc_jobs.checksum IS NOT NULL AND excluded.checksum IS NOT qc_jobs.checksum)
+                                  OR (qc_jobs.state = 'failed' AND ?) THEN 0 ELSE qc_jobs.attempts END,
+                checksum = excluded.checksum,
+                updated_at = excluded.updated_at
+            """,
+            [(campaign, path, checksums.get(path), priority, options_json, now, now, retry_failed, retry_failed)
+             for path in paths],
+        )
+    return conn.execute("SELECT COUNT(*) FROM qc_jobs WHERE campaign = ? AND state = 'pending'",
+                        (campaign,)).fetchone()[0]
+
+
+def release_dead_owners(conn):
+    """Expire at once the leases held by processes of this host that no longer exist."""
+    ensure_schema(conn)
+    host = socket.gethostname()
+    placeholders = ", ".join("?" * len(ACTIVE_STATES))
+    dead = []
+    for (owner,) in conn.execute(f"SELECT DISTINCT lease_owner FROM qc_jobs WHERE state IN ({placeholders})",
+                                 ACTIVE_STATES):
+        owner_host, _, pid = (owner or '').rpartition(':')
+        if owner_host != host or not pid.isdigit():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            dead.append(owner)
+        except OSError:
+            pass  # existe pero es de otro usuario
+    if dead:
+        with conn:
+            conn.executemany("UPDATE qc_jobs SET lease_expires = 0 WHERE lease_owner = ?",
+                             [(owner,) for owner in dead])
+    return len(dead)
+
+
+def claim(conn, owner, campaign=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """Lease the next job (highest priority first) and return it as a dict, or None.
+
+    Con ``campaign`` se toman los trabajos de esa campaña y, mientras le queden
+    pendientes, los de otras con mayor prioridad; sin ella, cualquiera.
+    """
+    now = time.time()
+    placeholders = ", ".join("?" * len(ACTIVE_STATES))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Concesiones vencidas: se reintentan o, agotados los intentos, fallan
+        conn.execute(
+            f"""
+            UPDATE qc_jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = CASE WHEN attempts >= ? THEN 'Concesión vencida tras ' || attempts || ' intentos'
+                        ELSE error END,
+                lease_owner = NULL, lease_expires = NULL
+            WHERE state IN ({placeholders}) AND lease_expires < ?
+            """,
+            (max_attempts, max_attempts, *ACTIVE_STATES, now),
+        )
+        if campaign is None:
+            row = conn.execute("SELECT * FROM qc_jobs WHERE state = 'pending' ORDER BY priority DESC, id LIMIT 1"
+                               ).fetchone()
+        else:
+            row = conn.execute(
+                """
+                SELECT * FROM qc_jobs WHERE state = 'pending' AND (campaign = ? OR priority > COALESCE(
+                    (SELECT MAX(priority) FROM qc_jobs WHERE campaign = ? AND state = 'pending'), 1e9))
+                ORDER BY priority DESC, id LIMIT 1
+                """,
+                (campaign, campaign),
+            ).fetchone()
+        if row is not None:
+            conn.execute(
+                """
+                UPDATE qc_jobs SET state = 'parsing', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+                """,
+                (owner, now + lease_seconds, _now_iso(), row["id"]),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if row is None:
+        return None
+    job = dict(row)
+    job["options"] = json.loads(job["options"] or '{}')
+    return job
+
+
+def renew(conn, owner, job_ids, lease_seconds=LEASE_SECONDS):
+    """Extend the leases this owner holds on the given jobs."""
+    if job_ids:
+        with conn:
+            conn.executemany("UPDATE qc_jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+                             [(time.time() + lease_seconds, job_id, owner) for job_id in job_ids])
+
+
+def finish(conn, job_id, owner, row):
+    """Store the report of a job and move it to delivered, done or failed."""
+    state = "failed" if row.get("error") else ("delivered" if row.get("delivered") else "done")
+    with conn:
+        conn.execute(
+            """
+            UPDATE qc_jobs SET state = ?, error = ?, report = ?, lease_owner = NULL, lease_expires = NULL,
+                updated_at = ?
+            WHERE id = ? AND lease_owner = ?
+            """,
+            (state, row.get("error"), json.dumps(row, ensure_ascii=False, default=str), _now_iso(), job_id, owner),
+        )
+    return state
+
+
+class _StageReporter:
+    """Record the stage of a running job from the worker process."""
+
+    def __init__(self, db_path, job_id, owner, lease_seconds):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+
+    def __call__(self, stage):
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE qc_jobs SET state = ?, lease_expires = ?, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                    (STAGE_STATES.get(stage, stage), time.time() + self.lease_seconds, _now_iso(), self.job_id,
+                     self.owner),
+                )
+        finally:
+            conn.close()
+
+
+def run_job(job, db_path=None, lease_seconds=LEASE_SECONDS):
+    """Run one claimed job (in a worker process) and return its report row."""
+    from batch import analyze_path
+
+    options = job["options"]
+    reporter = _StageReporter(db_path, job["id"], job["lease_owner"], lease_seconds)
+    depth_range = options.get("depth_range")
+    return analyze_path(job["path"], options.get("selected_services"), options.get("deliver", False),
+                        options.get("delivery_options"), stage_callback=reporter,
+                        depth_range=tuple(depth_range) if depth_range else None,
+                        full_detail=options.get("full_detail"))
+
+
+def drain(campaign=None, workers=None, db_path=None, lease_seconds=LEASE_SECONDS, progress_callback=None):
+    """Process pending jobs in a process pool until the campaign (or the whole queue) is empty.
+
+    Devuelve un dict estado → cantidad de los trabajos procesados en esta corrida.
+    """
+    workers = workers or os.cpu_count() or 1
+    owner = worker_id()
+    conn = connect(db_path)
+    ensure_schema(conn)
+    release_dead_owners(conn)
+    in_flight = {}
+    counts = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                while len(in_flight) < workers * 2:
+                    job = claim(conn, owner, campaign, lease_seconds)
+                    if job is None:
+                        break
+                    job["lease_owner"] = owner
+                    in_flight[executor.submit(run_job, job, db_path, lease_seconds)] = job
+                if not in_flight:
+                    break
+                done, _ = wait(list(in_flight), timeout=lease_seconds / 3, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        row = future.result()
+                    except Exception as e:
+                        row = {"file": job["path"], "error": str(e)}
+                    state = finish(conn, job["id"], owner, row)
+                    counts[state] = counts.get(state, 0) + 1
+                    if progress_callback:
+                        progress_callback(job, state, row)
+                renew(conn, owner, [job["id"] for job in in_flight.values()], lease_seconds)
+    finally:
+        conn.close()
+    return counts
+
+
+def campaign_status(conn, campaign=None):
+    """Return {state: count} for a campaign or the whole queue."""
+    ensure_schema(conn)
+    if campaign is None:
+        rows = conn.execute("SELECT state, COUNT(*) FROM qc_jobs GROUP BY state")
+    else:
+        rows = conn.execute("SELECT state, COUNT(*) FROM qc_jobs WHERE campaign = ? GROUP BY state", (campaign,))
+    return {state: count for state, count in rows}
+
+
+def campaign_report(conn, campaign):
+    """Return the stored report rows of a campaign as a DataFrame (one row per file)."""
+    ensure_schema(conn)
+    rows = []
+    for path, state, report in conn.execute("SELECT path, state, report FROM qc_jobs WHERE campaign = ? ORDER BY path",
+                                            (campaign,)):
+        row = json.loads(report) if report else {"file": path}
+        row["job_state"] = state
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cola persistente de trabajos de control de calidad.")
+    parser.add_argument('--db', default=None, help="Ruta del catálogo SQLite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    enqueue_parser = subparsers.add_parser('enqueue', help="Encolar archivos en una campaña")
+    enqueue_parser.add_argument('campaign')
+    enqueue_parser.add_argument('inputs', nargs='+')
+    enqueue_parser.add_argument('--priority', type=int, default=PRIORITY_BATCH)
+    enqueue_parser.add_argument('--interactive', dest='priority', action='store_const', const=PRIORITY_INTERACTIVE,
+                                help="Pasar delante de las campañas masivas y del buzón")
+    enqueue_parser.add_argument('--services', nargs='*', default=None)
+    enqueue_parser.add_argument('--deliver', action='store_true')
+    work_parser = subparsers.add_parser('work', help="Procesar trabajos pendientes")
+    work_parser.add_argument('--campaign', default=None)
+    work_parser.add_argument('--workers', type=int, default=None)
+    status_parser = subparsers.add_parser('status', help="Trabajos por estado")
+    status_parser.add_argument('--campaign', default=None)
+    retry_parser = subparsers.add_parser('retry', help="Volver a encolar los fallidos de una campaña")
+    retry_parser.add_argument('campaign')
+    args = parser.parse_args(argv)
+
+    if args.command == 'work':
+        counts = drain(args.campaign, args.workers, args.db,
+                       progress_callback=lambda job, state, row: print(f"{state.upper():<9} {job['path']}"))
+        print(", ".join(f"{count} {state}" for state, count in sorted(counts.items())) or "Cola vacía.")
+        return 0
+
+    conn = connect(args.db)
+    try:
+        if args.command == 'enqueue':
+            from batch import collect_inputs
+            options = {"selected_services": args.services, "deliver": args.deliver}
+            files = collect_inputs(args.inputs)
+            pending = enqueue(conn, files, args.campaign, args.priority, options, input_checksums(files))
+            print(f"{pending} trabajos pendientes en {args.campaign}")
+        elif args.command == 'retry':
+            with conn:
+                retried = conn.execute("UPDATE qc_jobs SET state = 'pending', attempts = 0, error = NULL "
+                                       "WHERE campaign = ? AND state = 'failed'", (args.campaign,)).rowcount
+            print(f"{retried} trabajos vueltos a encolar")
+        else:
+            for state, count in sorted(campaign_status(conn, args.campaign).items()):
+                print(f"{state:<11} {count:>6}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
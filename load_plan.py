@@ -0,0 +1,176 @@
+# load_plan.py
+"""Shape-aware load planning: expected matrix size from the LAS header and the engine that fits the budget.
+
+Antes de leer el ~A el encabezado ya dice el tamaño de la matriz: STRT,
+STOP y STEP del ~W dan la cantidad de muestras (paso regular) y el ~C la
+cantidad de curvas. plan_load estima con eso filas × columnas, los bytes de
+los arreglos y del contenido, y elige cómo leer el archivo:
+
+    memory  se lee (y descomprime) entero en memoria: comprimidos cuyo
+            contenido más los arreglos entran en el presupuesto
+    mmap    se mapea sin leerlo: el contenido queda en el caché de páginas y
+            con un intervalo de profundidad solo se tocan sus páginas (todos
+            los archivos sin comprimir; igual de rápido que leerlos)
+    stream  se descomprime por partes y se tokeniza al vuelo: nunca está el
+            contenido entero en memoria, solo un trozo más los arreglos
+            (comprimidos que no entran en el presupuesto o sin tamaño
+            conocido, y archivos que no se pueden mapear)
+
+Los arreglos de salida se reservan con el tamaño estimado, nunca más allá
+del presupuesto (columnar.py los agranda si no alcanzan y los recorta al
+final). Un encabezado que anuncia más que el presupuesto no se usa para
+reservar: un STEP mal cargado no debe pedir decenas de GiB. log_plan
+registra el plan con lo estimado y lo real.
+"""
+import logging
+import math
+
+import numpy as np
+
+from config import get_load_settings
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("memory", "mmap", "stream")
+# Si las filas según STRT/STOP/STEP y según los bytes del ~A difieren más que esto, el encabezado no es confiable
+HEADER_TOLERANCE = 0.1
+
+
+def header_float(section, mnemonic):
+    try:
+        return float(section[mnemonic].value) if mnemonic in section else None
+    except (TypeError, ValueError):
+        return None
+
+
+def regular_step(las):
+    """Return (STRT, STOP, STEP) from ~W when the sampling is regular, else None."""
+    strt, stop, step = (header_float(las.well, mnemonic) for mnemonic in ("STRT", "STOP", "STEP"))
+    if None in (strt, stop, step) or step == 0 or stop == strt:
+        return None
+    return strt, stop, step
+
+
+def header_rows(las, depth_range=None):
+    """Number of samples the ~W announces (inside the ordered ``depth_range``); None without a regular step."""
+    sampling = regular_step(las)
+    if sampling is None:
+        return None
+    strt, stop, step = sampling
+    top, bottom = sorted((strt, stop))
+    low, high = top, bottom
+    if depth_range is not None:
+        window_top, window_bottom = depth_range
+        low = low if window_top is None else max(low, window_top)
+        high = high if window_bottom is None else min(high, window_bottom)
+    # Puntos de la grilla top + k·|STEP| dentro de [low, high]
+    first = math.ceil((low - top) / abs(step) - 1e-6)
+    last = math.floor((high - top) / abs(step) + 1e-6)
+    return max(0, last - first + 1)
+
+
+def row_bytes(first_line, n_columns):
+    """Approximate bytes of one ~A record from the first data line (``first_line`` includes its newline)."""
+    tokens = len(first_line.split())
+    if not tokens:
+        return None
+    return len(first_line) * n_columns / tokens
+
+
+def rows_for_bytes(n_bytes, bytes_per_row):
+    return None if not bytes_per_row else math.ceil(n_bytes / bytes_per_row)
+
+
+def plan_load(las, first_line, header_bytes, file_bytes, compressed, width, dtype, depth_range=None, settings=None):
+    """Estimate the shape and memory of a load and choose its engine; return the plan dict.
+
+    ``first_line`` es la primera línea de datos (con su fin de línea),
+    ``header_bytes`` los bytes hasta el inicio del ~A, ``file_bytes`` el
+    tamaño en disco y ``width`` la cantidad de curvas que se guardan.
+    """
+    settings = settings or get_load_settings()
+    n_columns = len(las.curves)
+    bytes_per_row = row_bytes(first_line, n_columns) if first_line else None
+    announced = header_rows(las)
+    # Sin comprimir se conoce el tamaño exacto del ~A: sirve para validar lo que dice el encabezado
+    counted = None if compressed else rows_for_bytes(file_bytes - header_bytes, bytes_per_row)
+    if announced is not None and (counted is None or abs(announced - counted) <= HEADER_TOLERANCE * counted):
+        rows, rows_from, total_rows = header_rows(las, depth_range), "header", announced
+    else:
+        rows, rows_from, total_rows = counted, "bytes" if counted is not None else None, counted
+
+    if not compressed:
+        content_bytes = file_bytes
+    elif total_rows is not None and bytes_per_row:
+        content_bytes = header_bytes + int(total_rows * bytes_per_row)
+    else:
+        content_bytes = None  # comprimido y sin paso regular: no se sabe cuánto ocupa descomprimido
+    array_row_bytes = 8 + width * np.dtype(dtype).itemsize
+    array_bytes = None if rows is None else rows * array_row_bytes
+    working_bytes = None if content_bytes is None else content_bytes + (array_bytes or 0)
+    budget = settings["memory_budget_bytes"]
+
+    engine = settings["storage"]
+    if engine not in ENGINES:
+        if not compressed:
+            engine = "mmap"
+        else:
+            engine = "memory" if working_bytes is not None and working_bytes <= budget else "stream"
+    elif engine == "mmap" and compressed:
+        engine = "stream"
+    return {
+        "engine": engine,
+        "compressed": compressed,
+        "rows": rows,
+        "rows_from": rows_from,
+        "columns": width + 1,
+        "bytes_per_row": bytes_per_row,
+        "array_row_bytes": array_row_bytes,
+        "array_bytes": array_bytes,
+        "content_bytes": content_bytes,
+        "budget_bytes": budget,
+        "over_budget": array_bytes is not None and array_bytes > budget,
+    }
+
+
+def expected_rows(plan, n_bytes=None):
+    """Rows to preallocate for ``n_bytes`` of ~A (after the depth seek), capped at the memory budget.
+
+    Se usa la cantidad del encabezado cuando es confiable y entra en el
+    presupuesto; si no, la que dan los bytes del ~A, y sin ellos no se
+    reserva nada (los arreglos crecen a medida que se llenan).
+    """
+    if plan["rows_from"] == "header" and not plan["over_budget"]:
+        rows = plan["rows"]
+    elif n_bytes is not None:
+        rows = rows_for_bytes(n_bytes, plan["bytes_per_row"])
+    else:
+        rows = None if plan["over_budget"] else plan["rows"]
+    if rows is None:
+        return None
+    return min(rows, plan["budget_bytes"] // plan["array_row_bytes"])
+
+
+def _mb(n_bytes):
+    return "-" if n_bytes is None else f"{n_bytes / (1024 * 1024):.1f}"
+
+
+def log_plan(plan, well, content_bytes=None, path=None):
+    """Log the chosen plan with the estimated and the actual size of the load."""
+    fields = {
+        "archivo": path or "-",
+        "motor": plan["engine"],
+        "filas_est": plan["rows"] if plan["rows"] is not None else "-",
+        "filas": well.index.size,
+        "según": plan["rows_from"] or "-",
+        "columnas": plan["columns"],
+        "arreglos_mb_est": _mb(plan["array_bytes"]),
+        "arreglos_mb": _mb(well.nbytes),
+        "contenido_mb_est": _mb(plan["content_bytes"]),
+        "contenido_mb": _mb(content_bytes),
+        "presupuesto_mb": _mb(plan["budget_bytes"]),
+    }
+    if plan["over_budget"]:
+        logger.warning("Los arreglos estimados superan el presupuesto de memoria", extra={"fields": fields})
+    else:
+        logger.info("plan de carga", extra={"fields": fields})
@@ -0,0 +1,124 @@
+# logging_setup.py
+"""Central logging configuration for the app, the service and the command line tools.
+
+- Los loggers de terceros (lasio, welly...) quedan en WARNING: con DEBUG,
+  lasio formatea una línea por cada ítem y comentario del encabezado y el
+  repr del arreglo de cada curva (ver benchmarks/logging_bench.py).
+- Los handlers reales (archivo o consola) corren en un hilo aparte detrás de
+  un QueueHandler: el hilo que registra solo encola el registro. Los
+  procesos hijos (pool de análisis) escriben directo.
+- ``fields`` en ``extra`` se agrega a la línea como clave=valor, y
+  ``Sampler`` deja pasar 1 de cada N eventos de un bucle caliente.
+
+    configure_logging()                   # idempotente; toma config.get_logging_settings()
+    logger.info("entrega", extra={"fields": {"pozo": well, "ms": 12}})
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+from config import get_logging_settings
+
+FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+_lock = threading.Lock()
+_state = {"handler": None, "listener": None, "targets": ()}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Standard text format plus the ``fields`` dict of the record as key=value pairs."""
+
+    def format(self, record):
+        message = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            message += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return message
+
+
+class Sampler:
+    """Let through the first event and then one of every ``every`` events of a hot loop.
+
+    ``Sampler(logger).debug("curva", fields)`` agrega ``sampled=N`` con la
+    cantidad de eventos que representa la línea. Si el nivel está apagado
+    solo cuesta la consulta de isEnabledFor.
+    """
+
+    def __init__(self, logger, every=None):
+        self.logger = logger
+        self.every = max(1, every or get_logging_settings()["sample_every"])
+        self._count = 0
+
+    def log(self, level, message, fields=None):
+        if not self.logger.isEnabledFor(level):
+            return
+        self._count += 1
+        if self._count == 1 or self._count % self.every == 0:
+            fields = dict(fields or {}, sampled=1 if self._count == 1 else self.every)
+            self.logger.log(level, message, extra={"fields": fields}, stacklevel=2)
+
+    def debug(self, message, fields=None):
+        self.log(logging.DEBUG, message, fields)
+
+
+def _target_handlers(log_file):
+    handler = logging.FileHandler(log_file, encoding='utf-8') if log_file else logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter(FORMAT))
+    return (handler,)
+
+
+def _start_listener(targets):
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *targets, respect_handler_level=True)
+    listener.start()
+    return log_queue, listener
+
+
+def _direct_after_fork():
+    # El hilo del listener no sobrevive al fork y los procesos del pool salen con os._exit
+    # (sin atexit): en el hijo se escribe directo en los handlers reales
+    handler = _state["handler"]
+    if handler is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(handler)
+    for target in _state["targets"]:
+        root.addHandler(target)
+    _state.update(handler=None, listener=None)
+
+
+def configure_logging(level=None, log_file=None, third_party_level=None):
+    """Install the queue-based root handler once per process; later calls only adjust the levels."""
+    settings = get_logging_settings()
+    level = level or settings["level"]
+    third_party_level = third_party_level or settings["third_party_level"]
+    root = logging.getLogger()
+    with _lock:
+        if _state["handler"] is None:
+            targets = _target_handlers(log_file if log_file is not None else settings["file"])
+            log_queue, listener = _start_listener(targets)
+            handler = logging.handlers.QueueHandler(log_queue)
+            # Los handlers previos (p. ej. un basicConfig) escribirían cada línea en el hilo que registra
+            for previous in list(root.handlers):
+                root.removeHandler(previous)
+            root.addHandler(handler)
+            _state.update(handler=handler, listener=listener, targets=targets)
+            atexit.register(shutdown_logging)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_direct_after_fork)
+    root.setLevel(level)
+    for name in settings["third_party"]:
+        logging.getLogger(name).setLevel(third_party_level)
+    return root
+
+
+def shutdown_logging():
+    """Flush the queued records and stop the listener thread."""
+    with _lock:
+        listener = _state["listener"]
+        _state["listener"] = None
+    if listener is not None:
+        listener.stop()
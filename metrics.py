@@ -0,0 +1,256 @@
+# metrics.py
+"""In-process metrics registry (counters, gauges, fixed-bucket histograms) with a Prometheus exporter.
+
+Cada proceso tiene su registro (``REGISTRY``). El pipeline registra una
+observación por archivo analizado, no por curva, así que el costo en el
+camino caliente es un bisect y un lock por archivo. Los gauges pueden leerse
+con una función en el momento del scrape (profundidad de la cola del pool).
+
+    start_http_server(port)      # GET /metrics en formato de texto de Prometheus
+    REGISTRY.render()            # el mismo texto, p. ej. para la página de administración
+"""
+import bisect
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+THROUGHPUT_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Se esperaban las etiquetas {labelnames}, se recibió {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self.labelnames, key, (), value) for key, value in self._values.items()]
+
+
+class Gauge:
+    """Value that goes up and down; ``set_function`` reads it lazily at collection time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = ()
+        self._value = 0.0
+        self._function = None
+
+    def set(self, value):
+        self._value = float(value)
+
+    def set_function(self, function):
+        self._function = function
+
+    def value(self):
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception as e:
+                logger.debug("No se pudo leer el gauge %s: %s", self.name, e)
+                return math.nan
+        return self._value
+
+    def samples(self):
+        return [(self.name, (), (), (), self.value())]
+
+
+class Histogram:
+    """Cumulative histogram over fixed bucket upper bounds, like Prometheus'."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = ()
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        self._counts = [0] * len(self.bounds)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """Return (cumulative counts per bound, sum, count)."""
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative = []
+        running = 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside the bucket, as histogram_quantile does."""
+        cumulative, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        lower_bound, lower_count = 0.0, 0
+        for bound, running in zip(self.bounds, cumulative):
+            if running >= rank:
+                if bound == math.inf:
+                    return lower_bound  # por encima del último límite: el mejor dato es ese límite
+                in_bucket = running - lower_count
+                return lower_bound + (bound - lower_bound) * ((rank - lower_count) / in_bucket if in_bucket else 0)
+            lower_bound, lower_count = bound, running
+        return lower_bound
+
+    def samples(self):
+        cumulative, total, count = self.snapshot()
+        samples = [(self.name + "_bucket", (), (), (("le", _format_value(bound)),), running)
+                   for bound, running in zip(self.bounds, cumulative)]
+        samples.append((self.name + "_sum", (), (), (), total))
+        samples.append((self.name + "_count", (), (), (), count))
+        return samples
+
+
+class Registry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"La métrica {name} ya existe con otro tipo")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation):
+        return self._get_or_create(Gauge, name, documentation)
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labelnames, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Métricas del pipeline; se alimentan desde app.py y service.py
+ANALYSES = REGISTRY.counter("las_qty_analyses_total", "Análisis terminados por resultado.", ("outcome",))
+ANALYSIS_SECONDS = REGISTRY.histogram("las_qty_analysis_seconds", "Duración de un análisis, de la cola al resultado.")
+PARSE_MB_PER_SECOND = REGISTRY.histogram("las_qty_parse_mb_per_second", "MB/s de lectura, decodificación y lasio.read.",
+                                         THROUGHPUT_BUCKETS)
+BYTES_ANALYZED = REGISTRY.counter("las_qty_analyzed_bytes_total", "Bytes de archivos LAS analizados.")
+COPY_MB_PER_SECOND = REGISTRY.histogram("las_qty_copy_mb_per_second", "MB/s de la copia al archivo verificado.",
+                                        THROUGHPUT_BUCKETS)
+RESULT_CACHE = REGISTRY.counter("las_qty_result_cache_total", "Consultas al caché de resultados por subida.", ("result",))
+QUEUE_DEPTH = REGISTRY.gauge("las_qty_queue_depth", "Análisis en espera en la cola.")
+RUNNING = REGISTRY.gauge("las_qty_running_analyses", "Análisis en curso.")
+
+
+def observe_analysis(seconds, size_bytes=None, parse_s=None, outcome="ok"):
+    """Record one finished analysis: wall time, bytes and parse throughput (read + decode + lasio.read)."""
+    ANALYSES.inc(outcome=outcome)
+    ANALYSIS_SECONDS.observe(seconds)
+    if size_bytes:
+        BYTES_ANALYZED.inc(size_bytes)
+        if parse_s:
+            PARSE_MB_PER_SECOND.observe(size_bytes / 1e6 / parse_s)
+
+
+def observe_copy(size_bytes, seconds):
+    if size_bytes and seconds > 0:
+        COPY_MB_PER_SECOND.observe(size_bytes / 1e6 / seconds)
+
+
+def cache_hit_rate():
+    hits, misses = RESULT_CACHE.value(result="hit"), RESULT_CACHE.value(result="miss")
+    return hits / (hits + misses) if hits + misses else None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve ``/metrics`` from a daemon thread; return the server (port 0 picks a free one)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,139 @@
+# profiling.py
+"""Opt-in profiling of one analysis with cProfile and tracemalloc, stored by file hash.
+
+Para reproducir fuera de línea un archivo patológicamente lento o que usa
+demasiada memoria. Cada perfil queda en ``<raíz>/<sha256>/``:
+
+    profile.prof      estadísticas de cProfile (pstats, snakeviz...)
+    profile.txt       funciones más costosas por tiempo acumulado y propio
+    allocations.txt   sitios con más memoria asignada y pico de memoria
+    meta.json         archivo, fecha, duración, pico y error si lo hubo
+
+Un perfil nuevo del mismo archivo reemplaza al anterior. Con el perfilado
+deshabilitado el pool ejecuta analyze_upload directamente y nada de esto corre.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import shutil
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from config import get_profiling_settings
+
+ARTIFACTS = ("profile.prof", "profile.txt", "allocations.txt")
+# Marcos propios de la medición que no interesan en el informe de memoria
+_IGNORED_FRAMES = (tracemalloc.__file__, cProfile.__file__, __file__, "<frozen importlib._bootstrap>")
+
+
+def _stats_report(profiler, top):
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out).strip_dirs()
+    out.write("=== Tiempo acumulado ===\n")
+    stats.sort_stats("cumulative").print_stats(top)
+    out.write("\n=== Tiempo propio ===\n")
+    stats.sort_stats("tottime").print_stats(top)
+    return out.getvalue()
+
+
+def _allocation_report(before, after, peak, top):
+    filters = [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FRAMES]
+    before, after = before.filter_traces(filters), after.filter_traces(filters)
+    lines = [f"Pico de memoria durante el análisis: {peak / 1e6:.1f} MB", "",
+             f"=== Asignaciones vivas al terminar (top {top}) ==="]
+    lines += [str(stat) for stat in after.compare_to(before, "lineno")[:top]]
+    lines += ["", "=== Mayor asignación por traza (top 5) ==="]
+    for stat in after.compare_to(before, "traceback")[:5]:
+        lines.append(f"{stat.size_diff / 1e6:.2f} MB en {stat.count_diff} bloques")
+        lines += [f"    {line}" for line in stat.traceback.format(limit=8)]
+    return "\n".join(lines) + "\n"
+
+
+def profile_directory(key, root=None):
+    return os.path.join(root or get_profiling_settings()["root"], key)
+
+
+def profile_call(key, file_name, fn, *args, root=None, top=None, **kwargs):
+    """Run ``fn(*args, **kwargs)`` under cProfile and tracemalloc and store the artifacts under ``key``.
+
+    Devuelve el resultado de ``fn``; si es un dict se le agrega ``"profile"``
+    con los metadatos del perfil. Si ``fn`` falla, el perfil se guarda igual
+    (con el error) y la excepción se propaga.
+    """
+    settings = get_profiling_settings()
+    root = root or settings["root"]
+    top = top or settings["top"]
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(16)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    error = None
+    result = None
+    try:
+        profiler.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+    except Exception as e:
+        error = e
+    elapsed = time.perf_counter() - started
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    if not tracing:
+        tracemalloc.stop()
+
+    directory = profile_directory(key, root)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    profiler.dump_stats(os.path.join(directory, "profile.prof"))
+    with open(os.path.join(directory, "profile.txt"), "w", encoding="utf-8") as f:
+        f.write(_stats_report(profiler, top))
+    with open(os.path.join(directory, "allocations.txt"), "w", encoding="utf-8") as f:
+        f.write(_allocation_report(before, after, peak, top))
+    meta = {
+        "key": key,
+        "file_name": file_name,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "elapsed_s": elapsed,
+        "peak_bytes": peak,
+        "error": str(error) if error is not None else None,
+        "directory": directory,
+    }
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    if error is not None:
+        raise error
+    if isinstance(result, dict):
+        result["profile"] = meta
+    return result
+
+
+def list_profiles(root=None):
+    """Return the metadata of the stored profiles, newest first."""
+    root = root or get_profiling_settings()["root"]
+    profiles = []
+    if not os.path.isdir(root):
+        return profiles
+    for key in os.listdir(root):
+        try:
+            with open(os.path.join(root, key, "meta.json"), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda meta: meta["created"], reverse=True)
+
+
+def read_artifact(meta, name):
+    """Return the bytes of one artifact of a stored profile."""
+    if name not in ARTIFACTS:
+        raise ValueError(f"Artefacto desconocido: {name}")
+    with open(os.path.join(meta["directory"], name), "rb") as f:
+        return f.read()
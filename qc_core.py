@@ -0,0 +1,515 @@
+# qc_core.py
+"""QC core of the LAS pipeline, independent of Streamlit.
+
+La app de Streamlit, el modo por lotes y cualquier otro front end se apoyan
+en este módulo. No llama a la interfaz: los errores se informan con
+excepciones QcError que indican la etapa que falló. welly (y matplotlib, que
+welly arrastra) y bs4 se importan recién al usarse, de modo que importar el
+núcleo es barato para workers y scripts.
+"""
+import io
+import logging
+import os
+import re
+import time
+import zlib
+
+import pandas as pd
+
+from compression import detect_codec, read_las_bytes
+from config import get_alias, get_tests, has_si_units, get_service_groups, validate_header
+from logging_setup import Sampler
+from timing import annotate, span
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ['utf-8', 'latin1', 'windows-1252']
+HEADER_MAX_BYTES = 4 * 1024 * 1024
+DATA_SECTION = re.compile(rb'\n[ \t]*~A', re.IGNORECASE)
+
+
+class QcError(Exception):
+    """Error raised by the QC pipeline; ``stage`` names the step that failed."""
+
+    stage = "qc"
+
+    def __init__(self, message, path=None):
+        super().__init__(message)
+        self.message = message
+        self.path = path
+
+    def to_dict(self):
+        """Return the error as a JSON-serializable dict."""
+        return {"stage": self.stage, "message": self.message, "path": self.path, "type": type(self).__name__}
+
+
+class LasLoadError(QcError):
+    """The file could not be read, decompressed, decoded or parsed by lasio."""
+
+    stage = "load"
+
+
+class LasProcessError(QcError):
+    """The parsed LAS could not be converted into a welly project."""
+
+    stage = "process"
+
+
+def decode_las_bytes(content_bytes):
+    """Decode LAS bytes trying the usual encodings in order."""
+    for encoding in ENCODINGS:
+        try:
+            return content_bytes.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise LasLoadError("No se pudo decodificar el archivo con las codificaciones habituales.")
+
+
+def load_las(fileobj, ignore_data=False, path=None):
+    """Read, decompress, decode and parse a LAS file object; return (las, content_str)."""
+    import lasio
+
+    try:
+        with span("read"):
+            content_bytes = read_las_bytes(fileobj)
+        with span("decode"):
+            content_str = decode_las_bytes(content_bytes)
+        with span("lasio.read"):
+            las = lasio.read(io.StringIO(content_str), ignore_data=ignore_data)
+    except LasLoadError:
+        raise
+    except Exception as e:
+        raise LasLoadError(str(e), path=path) from e
+    return las, content_str
+
+
+def load_las_path(path, ignore_data=False):
+    """Read and parse a LAS file (plain, .gz or .zst) from disk."""
+    try:
+        with open(path, 'rb') as f:
+            return load_las(f, ignore_data=ignore_data, path=path)
+    except OSError as e:
+        raise LasLoadError(str(e), path=path) from e
+
+
+def get_well_identity(las):
+    """Return the WELL, SRVC, DATE and FLD header values used to name and file deliveries."""
+    well_name = las.well.WELL.value if 'WELL' in las.well else "Desconocido"
+    company_name = las.well.SRVC.value if 'SRVC' in las.well else "Desconocida"
+    date = las.well.DATE.value if 'DATE' in las.well else "SinFecha"
+    fld_value = las.well.FLD.value if 'FLD' in las.well else "SinCampo"
+    return well_name, company_name, date, fld_value
+
+
+def detect_services(las, service_groups=None, alias_dict=None):
+    """Return the services whose required curves are all present in the LAS file."""
+    service_groups = service_groups or get_service_groups()
+    alias_dict = alias_dict or get_alias()
+    detected_curves = [curve.mnemonic for curve in las.curves]
+    return [service for service, required_curves in service_groups.items() if all(any(alias in detected_curves for alias in alias_dict.get(curve, [curve])) for curve in required_curves)]
+
+
+def required_mnemonics(selected_services, service_groups=None, alias_dict=None):
+    """Return every mnemonic (with its aliases) that the selected services need."""
+    service_groups = service_groups or get_service_groups()
+    alias_dict = alias_dict or get_alias()
+    return {alias for service in selected_services for curve in service_groups.get(service, [])
+            for alias in alias_dict.get(curve, [curve])}
+
+
+def get_service_compliance(selected_services, detected_services, results_df, service_groups=None, alias_dict=None):
+    """Return whether all selected services were detected and the failure details per missing service."""
+    service_groups = service_groups or get_service_groups()
+    alias_dict = alias_dict or get_alias()
+    invalid_selected_services = [service for service in selected_services if service not in detected_services]
+
+    service_failures = {}
+    for service in invalid_selected_services:
+        missing_curves_details = []
+        for required_curve in service_groups[service]:
+            required_aliases = alias_dict.get(required_curve, [required_curve])
+            found_aliases = results_df[results_df['Alias'].isin(required_aliases)] if not results_df.empty else results_df
+            if found_aliases.empty:
+                missing_curves_details.append(f"{required_curve} (aliases: {', '.join(required_aliases)}) no encontrado")
+            else:
+                failed_tests = found_aliases.apply(lambda row: [test for test in row.index if '🔴' in str(row[test])], axis=1)
+                for index, failed in enumerate(failed_tests):
+                    if failed:
+                        curve_name = found_aliases.iloc[index]['Curve Name']
+                        for test in failed:
+                            missing_curves_details.append(f"{curve_name} - {test}: {found_aliases.iloc[index][test]}")
+        service_failures[service] = missing_curves_details
+
+    return not invalid_selected_services, service_failures
+
+
+def format_stat(value):
+    """Format a curve statistic for the result tables."""
+    return f"{value:.2f}" if isinstance(value, (int, float)) else "N/A"
+
+
+def curve_alias(curve_name, alias):
+    """Return the alias group a curve mnemonic belongs to, or 'N/A'."""
+    matches = [key for key, values in alias.items() if curve_name in values]
+    return matches[0] if matches else 'N/A'
+
+
+def curve_rows(curve_name, alias_name, test_results, min_value, max_value, mean_value):
+    """Return the results row and the stats row of one curve, with None for missing statistics."""
+    mean_value = mean_value if pd.notna(mean_value) else None
+    row = {
+        'Curve Name': curve_name,
+        'Alias': alias_name,
+        'Mean Value': mean_value,
+        'Test Results': ''.join(test_results.values())
+    }
+    stats_row = {
+        'Curve Name': curve_name,
+        'Min Value': min_value if pd.notna(min_value) else None,
+        'Max Value': max_value if pd.notna(max_value) else None,
+        'Mean Value': mean_value
+    }
+    return row, stats_row
+
+
+def curve_event(row, stats_row):
+    """Return the ("curve", row, stats row) event with the statistics already formatted."""
+    return ("curve", dict(row, **{'Mean Value': format_stat(row['Mean Value'])}),
+            {key: format_stat(value) if key != 'Curve Name' else value for key, value in stats_row.items()})
+
+
+def result_frames(table_data, stats_data):
+    """Build the formatted results and stats DataFrames from the per-curve rows."""
+    results_df = pd.DataFrame(table_data, columns=['Curve Name', 'Alias', 'Mean Value', 'Test Results'])
+    results_df['Mean Value'] = results_df['Mean Value'].apply(format_stat)
+
+    stats_df = pd.DataFrame(stats_data, columns=['Curve Name', 'Min Value', 'Max Value', 'Mean Value'])
+    stats_df['Min Value'] = stats_df['Min Value'].apply(format_stat)
+    stats_df['Max Value'] = stats_df['Max Value'].apply(format_stat)
+    stats_df['Mean Value'] = stats_df['Mean Value'].apply(format_stat)
+    return results_df, stats_df
+
+
+def iter_process_las(las, las_content_str):
+    """Process the LAS file step by step, yielding results as soon as they are available.
+
+    Eventos, en orden: ("header", well_info_df) antes de armar el pozo de welly;
+    ("curve", fila de resultados, fila de estadísticas) al terminar cada curva,
+    con los valores ya formateados; y ("done", tupla de process_las).
+    """
+    well_info_df = well_info_frame(las)
+    yield "header", well_info_df
+
+    # welly se importa después del encabezado: su import es la parte más lenta de la primera corrida
+    with span("welly.import"):
+        from welly import Well, Project
+
+    try:
+        # Leer el archivo LAS usando Welly directamente desde el contenido
+        with span("Well.from_lasio"):
+            well = Well.from_lasio(las)
+            project = Project([well])
+    except Exception as e:
+        raise LasProcessError(str(e)) from e
+
+    alias = get_alias()
+    tests = get_tests()
+    tests['Each'].append(lambda curve: has_si_units(curve))
+
+    table_data = []
+    stats_data = []
+    sampler = Sampler(logger)
+    for curve_name, curve in well.data.items():
+        alias_name = curve_alias(curve_name, alias)
+        curve_tests = tests.get(alias_name, tests['Each'])
+        with span("qc_tests"):
+            test_results = apply_tests(curve, curve_tests, curve_name)
+
+        # Convert the curve data to a DataFrame
+        with span("curve_stats"):
+            curve_df = pd.DataFrame(curve.values, columns=[curve_name])
+            curve_stats = curve_df.describe()
+        mean_value = curve_stats.loc['mean'][curve_name] if 'mean' in curve_stats.index else None
+        min_value = curve_stats.loc['min'][curve_name] if 'min' in curve_stats.index else None
+        max_value = curve_stats.loc['max'][curve_name] if 'max' in curve_stats.index else None
+
+        row, stats_row = curve_rows(curve_name, alias_name, test_results, min_value, max_value, mean_value)
+        table_data.append(row)
+        stats_data.append(stats_row)
+        sampler.debug("curva controlada", {"curva": curve_name, "alias": alias_name, "muestras": len(curve.values)})
+        yield curve_event(row, stats_row)
+
+    results_df, stats_df = result_frames(table_data, stats_data)
+
+    yield "done", (results_df, well_info_df, stats_df, project, las_content_str)
+
+
+def process_las(las, las_content_str, event_callback=None):
+    """Process the LAS file to extract information and perform quality checks.
+
+    ``event_callback`` recibe los eventos parciales de iter_process_las.
+    """
+    for event in iter_process_las(las, las_content_str):
+        if event[0] == "done":
+            return event[1]
+        if event_callback:
+            event_callback(event)
+
+
+def well_info_frame(las):
+    """Return the ~Well section as a DataFrame (MNEM, Value, Description, Empty), empty values first."""
+    well_info_data = {"MNEM": [], "Value": [], "Description": [], "Empty": []}
+    for item in las.well:
+        well_info_data["MNEM"].append(item.mnemonic)
+        well_info_data["Value"].append(item.value)
+        well_info_data["Description"].append(item.descr)
+        well_info_data["Empty"].append('Yes' if item.value == '' or item.value is None else 'No')
+    well_info_df = pd.DataFrame(well_info_data)
+    return well_info_df.sort_values(by='Empty', ascending=False)
+
+
+class HeaderPrecheck:
+    """Header-only checks fed chunk by chunk while an upload is being written.
+
+    Acumula los bytes (descomprimiendo gzip/zstd al vuelo) hasta la sección
+    ~A, y en ese momento lee solo el encabezado con lasio y calcula lo que no
+    necesita los datos: identidad del pozo, servicios detectados por las curvas
+    declaradas y cumplimiento del encabezado. ``feed`` devuelve True cuando ya
+    no necesita más bytes.
+    """
+
+    def __init__(self, max_bytes=HEADER_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.result = None
+        self.error = None
+        self.done = False
+        self._buffer = bytearray()
+        self._decompressor = None
+        self._started = False
+
+    def feed(self, chunk):
+        if self.done:
+            return True
+        try:
+            if not self._started:
+                self._started = True
+                self._decompressor = _stream_decompressor(bytes(chunk[:4]))
+            data = self._decompressor.decompress(chunk) if self._decompressor else chunk
+            search_from = max(0, len(self._buffer) - 1)
+            self._buffer += data
+            match = DATA_SECTION.search(self._buffer, search_from)
+            if match:
+                del self._buffer[match.start() + 1:]
+                self._finish()
+            elif len(self._buffer) > self.max_bytes:
+                raise LasLoadError("No se encontró la sección ~A en el encabezado.")
+        except Exception as e:
+            self.error = e if isinstance(e, QcError) else LasLoadError(str(e))
+            self.done = True
+        return self.done
+
+    def _finish(self):
+        import lasio
+
+        header_text = decode_las_bytes(bytes(self._buffer)) + "~A\n"
+        las = lasio.read(io.StringIO(header_text), ignore_data=True)
+        header_ok, missing_header = validate_header(well_info_frame(las))
+        well_name, company_name, date, fld_value = get_well_identity(las)
+        self.result = {
+            "well": str(well_name),
+            "company": str(company_name),
+            "date": str(date),
+            "field": str(fld_value),
+            "curves": [curve.mnemonic for curve in las.curves],
+            "detected_services": detect_services(las),
+            "header_ok": bool(header_ok),
+            "missing_header": missing_header,
+        }
+        self._buffer = bytearray()
+        self.done = True
+
+
+def _stream_decompressor(head):
+    codec = detect_codec(head)
+    if codec == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+
+def apply_tests(curve, tests, curve_name):
+    """Apply quality tests to a curve and return the results."""
+    results = {}
+    for test in tests:
+        test_name = test.__name__.replace('_', ' ').capitalize()
+        try:
+            result = test(curve)
+            if result is True:
+                results[test_name] = f'<span style="color:green;" title="{curve_name} - {test_name}: All tests passed">🟢</span>'
+            elif result is False:
+                results[test_name] = f'<span style="color:orange;" title="{curve_name} - {test_name}: Some tests failed">🟠</span>'
+            else:
+                results[test_name] = f'<span style="color:red;" title="{curve_name} - {test_name}: All tests failed">🔴</span>'
+        except Exception:
+            results[test_name] = f'<span style="color:grey;" title="{curve_name} - {test_name}: No tests ran">⚪</span>'
+    return results
+
+
+def transpose_html_table(html):
+    """Swap rows and columns of the first HTML table."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table')
+
+    rows = table.find_all('tr')
+    num_cols = max(len(row.find_all(['td', 'th'])) for row in rows)
+    new_rows = [[] for _ in range(num_cols)]
+
+    for row in rows:
+        cells = row.find_all(['td', 'th'])
+        for i, cell in enumerate(cells):
+            new_rows[i].append(cell)
+
+    new_table = soup.new_tag('table')
+    for new_row in new_rows:
+        new_tr = soup.new_tag('tr')
+        for cell in new_row:
+            new_tr.append(cell)
+        new_table.append(new_tr)
+
+    table.replace_with(new_table)
+    return str(soup)
+
+
+def add_alias_column_to_html_table(html, alias_dict):
+    """Append an Alias column with the alias detected for each curve."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table')
+
+    header = table.find('tr')
+    alias_header = soup.new_tag('th')
+    alias_header.string = 'Alias'
+    header.append(alias_header)
+
+    rows = table.find_all('tr')[1:]
+    for row in rows:
+        cells = row.find_all('td')
+        curve_name = cells[0].text.strip()
+        detected_alias = 'N/A'
+        for key, values in alias_dict.items():
+            if curve_name in values:
+                detected_alias = key
+                break
+        alias_cell = soup.new_tag('td')
+        alias_cell.string = detected_alias
+        row.append(alias_cell)
+
+    return str(soup)
+
+
+def quality_table_html(project, alias=None):
+    """Render welly's curve quality table with an Alias column, transposed for display."""
+    import welly.quality as q
+
+    tests = {
+        'All': [q.no_similarities],
+        'Each': [q.no_gaps, q.no_monotonic, q.no_flat],
+        'GR': [q.all_positive],
+        'Sonic': [q.all_positive, q.all_between(50, 200)],
+    }
+    alias = alias or get_alias()
+    with span("curve_table_html"):
+        quality_html = project.curve_table_html(tests=tests, alias=alias)
+
+    with span("bs4_transforms"):
+        quality_html_with_alias = add_alias_column_to_html_table(quality_html, alias)
+        return transpose_html_table(quality_html_with_alias)
+
+
+def analyze_file(path, selected_services=None, include_html=False, stage_callback=None, event_callback=None,
+                 engine="lasio", full_detail=True, depth_range=None):
+    """Run load → process → header validation → service compliance on one file.
+
+    Devuelve un dict con el resumen plano (apto para un informe), los DataFrames
+    de resultados y, si se pide, el HTML de la tabla de calidad. Los errores se
+    propagan como QcError. ``stage_callback("qc")`` se llama al terminar la lectura
+    y ``event_callback`` recibe los resultados parciales de iter_process_las.
+    ``engine="columnar"`` lee y controla con columnar.py (arreglo compacto,
+    welly solo para el HTML); "lasio" es el camino de referencia. Con
+    ``full_detail=False`` el motor columnar guarda y controla solo las curvas
+    de los servicios seleccionados (la detección de servicios sigue usando
+    todo el encabezado) y con ``depth_range`` (tope, base) solo las muestras
+    de ese intervalo. Si el archivo necesita el camino de referencia (curvas de
+    texto) se controla completo y el resultado lo indica con ``depth_range=None``.
+    """
+    started = time.perf_counter()
+    service_groups = get_service_groups()
+    alias_dict = get_alias()
+    selected_services = list(service_groups) if selected_services is None else list(selected_services)
+    if engine == "columnar":
+        from columnar import NonNumericCurveError, load_columnar_path, process_columnar
+
+        mnemonics = None if full_detail else required_mnemonics(selected_services, service_groups, alias_dict)
+        try:
+            columnar_well = load_columnar_path(path, mnemonics=mnemonics, depth_range=depth_range)
+            las = columnar_well.las
+        except NonNumericCurveError:
+            engine = "lasio"  # curvas de texto: solo el camino de referencia las controla igual
+    if engine != "columnar":
+        depth_range = None
+        las, las_content_str = load_las_path(path)
+    parsed = time.perf_counter()
+    if stage_callback:
+        stage_callback("qc")
+
+    if engine == "columnar":
+        results_df, well_info_df, stats_df, _ = process_columnar(columnar_well, event_callback)
+    else:
+        results_df, well_info_df, stats_df, project, _ = process_las(las, las_content_str, event_callback)
+
+    with span("validation"):
+        well_name, company_name, date, fld_value = get_well_identity(las)
+        detected_services = detect_services(las, service_groups, alias_dict)
+        header_complies, non_compliant_variables = validate_header(well_info_df.drop(columns=['Empty']))
+        services_complies, service_failures = get_service_compliance(selected_services, detected_services,
+                                                                     results_df, service_groups, alias_dict)
+    annotate(size_bytes=os.path.getsize(path), curves=len(las.curves), samples=len(las.index))
+    if include_html:
+        quality_html = quality_table_html(columnar_well.project if engine == "columnar" else project, alias_dict)
+    else:
+        quality_html = None
+    checked = time.perf_counter()
+
+    return {
+        "file": path,
+        "size_bytes": os.path.getsize(path),
+        "las": las,
+        "well": str(well_name),
+        "company": str(company_name),
+        "date": str(date),
+        "field": str(fld_value),
+        "curves": len(las.curves),
+        "samples": len(las.index),
+        "selected_services": selected_services,
+        "detected_services": detected_services,
+        "header_ok": bool(header_complies),
+        "missing_header": non_compliant_variables,
+        "services_ok": bool(services_complies),
+        "service_failures": service_failures,
+        "failed_tests": int(results_df['Test Results'].str.count('🔴').sum()) if not results_df.empty else 0,
+        "passed": bool(header_complies and services_complies),
+        # False: ``las`` solo tiene las curvas o el intervalo controlados, o datos en float32 (ver columnar.py)
+        "full_detail": not columnar_well.partial if engine == "columnar" else True,
+        "depth_range": depth_range,
+        "results_df": results_df,
+        "well_info_df": well_info_df,
+        "stats_df": stats_df,
+        "quality_html": quality_html,
+        "parse_s": parsed - started,
+        "qc_s": checked - parsed,
+    }
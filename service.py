@@ -0,0 +1,339 @@
+# service.py
+"""Local HTTP QC service with a job API on top of a process pool.
+
+    POST /jobs?services=A,B&deliver=0     cuerpo: el .LAS (o .las.gz/.zst); encabezado X-Filename opcional
+        → 202 {"job_id": ..., "status": "queued"}
+    GET  /jobs/<id>?wait=30               resultado JSON; ``wait`` hace long-poll hasta N segundos
+    GET  /health                          estado del pool y de la cola
+    GET  /metrics                         métricas en formato de texto de Prometheus (ver metrics.py)
+
+El cuerpo se copia a disco por bloques a medida que llega (nunca entero en
+memoria). Los análisis corren en un ProcessPoolExecutor y la cantidad de
+trabajos aceptados a la vez está acotada por ``max_jobs``: por encima se
+responde 503 con Retry-After.
+
+    python service.py [--host 127.0.0.1] [--port 8765] [--workers N] [--max-jobs 64]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from batch import analyze_path
+from config import get_service_settings
+from logging_setup import configure_logging
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# Cuerpo que se descarta para responder 503 sin cerrar la conexión; uno más grande la cierra
+DRAIN_LIMIT = CHUNK_SIZE
+
+
+class Job:
+    """State of one submitted analysis."""
+
+    __slots__ = ('job_id', 'file_name', 'path', 'status', 'result', 'created', 'finished', 'done', 'future')
+
+    def __init__(self, job_id, file_name, path):
+        self.job_id = job_id
+        self.file_name = file_name
+        self.path = path
+        self.status = "queued"
+        self.result = None
+        self.created = time.time()
+        self.finished = None
+        self.done = threading.Event()
+        self.future = None
+
+    def to_dict(self):
+        """Return the public JSON view of the job."""
+        if self.status == "queued" and self.future is not None and self.future.running():
+            self.status = "running"
+        return {
+            "job_id": self.job_id,
+            "file_name": self.file_name,
+            "status": self.status,
+            "created": self.created,
+            "finished": self.finished,
+            "result": self.result,
+        }
+
+
+class QcService:
+    """Job registry plus the process pool that runs the analyses."""
+
+    def __init__(self, workers=None, max_jobs=64, spool_dir="tempDir/service", job_ttl=3600.0,
+                 max_upload_bytes=512 * 1024 * 1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.spool_dir = spool_dir
+        self.job_ttl = job_ttl
+        self.max_upload_bytes = max_upload_bytes
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._active = 0
+        os.makedirs(spool_dir, exist_ok=True)
+        metrics.QUEUE_DEPTH.set_function(lambda: max(self._active - self.workers, 0))
+        metrics.RUNNING.set_function(lambda: min(self._active, self.workers))
+
+    def try_reserve(self):
+        """Reserve a slot for a new job; False when the service is saturated."""
+        with self._lock:
+            if self._active >= self.max_jobs:
+                return False
+            self._active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+
+    def submit(self, file_name, path, selected_services=None, deliver=False):
+        """Queue an analysis of a spooled file and return its Job."""
+        job = Job(uuid.uuid4().hex, file_name, path)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        future = self.executor.submit(analyze_path, path, selected_services, deliver)
+        job.future = future
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job
+
+    def _finish(self, job, future):
+        try:
+            job.result = future.result()
+            job.status = "error" if job.result.get("error") else "done"
+        except Exception as e:
+            job.result = {"error": str(e)}
+            job.status = "error"
+        job.finished = time.time()
+        metrics.observe_analysis(job.finished - job.created, job.result.get("size_bytes"), job.result.get("parse_s"),
+                                 outcome="ok" if job.status == "done" else "error")
+        try:
+            os.remove(job.path)
+        except OSError:
+            pass
+        self.release()
+        job.done.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def purge_expired(self):
+        """Forget finished jobs older than the TTL."""
+        limit = time.time() - self.job_ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < limit]:
+                del self._jobs[job_id]
+
+    def health(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "active_jobs": self._active,
+                "max_jobs": self.max_jobs,
+                "known_jobs": len(self._jobs),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class QcRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of QcService (the instance is attached to the server)."""
+
+    server_version = "LasQty/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.qc_service
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _iter_body(self):
+        """Yield the request body in chunks, for Content-Length or chunked transfer encoding."""
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return
+                remaining = size
+                while remaining:
+                    chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ConnectionError("Cuerpo incompleto")
+                    remaining -= len(chunk)
+                    yield chunk
+                self.rfile.readline()
+        else:
+            remaining = int(self.headers.get('Content-Length', '0'))
+            while remaining:
+                chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ConnectionError("Cuerpo incompleto")
+                remaining -= len(chunk)
+                yield chunk
+
+    def _drain_body(self):
+        """Discard a small body so the connection can be reused; mark larger ones for closing."""
+        chunked = self.headers.get('Transfer-Encoding', '').lower() == 'chunked'
+        try:
+            length = int(self.headers.get('Content-Length', '0'))
+        except ValueError:
+            length = None
+        if chunked or length is None or length > DRAIN_LIMIT:
+            self.close_connection = True
+            return
+        for _ in self._iter_body():
+            pass
+
+    def _spool_body(self, path):
+        written = 0
+        with open(path, 'wb') as f:
+            for chunk in self._iter_body():
+                written += len(chunk)
+                if written > self.service.max_upload_bytes:
+                    raise ValueError("El archivo supera el tamaño máximo permitido")
+                f.write(chunk)
+        return written
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Ruta desconocida"})
+            return
+        if not self.service.try_reserve():
+            # Hay que consumir el cuerpo para poder responder sobre la misma conexión
+            self._drain_body()
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Servicio saturado"}, {'Retry-After': '5'})
+            return
+
+        query = parse_qs(url.query)
+        file_name = os.path.basename(self.headers.get('X-Filename', 'upload.las'))
+        path = os.path.join(self.service.spool_dir, f"{uuid.uuid4().hex}_{file_name}")
+        try:
+            size = self._spool_body(path)
+        except Exception as e:
+            self.service.release()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            # El resto del cuerpo quedó sin leer: la conexión no se puede reutilizar
+            self.close_connection = True
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        if size == 0:
+            self.service.release()
+            os.remove(path)
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Cuerpo vacío"})
+            return
+
+        services = query.get('services')
+        selected_services = [service for service in services[0].split(',') if service] if services else None
+        deliver = query.get('deliver', ['0'])[0] in ('1', 'true', 'yes')
+        job = self.service.submit(file_name, path, selected_services, deliver)
+        self._send_json(HTTPStatus.ACCEPTED, {"job_id": job.job_id, "status": job.status},
+                        {'Location': f"/jobs/{job.job_id}"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        if parts == ['health']:
+            self._send_json(HTTPStatus.OK, self.service.health())
+            return
+        if parts == ['metrics']:
+            body = metrics.REGISTRY.render().encode('utf-8')
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if len(parts) != 2 or parts[0] != 'jobs':
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Ruta desconocida"})
+            return
+
+        try:
+            wait = float(parse_qs(url.query).get('wait', ['0'])[0] or 0)
+        except ValueError:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Parámetro wait inválido"})
+            return
+        job = self.service.get(parts[1])
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Trabajo desconocido"})
+            return
+        if wait > 0:
+            job.done.wait(min(wait, 300))
+        self._send_json(HTTPStatus.OK, job.to_dict())
+
+
+def create_server(host=None, port=None, **service_options):
+    """Build the HTTP server and its QcService from config plus overrides."""
+    settings = get_service_settings()
+    options = {key: settings[key] for key in ('workers', 'max_jobs', 'spool_dir', 'job_ttl', 'max_upload_bytes')}
+    options.update({key: value for key, value in service_options.items() if value is not None})
+    server = ThreadingHTTPServer((host or settings["host"], settings["port"] if port is None else port),
+                                 QcRequestHandler)
+    server.daemon_threads = True
+    server.qc_service = QcService(**options)
+    return server
+
+
+def _purge_loop(server, interval=60):
+    while True:
+        time.sleep(interval)
+        server.qc_service.purge_expired()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de control de calidad de LAS.")
+    parser.add_argument('--host', default=None)
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-jobs', type=int, default=None)
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    server = create_server(args.host, args.port, workers=args.workers, max_jobs=args.max_jobs)
+    threading.Thread(target=_purge_loop, args=(server,), daemon=True).start()
+    host, port = server.server_address[:2]
+    logger.info("Servicio de QC en http://%s:%d (%d procesos)", host, port, server.qc_service.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.qc_service.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# sidecar.py
+"""Columnar sidecar files (Arrow IPC or Parquet) written next to verified LAS files.
+
+Cada curva es una columna (la profundidad incluida); los canales de arreglo
+(mnemónicos repetidos como VDL:1..VDL:n o VDL[0]..VDL[n]) se guardan como una
+sola columna de listas de tamaño fijo. Los ítems de encabezado viajan como
+metadatos del esquema, de modo que el sidecar se puede leer sin el .LAS.
+"""
+import importlib.util
+import json
+import re
+
+import numpy as np
+
+SIDECAR_SUFFIXES = {
+    "arrow": ".arrow",
+    "parquet": ".parquet",
+}
+
+_INDEXED_MNEMONIC = re.compile(r'^(?P<base>.+?)\[(?P<index>\d+)\]$')
+
+
+def available_formats():
+    """Return the sidecar formats usable in this environment."""
+    return list(SIDECAR_SUFFIXES) if importlib.util.find_spec('pyarrow') is not None else []
+
+
+def _arrow():
+    # pyarrow es opcional y pesado: se importa recién al escribir o leer un sidecar
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as pa_ipc
+    except ImportError as e:
+        raise RuntimeError("El paquete 'pyarrow' no está instalado; no se pueden usar sidecars.") from e
+    return pa, pa_ipc
+
+
+def sidecar_path(las_path, fmt="arrow"):
+    """Return the sidecar path that goes next to an archived LAS file."""
+    for suffix in ('.gz', '.zst'):
+        if las_path.lower().endswith(suffix):
+            las_path = las_path[:-len(suffix)]
+    return las_path + SIDECAR_SUFFIXES[fmt]
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _section_items(section):
+    return [
+        {"mnemonic": item.mnemonic, "unit": item.unit, "value": _json_value(item.value), "descr": item.descr}
+        for item in section
+    ]
+
+
+def header_metadata(las):
+    """Return the LAS header sections as schema metadata (JSON strings)."""
+    metadata = {
+        "las.version": _section_items(las.version),
+        "las.well": _section_items(las.well),
+        "las.curves": [
+            {"mnemonic": curve.mnemonic, "unit": curve.unit, "descr": curve.descr,
+             "original_mnemonic": curve.original_mnemonic}
+            for curve in las.curves
+        ],
+        "las.params": _section_items(las.params),
+        "las.other": las.other or "",
+    }
+    return {key: json.dumps(value, ensure_ascii=False) for key, value in metadata.items()}
+
+
+def group_curves(las):
+    """Group LAS curves into (column name, [curve indices]) pairs, merging array channels."""
+    groups = []
+    for i, curve in enumerate(las.curves):
+        match = _INDEXED_MNEMONIC.match(curve.mnemonic)
+        if match:
+            base = match.group('base')
+        elif ':' in curve.mnemonic and curve.original_mnemonic != curve.mnemonic:
+            base = curve.original_mnemonic
+        else:
+            base = None
+
+        if base is not None and groups and groups[-1][0] == base and groups[-1][2]:
+            groups[-1][1].append(i)
+        else:
+            groups.append([base if base is not None else curve.mnemonic, [i], base is not None])
+    # Un canal "de arreglo" con un solo elemento conserva su mnemónico propio
+    return [(name if len(indices) > 1 else las.curves[indices[0]].mnemonic, indices) for name, indices, _ in groups]
+
+
+def build_table(las):
+    """Build an Arrow table with one column per curve (array channels as fixed-size lists)."""
+    pa, _ = _arrow()
+    data = np.asarray(las.data, dtype=np.float64)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+
+    columns = []
+    fields = []
+    for name, indices in group_curves(las):
+        first = las.curves[indices[0]]
+        field_metadata = {"unit": first.unit or "", "descr": first.descr or ""}
+        if len(indices) == 1:
+            array = pa.array(np.ascontiguousarray(data[:, indices[0]]), type=pa.float64())
+            field = pa.field(name, pa.float64(), metadata=field_metadata)
+        else:
+            block = np.ascontiguousarray(data[:, indices[0]:indices[-1] + 1])
+            values = pa.array(block.reshape(-1), type=pa.float64())
+            array = pa.FixedSizeListArray.from_arrays(values, len(indices))
+            field_metadata["channels"] = json.dumps([las.curves[i].mnemonic for i in indices])
+            field = pa.field(name, array.type, metadata=field_metadata)
+        columns.append(array)
+        fields.append(field)
+
+    schema = pa.schema(fields, metadata=header_metadata(las))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def write_sidecar(las, las_path, fmt="arrow"):
+    """Write the columnar sidecar for an archived LAS file and return its path."""
+    if fmt not in SIDECAR_SUFFIXES:
+        raise ValueError(f"Formato de sidecar desconocido: {fmt}")
+    pa, pa_ipc = _arrow()
+    table = build_table(las)
+    path = sidecar_path(las_path, fmt)
+
+    if fmt == "arrow":
+        # IPC sin comprimir para poder mapearlo en memoria sin copias
+        with pa.OSFile(path, 'wb') as sink:
+            with pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression='zstd')
+    return path
+
+
+def _format_of(path):
+    return "parquet" if path.lower().endswith(SIDECAR_SUFFIXES["parquet"]) else "arrow"
+
+
+def read_table(path, columns=None):
+    """Read a sidecar as an Arrow table, memory-mapping Arrow IPC files."""
+    pa, pa_ipc = _arrow()
+    if _format_of(path) == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=True)
+
+    source = pa.memory_map(path, 'r')
+    table = pa_ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+
+def read_curve(path, mnemonic, with_depth=True):
+    """Return one curve (and the depth index) from a sidecar as numpy arrays."""
+    pa, _ = _arrow()
+    schema = read_schema(path)
+    depth_name = schema.names[0]
+    columns = [depth_name, mnemonic] if with_depth and mnemonic != depth_name else [mnemonic]
+    table = read_table(path, columns=columns)
+
+    column = table.column(mnemonic).combine_chunks()
+    if pa.types.is_fixed_size_list(column.type):
+        values = column.flatten().to_numpy(zero_copy_only=False).reshape(len(column), column.type.list_size)
+    else:
+        values = column.to_numpy(zero_copy_only=False)
+
+    if not with_depth or mnemonic == depth_name:
+        return values
+    depth = table.column(depth_name).combine_chunks().to_numpy(zero_copy_only=False)
+    return depth, values
+
+
+def read_schema(path):
+    """Return the Arrow schema of a sidecar without reading any data."""
+    pa, pa_ipc = _arrow()
+    if _format_of(path) == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_schema(path)
+    with pa.memory_map(path, 'r') as source:
+        return pa_ipc.open_file(source).schema
+
+
+def read_header(path):
+    """Return the LAS header sections stored in a sidecar's metadata."""
+    metadata = read_schema(path).metadata or {}
+    return {key.decode(): json.loads(value) for key, value in metadata.items() if key.startswith(b'las.')}
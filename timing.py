@@ -0,0 +1,121 @@
+# timing.py
+"""Lightweight per-stage timing spans for the analysis pipeline.
+
+Las funciones del pipeline marcan sus etapas con ``span("nombre")``; solo se
+mide algo si hay un registro activo (``recording()``) en el contexto actual,
+así que fuera de la app el costo es una consulta a un ContextVar. Las
+duraciones de un mismo nombre se suman (p. ej. las pruebas de todas las
+curvas). Cada análisis de la app se agrega como una línea JSON al log de
+métricas para analizarlo después:
+
+    python timing.py [metrics.jsonl]     # resumen por etapa del log
+"""
+import contextvars
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from config import get_metrics_settings
+
+_current = contextvars.ContextVar("las_qty_spans", default=None)
+
+
+class SpanRecorder:
+    """Accumulated stage durations plus attributes (file size, curves, samples...) of one run."""
+
+    def __init__(self, **attrs):
+        self.attrs = dict(attrs)
+        self.spans = {}
+        self.started = time.perf_counter()
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def merge(self, record, prefix=""):
+        """Add the spans and attributes of another record (e.g. the one returned by a worker)."""
+        for name, seconds in record.get("spans", {}).items():
+            self.add(prefix + name, seconds)
+        for key, value in record.get("attrs", {}).items():
+            self.attrs.setdefault(key, value)
+
+    def to_dict(self):
+        return {
+            "attrs": dict(self.attrs),
+            "spans": dict(self.spans),
+            "total_s": time.perf_counter() - self.started,
+        }
+
+
+@contextmanager
+def recording(**attrs):
+    """Activate a SpanRecorder for the spans run inside the block."""
+    recorder = SpanRecorder(**attrs)
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Time a stage into the active recorder; a no-op when nothing is recording."""
+    recorder = _current.get()
+    if recorder is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - started)
+
+
+def annotate(**attrs):
+    """Attach attributes to the active recorder, if any."""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.attrs.update(attrs)
+
+
+def append_metrics_log(record, path=None):
+    """Append a timing record as one JSON line to the metrics log."""
+    path = path or get_metrics_settings()["log_path"]
+    line = dict(record, ts=datetime.now(timezone.utc).isoformat(timespec='milliseconds'))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+
+
+def summarize_log(path):
+    """Return {stage: (runs, mean s, max s)} over the records of a metrics log."""
+    totals = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            for name, seconds in record.get("spans", {}).items():
+                totals.setdefault(name, []).append(seconds)
+    return {name: (len(values), sum(values) / len(values), max(values)) for name, values in totals.items()}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else get_metrics_settings()["log_path"]
+    if not os.path.exists(path):
+        print(f"No existe el log de métricas {path}")
+        return 2
+    print(f"{'etapa':<28} {'corridas':>8} {'media ms':>9} {'máx ms':>9}")
+    for name, (runs, mean, maximum) in sorted(summarize_log(path).items(), key=lambda item: -item[1][1]):
+        print(f"{name:<28} {runs:>8} {mean * 1000:>9.1f} {maximum * 1000:>9.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,10 @@
 import logging
 import os
 import streamlit as st
+from logging_setup import configure_logging
 
-# Configuración del registro
-logging.basicConfig(filename='app.log', level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-
-st.set_page_config(page_title="Control de calidad de .LAS", page_icon="📄", layout="wide")
+# Configuración del registro: DEBUG para los mensajes propios, lasio y welly quedan en WARNING
+configure_logging(level=logging.DEBUG, log_file='app.log')
 
 def save_uploadedfile(uploadedfile, temp_dir="tempDir"):
     os.makedirs(temp_dir, exist_ok=True)
@@ -30,6 +29,7 @@ def save_to_shared_drive(file_path, file_name):
         return False, str(e)
 
 def main():
+    st.set_page_config(page_title="Control de calidad de .LAS", page_icon="📄", layout="wide")
     st.title('Control de calidad de información entregada')
     uploaded_file = st.file_uploader("Cargar archivo .LAS", type=['.las', '.LAS'])
     
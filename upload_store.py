@@ -0,0 +1,219 @@
+# upload_store.py
+"""Content-addressed store for uploaded LAS files, shared by the Streamlit sessions.
+
+Cada subida se guarda una sola vez como ``<raíz>/<sha256[:2]>/<sha256><ext>``:
+dos usuarios que suben archivos con el mismo nombre ya no se pisan, y dos
+subidas idénticas comparten la copia en disco y el resultado del análisis.
+Las sesiones toman referencias sobre los archivos; los que quedan sin
+referencias se borran en orden LRU cuando el total supera la cuota, y las
+referencias de sesiones cerradas se liberan con ``release_dead_sessions``.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+ARCHIVE_SUFFIXES = ('.gz', '.zst')
+
+
+def upload_extension(file_name):
+    """Return the extension to keep for a stored upload (.las, .las.gz, .las.zst)."""
+    root, extension = os.path.splitext(file_name.lower())
+    if extension in ARCHIVE_SUFFIXES:
+        return os.path.splitext(root)[1] + extension
+    return extension
+
+
+def _sha256_chunks(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _feed_chunks(chunk_callback, chunks):
+    for chunk in chunks:
+        if chunk_callback(chunk):
+            break
+
+
+class UploadStore:
+    """Deduplicated upload files with per-session reference counts and an LRU disk quota."""
+
+    def __init__(self, root="tempDir/uploads", quota_bytes=2 * 1024 ** 3, result_entries=32):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.result_entries = result_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # sha256 -> {"path", "size", "last_used", "sessions"}
+        self._results = OrderedDict()
+        os.makedirs(root, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        # Archivos de corridas anteriores del servidor: sin referencias, candidatos a desalojo
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.startswith('.'):
+                    os.remove(path)  # escritura a medio terminar
+                    continue
+                stat = os.stat(path)
+                sha = name.split('.', 1)[0]
+                self._entries[sha] = {"path": path, "size": stat.st_size, "last_used": stat.st_mtime,
+                                      "sessions": set()}
+
+    def path_for(self, sha, file_name):
+        return os.path.join(self.root, sha[:2], sha + upload_extension(file_name))
+
+    def add(self, session_id, fileobj, file_name, progress_callback=None, chunk_callback=None):
+        """Store an upload (if new) and reference it from the session; return (sha256, path).
+
+        Si el objeto expone ``getbuffer()`` (los UploadedFile de Streamlit) se
+        escribe por porciones del mismo buffer, sin copias, mientras otros hilos
+        calculan el SHA-256 y pasan las porciones a ``chunk_callback`` (que
+        devuelve True cuando no necesita más). El callback de progreso se llama
+        siempre desde el hilo que invoca ``add``.
+        """
+        temp_path = os.path.join(self.root, f".{uuid.uuid4().hex}.part")
+        if hasattr(fileobj, 'getbuffer'):
+            sha, size = self._write_overlapped(fileobj, temp_path, progress_callback, chunk_callback)
+        else:
+            sha, size = self._write_sequential(fileobj, temp_path, progress_callback, chunk_callback)
+        return sha, self._commit(session_id, sha, file_name, temp_path, size)
+
+    @staticmethod
+    def _write_overlapped(fileobj, temp_path, progress_callback, chunk_callback):
+        with fileobj.getbuffer() as view:
+            chunks = [view[start:start + CHUNK_SIZE] for start in range(0, len(view), CHUNK_SIZE)]
+            try:
+                # hashlib y la escritura a disco liberan el GIL con porciones grandes
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    hashing = executor.submit(_sha256_chunks, chunks)
+                    scanning = executor.submit(_feed_chunks, chunk_callback, chunks) if chunk_callback else None
+                    with open(temp_path, 'wb') as f:
+                        for index, chunk in enumerate(chunks, 1):
+                            f.write(chunk)
+                            if progress_callback:
+                                progress_callback(index / len(chunks))
+                    sha = hashing.result()
+                    if scanning is not None:
+                        scanning.result()
+            finally:
+                for chunk in chunks:
+                    chunk.release()
+            return sha, len(view)
+
+    @staticmethod
+    def _write_sequential(fileobj, temp_path, progress_callback, chunk_callback):
+        digest = hashlib.sha256()
+        total = getattr(fileobj, 'size', None)
+        written = 0
+        scanning = chunk_callback is not None
+        with open(temp_path, 'wb') as f:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                if scanning:
+                    scanning = not chunk_callback(chunk)
+                written += len(chunk)
+                if progress_callback and total:
+                    progress_callback(min(written / total, 1.0))
+        return digest.hexdigest(), written
+
+    def _commit(self, session_id, sha, file_name, temp_path, size):
+        with self._lock:
+            entry = self._entries.get(sha)
+            if entry is not None and os.path.exists(entry["path"]):
+                os.remove(temp_path)
+            else:
+                path = self.path_for(sha, file_name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                entry = {"path": path, "size": size, "last_used": time.time(), "sessions": set()}
+                self._entries[sha] = entry
+            entry["sessions"].add(session_id)
+            entry["last_used"] = time.time()
+            self._evict()
+            return entry["path"]
+
+    def acquire(self, session_id, sha):
+        """Add a session reference to an already stored upload; return its path or None."""
+        with self._lock:
+            entry = self._entries.get(sha)
+            if entry is None or not os.path.exists(entry["path"]):
+                return None
+            entry["sessions"].add(session_id)
+            entry["last_used"] = time.time()
+            return entry["path"]
+
+    def release(self, session_id, keep=()):
+        """Drop the references of a session, except the uploads listed in ``keep``."""
+        with self._lock:
+            for sha, entry in self._entries.items():
+                if sha not in keep:
+                    entry["sessions"].discard(session_id)
+            self._evict()
+
+    def release_dead_sessions(self, is_alive):
+        """Drop the references of every session for which ``is_alive(session_id)`` is False."""
+        with self._lock:
+            sessions = set().union(*(entry["sessions"] for entry in self._entries.values())) if self._entries else set()
+        dead = [session_id for session_id in sessions if not is_alive(session_id)]
+        for session_id in dead:
+            self.release(session_id)
+        return len(dead)
+
+    def _evict(self):
+        # Llamar con el lock tomado
+        total = sum(entry["size"] for entry in self._entries.values())
+        if total <= self.quota_bytes:
+            return
+        for sha, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.quota_bytes:
+                break
+            if entry["sessions"]:
+                continue
+            try:
+                os.remove(entry["path"])
+            except OSError as e:
+                logger.warning("No se pudo borrar %s: %s", entry["path"], e)
+                continue
+            total -= entry["size"]
+            del self._entries[sha]
+            for key in [key for key in self._results if key[0] == sha]:
+                del self._results[key]
+        if total > self.quota_bytes:
+            logger.warning("Cuota de subidas excedida (%.0f MB) por archivos en uso", total / 1e6)
+
+    def get_result(self, sha, key):
+        """Return a cached analysis result of an upload, or None."""
+        with self._lock:
+            result = self._results.get((sha, key))
+            if result is not None:
+                self._results.move_to_end((sha, key))
+            return result
+
+    def put_result(self, sha, key, result):
+        with self._lock:
+            self._results[(sha, key)] = result
+            self._results.move_to_end((sha, key))
+            while len(self._results) > self.result_entries:
+                self._results.popitem(last=False)
+
+    def usage(self):
+        """Return (stored files, bytes, bytes referenced by live sessions)."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return (len(entries), sum(entry["size"] for entry in entries),
+                sum(entry["size"] for entry in entries if entry["sessions"]))
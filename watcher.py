@@ -0,0 +1,312 @@
+# watcher.py
+"""Watch-folder daemon that runs QC automatically on LAS files dropped in inboxes.
+
+Usa watchdog (inotify en Linux, ReadDirectoryChangesW en Windows) si está
+instalado y, si no, un sondeo periódico de las carpetas. Un archivo se procesa
+recién cuando su tamaño y mtime no cambian durante ``stable_seconds``; se
+descarta si su SHA-256 ya fue procesado o ya está en el archivo verificado.
+Los archivos aceptados pasan por la cola persistente (jobqueue, campaña
+"watch"): si el demonio se reinicia, retoma lo que había quedado pendiente o a
+medio analizar. Los análisis corren en un pool de procesos acotado y lo que no
+entra espera en la cola, así que la memoria no crece con la ráfaga.
+
+    python watcher.py [CARPETA ...] [--workers N] [--no-deliver] [--once]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+from batch import analyze_path
+from catalog import connect, file_checksum, is_las_path
+from config import get_watch_settings
+from jobqueue import PRIORITY_WATCH, claim, enqueue, finish, release_dead_owners, renew, run_job, worker_id
+from logging_setup import configure_logging
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog es opcional: sin él se sondean las carpetas
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se olvidan los archivos ya procesados que salieron de las carpetas
+PRUNE_INTERVAL = 60.0
+
+INBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inbox_files (
+    checksum TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    passed INTEGER,
+    delivered INTEGER,
+    error TEXT,
+    report TEXT,
+    processed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_inbox_files_path ON inbox_files(path);
+"""
+
+
+class _InboxEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.dest_path)
+
+
+class InboxWatcher:
+    """Detect stable LAS drops in the inboxes and QC them in a bounded process pool."""
+
+    def __init__(self, inboxes, workers=None, stable_seconds=5.0, poll_interval=2.0, max_in_flight=None,
+                 selected_services=None, deliver=True, delivery_options=None, db_path=None, use_events=True):
+        self.inboxes = [os.path.abspath(path) for path in inboxes]
+        self.workers = workers or os.cpu_count() or 1
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.selected_services = selected_services
+        self.deliver = deliver
+        self.delivery_options = delivery_options or {}
+        self.db_path = db_path
+        self.use_events = use_events and Observer is not None
+
+        self._lock = threading.Lock()
+        self._candidates = {}  # path -> (size, mtime, desde cuándo no cambia)
+        self._handled = {}  # path -> (size, mtime) ya despachado o descartado, para no re-hashear
+        self._notified = set()
+        self._in_flight = {}  # future -> trabajo de la cola
+        self._owner = worker_id()
+        self._stop = threading.Event()
+        self._observer = None
+        self.stats = {"processed": 0, "passed": 0, "duplicates": 0, "errors": 0}
+
+    def notify(self, path):
+        """Register a filesystem event for a path (called from the observer thread)."""
+        if is_las_path(path):
+            with self._lock:
+                self._notified.add(os.path.abspath(path))
+
+    def _prune_handled(self):
+        # Olvidar los archivos que ya no están para que _handled no crezca sin límite (en ambos modos)
+        for path in [path for path in self._handled if not os.path.exists(path)]:
+            del self._handled[path]
+
+    def _scan_inboxes(self):
+        paths = set()
+        for inbox in self.inboxes:
+            try:
+                with os.scandir(inbox) as entries:
+                    paths.update(entry.path for entry in entries if entry.is_file() and is_las_path(entry.name))
+            except OSError as e:
+                logger.warning("No se puede leer la carpeta %s: %s", inbox, e)
+        return paths
+
+    def _known_checksum(self, conn, checksum):
+        row = conn.execute("SELECT 1 FROM inbox_files WHERE checksum = ? UNION ALL "
+                           "SELECT 1 FROM las_files WHERE checksum = ? UNION ALL "
+                           "SELECT 1 FROM qc_jobs WHERE checksum = ? AND state != 'failed' LIMIT 1",
+                           (checksum, checksum, checksum)).fetchone()
+        return row is not None
+
+    def _stable_paths(self, paths, now):
+        """Update the stability tracking and return the paths that stopped changing."""
+        ready = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self._candidates.pop(path, None)
+                continue
+            if self._handled.get(path) == (stat.st_size, stat.st_mtime):
+                continue
+            previous = self._candidates.get(path)
+            if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+                self._candidates[path] = (stat.st_size, stat.st_mtime, now)
+            elif now - previous[2] >= self.stable_seconds and stat.st_size > 0:
+                ready.append(path)
+        return ready
+
+    def _record(self, conn, checksum, path, status, row=None):
+        row = row or {}
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO inbox_files (checksum, path, status, passed, delivered, error, report, processed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(checksum) DO UPDATE SET path=excluded.path, status=excluded.status,
+                    passed=excluded.passed, delivered=excluded.delivered, error=excluded.error,
+                    report=excluded.report, processed_at=excluded.processed_at
+                """,
+                (checksum, path, status, row.get("passed"), row.get("delivered"), row.get("error"),
+                 json.dumps(row, ensure_ascii=False, default=str) if row else None,
+                 datetime.now(timezone.utc).isoformat(timespec='seconds')),
+            )
+
+    def _collect_finished(self, conn):
+        for future in [future for future in self._in_flight if future.done()]:
+            job = self._in_flight.pop(future)
+            path = job["path"]
+            try:
+                row = future.result()
+            except Exception as e:
+                row = {"file": path, "error": str(e)}
+            finish(conn, job["id"], self._owner, row)
+            status = "error" if row.get("error") else ("passed" if row.get("passed") else "failed")
+            if job["campaign"] == "watch":
+                self._record(conn, job["checksum"], path, status, row)
+            self.stats["processed"] += 1
+            self.stats["passed"] += status == "passed"
+            self.stats["errors"] += status == "error"
+            logger.info("%s %s (%.2f s)", status.upper(), path, row.get("total_s", 0.0))
+
+    def _enqueue_ready(self, conn, ready):
+        """Hash the stable files and queue the ones never seen before."""
+        options = {"selected_services": self.selected_services, "deliver": self.deliver,
+                   "delivery_options": self.delivery_options}
+        for path in ready:
+            size, mtime, _ = self._candidates.pop(path)
+            self._handled[path] = (size, mtime)
+            try:
+                checksum = file_checksum(path)
+            except OSError as e:
+                logger.warning("No se pudo leer %s: %s", path, e)
+                continue
+            if self._known_checksum(conn, checksum):
+                self.stats["duplicates"] += 1
+                logger.info("DUPLICADO %s (ya procesado)", path)
+                continue
+            enqueue(conn, [path], "watch", PRIORITY_WATCH, options, checksums={path: checksum})
+
+    def _dispatch(self, conn, executor):
+        """Fill the pool with jobs leased from the queue."""
+        while len(self._in_flight) < self.max_in_flight:
+            job = claim(conn, self._owner, "watch")
+            if job is None:
+                break
+            job["lease_owner"] = self._owner
+            self._in_flight[executor.submit(run_job, job, self.db_path)] = job
+        renew(conn, self._owner, [job["id"] for job in self._in_flight.values()])
+
+    def _pending_jobs(self, conn):
+        return conn.execute("SELECT COUNT(*) FROM qc_jobs WHERE campaign = 'watch' AND state = 'pending'"
+                            ).fetchone()[0]
+
+    def _start_observer(self):
+        self._observer = Observer()
+        handler = _InboxEventHandler(self)
+        for inbox in self.inboxes:
+            self._observer.schedule(handler, inbox, recursive=False)
+        self._observer.start()
+
+    def stop(self):
+        """Ask the main loop to finish after the current iteration."""
+        self._stop.set()
+
+    def run(self, once=False):
+        """Run the watch loop; with ``once`` exit when the inboxes are drained."""
+        conn = connect(self.db_path)
+        conn.executescript(INBOX_SCHEMA)
+        # Trabajos que quedaron a medio analizar si el demonio anterior murió
+        release_dead_owners(conn)
+        if self.use_events:
+            self._start_observer()
+        logger.info("Vigilando %s con %s (%d procesos, máx. %d en análisis)", ", ".join(self.inboxes),
+                    "eventos del sistema" if self.use_events else "sondeo", self.workers, self.max_in_flight)
+
+        # Primer barrido completo: archivos que llegaron mientras el demonio no corría
+        pending = self._scan_inboxes()
+        pruned_at = time.monotonic()
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                while not self._stop.is_set():
+                    now = time.monotonic()
+                    if self.use_events:
+                        with self._lock:
+                            pending |= self._notified
+                            self._notified = set()
+                    else:
+                        pending |= self._scan_inboxes()
+                    pending |= set(self._candidates)
+                    if now - pruned_at >= PRUNE_INTERVAL:
+                        self._prune_handled()
+                        pruned_at = now
+
+                    ready = self._stable_paths(pending, now)
+                    pending = set()
+                    self._collect_finished(conn)
+                    self._enqueue_ready(conn, ready)
+                    self._dispatch(conn, executor)
+
+                    waiting = any(size > 0 for size, _, _ in self._candidates.values()) or self._pending_jobs(conn)
+                    if once and not waiting and not self._in_flight:
+                        break
+                    if self._in_flight:
+                        # Despertar apenas termine un análisis para mantener el pool ocupado
+                        wait(list(self._in_flight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    else:
+                        self._stop.wait(self.poll_interval)
+
+                while self._in_flight:
+                    time.sleep(0.1)
+                    self._collect_finished(conn)
+        finally:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer.join()
+            conn.close()
+        return self.stats
+
+
+def main(argv=None):
+    settings = get_watch_settings()
+    parser = argparse.ArgumentParser(description="Demonio que controla automáticamente los LAS de las carpetas de entrada.")
+    parser.add_argument('inboxes', nargs='*', default=settings["inboxes"])
+    parser.add_argument('--workers', type=int, default=settings["workers"])
+    parser.add_argument('--max-in-flight', type=int, default=settings["max_in_flight"])
+    parser.add_argument('--stable', type=float, default=settings["stable_seconds"])
+    parser.add_argument('--poll', type=float, default=settings["poll_interval"])
+    parser.add_argument('--services', nargs='*', default=None)
+    parser.add_argument('--no-deliver', action='store_true')
+    parser.add_argument('--polling', action='store_true', help="Forzar el sondeo aunque watchdog esté instalado")
+    parser.add_argument('--once', action='store_true', help="Procesar lo que haya y terminar")
+    parser.add_argument('--db', default=None, help="Ruta del catálogo SQLite")
+    args = parser.parse_args(argv)
+
+    if not args.inboxes:
+        parser.error("Indique al menos una carpeta o defina LAS_QTY_INBOXES")
+    configure_logging()
+
+    watcher = InboxWatcher(args.inboxes, workers=args.workers, stable_seconds=args.stable, poll_interval=args.poll,
+                           max_in_flight=args.max_in_flight, selected_services=args.services,
+                           deliver=settings["deliver"] and not args.no_deliver, db_path=args.db,
+                           use_events=not args.polling)
+    try:
+        stats = watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        watcher.stop()
+        return 130
+    logger.info("%d procesados, %d cumplen, %d duplicados, %d con error", stats["processed"], stats["passed"],
+                stats["duplicates"], stats["errors"])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())